@@ -12,6 +12,9 @@ For the full documentation see <http://eelbrain.readthedocs.io>.
 
 
 """
+from importlib import import_module as _import_module
+import sys as _sys
+
 # import this first for a chance to reverse mne's non-standard logging practice
 from . import mne_fixes
 
@@ -19,25 +22,51 @@ from ._data_obj import (Datalist, Dataset, Var, Factor, Interaction, Model,
                         NDVar, Categorial, Sensor, UTS,
                         Celltable, choose, combine, align, align1, cellname,
                         shuffled_index)
-from ._experiment import MneExperiment
-from ._mne import labels_from_clusters, morph_source_space
 from ._ndvar import (Butterworth, concatenate, convolve, cwt_morlet, dss,
                      filter_data, find_intervals, neighbor_correlation,
                      resample, segment)
 from ._trf import boosting, BoostingResult
 from ._utils import set_log_level
-from ._utils.com import check_for_update
 
-from . import datasets
-from . import gui
 from . import load
-from . import plot
 from . import save
 from . import table
 from . import test
-from . import testnd
 
-from .fmtxt import Report
+
+# Submodules and objects that are only imported when they are first accessed,
+# because they pull in heavy dependencies (matplotlib backends, wxPython, ...)
+_LAZY_MODULES = ('datasets', 'gui', 'plot', 'testnd')
+_LAZY_OBJECTS = {
+    'MneExperiment': '._experiment',
+    'labels_from_clusters': '._mne',
+    'morph_source_space': '._mne',
+    'check_for_update': '._utils.com',
+    'Report': '.fmtxt',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return _import_module('.' + name, __name__)
+    elif name in _LAZY_OBJECTS:
+        obj = getattr(_import_module(_LAZY_OBJECTS[name], __name__), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_MODULES, _LAZY_OBJECTS))
+
+
+# module __getattr__ requires Python 3.7 (PEP 562)
+if _sys.version_info < (3, 7):
+    for _name in _LAZY_MODULES:
+        globals()[_name] = _import_module('.' + _name, __name__)
+    for _name in _LAZY_OBJECTS:
+        __getattr__(_name)
 
 
+__all__ = [name for name in __dir__() if not name.startswith('_')]
 __version__ = 'dev'
@@ -64,8 +64,8 @@ import scipy.signal
 import scipy.stats
 from scipy.linalg import inv, norm
 from scipy.optimize import leastsq
-from scipy.spatial import ConvexHull
-from scipy.spatial.distance import cdist, pdist, squareform
+from scipy.spatial import ConvexHull, cKDTree
+from scipy.spatial.distance import cdist
 
 from . import fmtxt
 from . import _colorspaces as cs
@@ -3022,6 +3022,47 @@ class Factor(_Effect):
         return Factor(self.x, name, self.random, repeats, labels=self._labels)
 
 
+_ALIGN_CACHE = OrderedDict()
+_ALIGN_CACHE_SIZE = 128
+
+
+def _align_dims(dim1, dim2):
+    """Find the common dimension and indexes to align two dimensions
+
+    Results are cached based on the identity of ``dim1`` and ``dim2``, so that
+    repeated operations on NDVars with the same dimension objects do not need
+    to compare and intersect the dimensions again.
+
+    Returns
+    -------
+    dim : Dimension
+        Common dimension (``dim1`` if both dimensions are equal).
+    index1, index2 : slice | array
+        Index into ``dim1`` and ``dim2`` to retrieve ``dim``
+        (``full_slice`` if no cropping is needed).
+    """
+    if dim1 is dim2:
+        return dim1, full_slice, full_slice
+    key = (id(dim1), id(dim2))
+    if key in _ALIGN_CACHE:
+        # the cache holds references to the dimensions, so ids can not be
+        # reused while the entry exists
+        cached_dim1, cached_dim2, out = _ALIGN_CACHE.pop(key)
+        if cached_dim1 is dim1 and cached_dim2 is dim2:
+            _ALIGN_CACHE[key] = (dim1, dim2, out)
+            return out
+
+    if dim1 == dim2:
+        out = (dim1, full_slice, full_slice)
+    else:
+        dim = dim1.intersect(dim2)
+        out = (dim, dim1.dimindex(dim), dim2.dimindex(dim))
+    _ALIGN_CACHE[key] = (dim1, dim2, out)
+    if len(_ALIGN_CACHE) > _ALIGN_CACHE_SIZE:
+        _ALIGN_CACHE.popitem(False)
+    return out
+
+
 class NDVar(object):
     """Container for n-dimensional data.
 
@@ -3199,6 +3240,11 @@ class NDVar(object):
         if isinstance(other, Var):
             return self.dims, self.x, self._ialign(other)
         elif isinstance(other, NDVar):
+            # fast path: both operands share the same dimension objects
+            if (self.ndim == other.ndim and
+                    all(d1 is d2 for d1, d2 in zip(self.dims, other.dims))):
+                return self.dims, self.x, other.x
+
             dimnames = list(self.dimnames)
             i_add = 0
             for dimname in other.dimnames:
@@ -3226,21 +3272,18 @@ class NDVar(object):
                     dim = self.get_dim(name)
                     cs = co = full_slice
                 else:
-                    self_dim = self.get_dim(name)
-                    other_dim = other.get_dim(other_name)
-                    if self_dim == other_dim:
-                        dim = self_dim
-                        cs = co = full_slice
-                    else:
-                        dim = self_dim.intersect(other_dim)
+                    dim, cs, co = _align_dims(self.get_dim(name),
+                                              other.get_dim(other_name))
+                    if cs is not full_slice or co is not full_slice:
                         crop = True
-                        cs = self_dim.dimindex(dim)
-                        co = other_dim.dimindex(dim)
                 dims.append(dim)
                 crop_self.append(cs)
                 crop_other.append(co)
 
-            x_self = self.get_data(self_axes)
+            if i_add:
+                x_self = self.get_data(self_axes)
+            else:
+                x_self = self.x
             x_other = other.get_data(other_axes)
             if crop:
                 x_self = x_self[tuple(crop_self)]
@@ -3682,19 +3725,23 @@ class NDVar(object):
         else:
             edges = list(dim.x[istart:istop:istep])
         edges.append(stop)
+        bins = list(zip(edges[:-1], edges[1:]))
+        i_edges = dim._bin_edges_index(edges)
 
         out_shape = list(self.shape)
         out_shape[axis] = n_bins
         x = np.empty(out_shape)
-        bins = []
         idx_prefix = (full_slice,) * axis
-        for i in range(n_bins):
-            v0 = edges[i]
-            v1 = edges[i + 1]
-            src_idx = idx_prefix + (dim.dimindex((v0, v1)),)
-            dst_idx = idx_prefix + (i,)
-            x[dst_idx] = func(self.x[src_idx], axis=axis)
-            bins.append((v0, v1))
+        if func in BIN_REDUCEAT_FUNCS and np.all(np.diff(i_edges) > 0):
+            # all bins in one pass
+            src_idx = idx_prefix + (slice(i_edges[0], i_edges[-1]),)
+            x[...] = BIN_REDUCEAT_FUNCS[func](self.x[src_idx],
+                                              i_edges - i_edges[0], axis)
+        else:
+            for i in range(n_bins):
+                src_idx = idx_prefix + (slice(i_edges[i], i_edges[i + 1]),)
+                dst_idx = idx_prefix + (i,)
+                x[dst_idx] = func(self.x[src_idx], axis=axis)
 
         dims = list(self.dims)
         dims[axis] = out_dim
@@ -3958,14 +4005,21 @@ class NDVar(object):
         if isinstance(dims, str):
             dims = (dims,)
 
+        dims = tuple(dims)
+        if dims == self.dimnames:
+            return self.x
+
         dims_ = tuple(d for d in dims if d is not newaxis)
         if set(dims_) != set(self.dimnames) or len(dims_) != len(self.dimnames):
             err = "Requested dimensions %r from %r" % (dims, self)
             raise DimensionMismatchError(err)
 
         # transpose
-        axes = tuple(self.dimnames.index(d) for d in dims_)
-        x = self.x.transpose(axes)
+        if dims_ == self.dimnames:
+            x = self.x
+        else:
+            axes = tuple(self.dimnames.index(d) for d in dims_)
+            x = self.x.transpose(axes)
 
         # insert axes
         if len(dims) > len(dims_):
@@ -4687,6 +4741,30 @@ def extrema(x, axis=0):
     return np.where(np.abs(max) >= np.abs(min), max, min)
 
 
+def _reduceat_extrema(x, edges, axis):
+    max = np.maximum.reduceat(x, edges[:-1], axis)
+    min = np.minimum.reduceat(x, edges[:-1], axis)
+    return np.where(np.abs(max) >= np.abs(min), max, min)
+
+
+def _reduceat_mean(x, edges, axis):
+    n = np.diff(edges)
+    n.shape = (len(n),) + (1,) * (x.ndim - axis - 1)
+    return np.add.reduceat(x, edges[:-1], axis) / n
+
+
+# summary functions for NDVar.bin() that can be applied to all bins at once;
+# each is called as func(x, edges, axis), where edges are the index bin edges
+# along axis (starting with 0 and ending with len(x))
+BIN_REDUCEAT_FUNCS = {
+    np.sum: lambda x, edges, axis: np.add.reduceat(x, edges[:-1], axis),
+    np.max: lambda x, edges, axis: np.maximum.reduceat(x, edges[:-1], axis),
+    np.min: lambda x, edges, axis: np.minimum.reduceat(x, edges[:-1], axis),
+    np.mean: _reduceat_mean,
+    extrema: _reduceat_extrema,
+}
+
+
 class Datalist(list):
     """:py:class:`list` subclass for including lists in in a Dataset.
 
@@ -6839,23 +6917,36 @@ def _subgraph_edges(connectivity, int_index):
     "Extract connectivity for a subset of a graph"
     if connectivity is None:
         return None
+    elif len(connectivity) == 0 or len(int_index) == 0:
+        return np.empty((0, 2), dtype=np.uint32)
 
-    idx = np.logical_and(np.in1d(connectivity[:, 0], int_index),
-                         np.in1d(connectivity[:, 1], int_index))
-    if np.any(idx):
-        new_c = connectivity[idx]
+    # map old to new vertex indices (-1 for vertices not in the subset)
+    new_index = np.empty(max(connectivity.max(), int_index.max()) + 1, np.int64)
+    new_index.fill(-1)
+    new_index[int_index] = np.arange(len(int_index))
+    new_c = new_index[connectivity]
+    return new_c[np.all(new_c >= 0, 1)].astype(np.uint32)
 
-        # remap to new vertex indices
-        if np.any(np.diff(int_index) < 1):  # non-monotonic index
-            argsort = np.argsort(int_index)
-            flat_conn_ = np.digitize(new_c.ravel(), int_index[argsort], True)
-            flat_conn = argsort[flat_conn_]
-        else:
-            flat_conn = np.digitize(new_c.ravel(), int_index, True)
 
-        return flat_conn.reshape(new_c.shape).astype(np.uint32)
-    else:
-        return np.empty((0, 2), dtype=np.uint32)
+def _unique_edges(edges):
+    """Sorted unique edges
+
+    Parameters
+    ----------
+    edges : array of int, (n_edges, 2)
+        Edges, possibly with duplicates.
+
+    Returns
+    -------
+    edges : array of uint32, (n_unique_edges, 2)
+        Unique edges, sorted lexicographically.
+    """
+    edges = np.asarray(edges, np.int64)
+    if len(edges) == 0:
+        return np.empty((0, 2), np.uint32)
+    n = edges.max() + 1
+    codes = np.unique(edges[:, 0] * n + edges[:, 1])
+    return np.column_stack((codes // n, codes % n)).astype(np.uint32)
 
 
 class Dimension(object):
@@ -7338,6 +7429,12 @@ class Ordered(Scalar):
             stop = digitize_slice_endpoint(stop, self.values)
         return slice(start, stop, step)
 
+    def _bin_edges_index(self, edges):
+        "Index for bin edges (in ``self.values``) as array of int"
+        if edges[-1] is None:
+            edges = list(edges[:-1]) + [self.values[-1] + 1]
+        return np.digitize(edges, self.values, True)
+
     def _diminfo(self):
         name = self.name.capitalize(),
         vmin = self.x.min()
@@ -7911,16 +8008,14 @@ class Sensor(Dimension):
             Dictionaries whose keys are sensor indices, and whose values are
             lists of neighbors represented as sensor indices.
         """
+        tree = cKDTree(self.locs)
+        nearest = tree.query(self.locs, 2)[0][:, 1]
         nb = {}
-        pd = pdist(self.locs)
-        pd = squareform(pd)
-        n = len(self)
-        for i in range(n):
-            d = pd[i, np.arange(n)]
-            d[i] = d.max()
-            idx = np.nonzero(d < d.min() * connect_dist)[0]
-            nb[i] = idx
-
+        for i, (loc, d_min) in enumerate(zip(self.locs, nearest)):
+            max_dist = d_min * connect_dist
+            idx = np.array(sorted(tree.query_ball_point(loc, max_dist)), int)
+            d = norm(self.locs[idx] - loc, axis=1)
+            nb[i] = idx[np.logical_and(d < max_dist, idx != i)]
         return nb
 
     def set_connectivity(self, neighbors=None, connect_dist=None):
@@ -7935,27 +8030,16 @@ class Sensor(Dimension):
             ``connect_dist`` times the distance of the closest neighbor.
             e.g., 1.75 or 1.6
         """
-        pairs = set()
         if neighbors is not None and connect_dist is not None:
             raise TypeError("Can only specify either neighbors or connect_dist")
         elif connect_dist is None:
-            for src, dst in neighbors:
-                a = self.names.index(src)
-                b = self.names.index(dst)
-                if a < b:
-                    pairs.add((a, b))
-                else:
-                    pairs.add((b, a))
+            index = {name: i for i, name in enumerate(self.names)}
+            pairs = [(index[src], index[dst]) for src, dst in neighbors]
         else:
             nb = self.neighbors(connect_dist)
-            for k, vals in nb.items():
-                for v in vals:
-                    if k < v:
-                        pairs.add((k, v))
-                    else:
-                        pairs.add((v, k))
-
-        self._connectivity = np.array(sorted(pairs), np.uint32)
+            pairs = [(k, v) for k, vals in nb.items() for v in vals]
+        pairs = np.sort(np.reshape(pairs, (-1, 2)), 1)
+        self._connectivity = _unique_edges(pairs)
 
     def set_sensor_positions(self, pos, names=None):
         """Set the sensor positions
@@ -8009,18 +8093,12 @@ def as_sensor(obj):
 
 def _point_graph(coords, dist_threshold):
     "Connectivity graph for points based on distance"
-    n = len(coords)
-    dist = pdist(coords)
-
-    # construct vertex pairs corresponding to dist
-    graph = np.empty((len(dist), 2), np.uint32)
-    i0 = 0
-    for vert, di in enumerate(range(n - 1, 0, -1)):
-        i1 = i0 + di
-        graph[i0:i1, 0] = vert
-        graph[i0:i1, 1] = np.arange(vert + 1, n)
-        i0 = i1
-
+    pairs = cKDTree(coords).query_pairs(dist_threshold)
+    if not pairs:
+        return np.empty((0, 2), np.uint32)
+    graph = _unique_edges(list(pairs))
+    # query_pairs includes pairs at exactly dist_threshold
+    dist = norm(coords[graph[:, 0]] - coords[graph[:, 1]], axis=1)
     return graph[dist < dist_threshold]
 
 
@@ -8028,8 +8106,11 @@ def _matrix_graph(matrix):
     "Create connectivity from matrix"
     coo = matrix.tocoo()
     assert np.all(coo.data)
-    edges = {(min(a, b), max(a, b)) for a, b in zip(coo.col, coo.row) if a != b}
-    return np.array(sorted(edges), np.uint32)
+    idx = coo.row != coo.col
+    row = coo.row[idx]
+    col = coo.col[idx]
+    return _unique_edges(np.column_stack((np.minimum(row, col),
+                                          np.maximum(row, col))))
 
 
 def _tri_graph(tris):
@@ -8045,40 +8126,61 @@ def _tri_graph(tris):
     edges : array (n_edges, 2)
         All edges between vertices of tris.
     """
-    pairs = set()
-    for tri in tris:
-        a, b, c = sorted(tri)
-        pairs.add((a, b))
-        pairs.add((a, c))
-        pairs.add((b, c))
-    return np.array(sorted(pairs), np.uint32)
+    tris = np.sort(tris, 1)
+    return _unique_edges(np.vstack((tris[:, [0, 1]], tris[:, [0, 2]],
+                                    tris[:, [1, 2]])))
+
 
+# cache for source space graphs: {path: (mtime, [(vertno, edges), ...])}
+_SOURCE_SPACE_GRAPHS = OrderedDict()
+_SOURCE_SPACE_GRAPHS_SIZE = 128
 
-def _mne_tri_soure_space_graph(source_space, vertices_list):
-    "Connectivity graph for a triangulated mne source space"
+
+def _source_space_graphs(path):
+    """Connectivity graphs for all vertices of a triangulated source space
+
+    Returns
+    -------
+    graphs : list of (array, array)
+        For each hemisphere, the source space vertices and the edges among
+        them (in surface vertex ids).
+    """
+    mtime = os.path.getmtime(path)
+    if path in _SOURCE_SPACE_GRAPHS:
+        cached_mtime, graphs = _SOURCE_SPACE_GRAPHS.pop(path)
+        if cached_mtime == mtime:
+            _SOURCE_SPACE_GRAPHS[path] = (mtime, graphs)
+            return graphs
+    graphs = [(ss['vertno'], _tri_graph(ss['use_tris'])) for ss in
+              mne.read_source_spaces(path)]
+    _SOURCE_SPACE_GRAPHS[path] = (mtime, graphs)
+    if len(_SOURCE_SPACE_GRAPHS) > _SOURCE_SPACE_GRAPHS_SIZE:
+        _SOURCE_SPACE_GRAPHS.popitem(False)
+    return graphs
+
+
+def _mne_tri_soure_space_graph(source_space_graphs, vertices_list):
+    """Connectivity graph for a triangulated mne source space
+
+    Parameters
+    ----------
+    source_space_graphs : list of (array, array)
+        Graphs for the whole source space (see :func:`_source_space_graphs`).
+    vertices_list : list of array
+        Vertices included in the graph (one array per hemisphere).
+    """
     i = 0
     graphs = []
-    for ss, verts in zip(source_space, vertices_list):
+    for (src_vertices, graph), verts in zip(source_space_graphs, vertices_list):
         if len(verts) == 0:
             continue
 
-        # graph for the whole source space
-        src_vertices = ss['vertno']
-        tris = ss['use_tris']
-        graph = _tri_graph(tris)
-
-        # select relevant edges
+        # select relevant edges and reassign vertex ids based on present
+        # vertices (verts are sorted, so edges stay sorted)
         if not np.array_equal(verts, src_vertices):
             if not np.all(np.in1d(verts, src_vertices)):
                 raise RuntimeError("Not all vertices are in the source space")
-            edge_in_use = np.logical_and(np.in1d(graph[:, 0], verts),
-                                         np.in1d(graph[:, 1], verts))
-            graph = graph[edge_in_use]
-
-        # reassign vertex ids based on present vertices
-        if len(verts) != verts.max() + 1:
-            graph = (np.digitize(graph.ravel(), verts, True)
-                     .reshape(graph.shape).astype(np.uint32))
+        graph = _subgraph_edges(graph, verts)
 
         # account for index of previous source spaces
         if i > 0:
@@ -8140,6 +8242,7 @@ class SourceSpace(Dimension):
         self.grade = grade
         self._subjects_dir = subjects_dir
         self._connectivity = connectivity
+        self._connectivity_parc = None  # (parc, connectivity, parc_connectivity)
         self._n_vert = sum(len(v) for v in vertno)
         if kind == 'ico':
             self.lh_vertno = vertno[0]
@@ -8338,13 +8441,14 @@ class SourceSpace(Dimension):
                        "src, subject and subjects_dir parameters")
                 raise ValueError(err)
 
-            src = self.get_source_space()
             if self.kind == 'vol':
+                src = self.get_source_space()
                 coords = src[0]['rr'][self.vertno[0]]
                 dist_threshold = self.grade * 0.0011
                 connectivity = _point_graph(coords, dist_threshold)
             elif self.kind == 'ico':
-                connectivity = _mne_tri_soure_space_graph(src, self.vertno)
+                graphs = _source_space_graphs(self._src_path())
+                connectivity = _mne_tri_soure_space_graph(graphs, self.vertno)
             else:
                 msg = "Connectivity for %r source space" % self.kind
                 raise NotImplementedError(msg)
@@ -8360,8 +8464,14 @@ class SourceSpace(Dimension):
             if parc is None:
                 raise RuntimeError("SourceSpace has no parcellation (use "
                                    ".set_parc())")
-            idx = np.array([parc[s] == parc[d] for s, d in connectivity])
-            connectivity = connectivity[idx]
+            cache = self._connectivity_parc
+            if (cache is not None and cache[0] is parc and
+                    cache[1] is connectivity):
+                return cache[2]
+            idx = parc.x[connectivity[:, 0]] == parc.x[connectivity[:, 1]]
+            parc_connectivity = connectivity[idx]
+            self._connectivity_parc = (parc, connectivity, parc_connectivity)
+            return parc_connectivity
 
         return connectivity
 
@@ -8486,12 +8596,13 @@ class SourceSpace(Dimension):
         else:
             return Dimension._index_repr(self, index)
 
+    def _src_path(self):
+        return self._src_pattern.format(subjects_dir=self.subjects_dir,
+                                        subject=self.subject, src=self.src)
+
     def get_source_space(self):
         "Read the corresponding MNE source space"
-        path = self._src_pattern.format(subjects_dir=self.subjects_dir,
-                                        subject=self.subject, src=self.src)
-        src = mne.read_source_spaces(path)
-        return src
+        return mne.read_source_spaces(self._src_path())
 
     def index_for_label(self, label):
         """Return the index for a label
@@ -8899,6 +9010,13 @@ class UTS(Dimension):
 
         return slice(start_, stop_, step_)
 
+    def _bin_edges_index(self, edges):
+        "Index for bin edges (in seconds) as array of int"
+        self._dimindex_for_slice(edges[0], edges[-1])  # check range
+        i_float = (np.asarray(edges) - self.tmin) / self.tstep
+        index = np.ceil(i_float - 0.000001).astype(int)
+        return index.clip(0, self.nsamples)
+
     def _index_repr(self, arg):
         if isinstance(arg, slice):
             return slice(None if arg.start is None else self._index_repr(arg.start),
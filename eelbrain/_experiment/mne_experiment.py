@@ -3,12 +3,15 @@
 
 from collections import defaultdict, Sequence
 import inspect
+import hashlib
 from itertools import chain, product
 import logging
+from multiprocessing import cpu_count
 import os
 from os.path import exists, getmtime, isdir, join, relpath
 import re
 import shutil
+import tempfile
 import time
 
 import numpy as np
@@ -26,11 +29,11 @@ from .. import save
 from .. import table
 from .. import testnd
 from .._data_obj import (
-    Datalist, Dataset, DimensionMismatchError, Factor, OldVersionError, Var,
-    align, all_equal, as_legal_dataset_key, asfactor,
+    Datalist, Dataset, DimensionMismatchError, Factor, NDVar, OldVersionError,
+    UTS, Var, align, all_equal, as_legal_dataset_key, asfactor,
     assert_is_legal_dataset_key, combine)
 from .._info import BAD_CHANNELS
-from .._io.fiff import KIT_NEIGHBORS
+from .._io.fiff import KIT_NEIGHBORS, _source_space_dim, _stc_info
 from .._io.pickle import update_subjects_dir
 from .._names import INTERPOLATE_CHANNELS
 from .._meeg import new_rejection_ds
@@ -39,9 +42,10 @@ from .._mne import (
     morph_source_space, shift_mne_epoch_trigger)
 from ..mne_fixes import (
     write_labels_to_annot, _interpolate_bads_eeg, _interpolate_bads_meg)
+from ..mne_fixes._inverse import InverseKernel
 from ..mne_fixes._trans import hsp_equal, mrk_equal
 from .._ndvar import cwt_morlet
-from ..fmtxt import List, Report, Image, read_meta
+from ..fmtxt import List, Report, Image, Section, read_meta
 from .._report import named_list, enumeration, plural
 from .._resources import predefined_connectivity
 from .._stats import spm
@@ -58,8 +62,8 @@ from .parc import (
     Parcellation, CombinationParcellation, EelbrainParcellation,
     FreeSurferParcellation, FSAverageParcellation, SeededParcellation)
 from .preprocessing import (
-    assemble_pipeline, RawICA, pipeline_dict, compare_pipelines,
-    ask_to_delete_ica_files)
+    assemble_pipeline, CachedRawPipe, RawICA, cache_raw_pipes, pipeline_dict,
+    compare_pipelines, ask_to_delete_ica_files)
 
 
 # current cache state version
@@ -390,12 +394,25 @@ temp = {
     'cache-dir': join('{root}', 'eelbrain-cache'),
     'input-state-file': join('{cache-dir}', 'input-state.pickle'),
     'cache-state-file': join('{cache-dir}', 'cache-state.pickle'),
+    # report sections (same folder structure as report-file)
+    'report-cache-dir': join('{cache-dir}', 'report', '{analysis} {group}',
+                             '{folder}', '{epoch} {test}'),
+    'report-cache-file': join('{report-cache-dir}', '*.pickled'),
+    'report-parc-cache-file': join('{cache-dir}', 'report parc',
+                                   '{parc}.pickled'),
     # raw
     'raw-cache-dir': join('{cache-dir}', 'raw', '{subject}'),
     'raw-cache-base': join('{raw-cache-dir}', '{session} {raw}'),
     'cached-raw-file': '{raw-cache-base}-raw.fif',
     'event-file': '{raw-cache-base}-evts.pickled',
     'interp-file': '{raw-cache-base}-interp.pickled',
+    'interp-eeg-file': '{raw-cache-base}-interp-eeg.pickled',
+    # epochs
+    'epochs-cache-base': join('{cache-dir}', 'epochs', '{subject}',
+                              '{session} {sns_kind} {epoch} {raw} {rej}'),
+    'epochs-cache-file': '{epochs-cache-base} *',
+    # memory-mapped source estimates
+    'stc-memmap-dir': join('{cache-dir}', 'stc-memmap'),
 
     # forward modeling:
     # Two raw files with
@@ -535,6 +552,9 @@ class MneExperiment(FileTree):
     _raw = LEGACY_RAW
     raw = {}
 
+    # cache single trial data loaded as NDVar (see load_epochs)
+    cache_epochs = False
+
     # add this value to all trigger times
     trigger_shift = 0
 
@@ -1461,6 +1481,8 @@ class MneExperiment(FileTree):
                 # evoked files are based on old events
                 for subject, session in invalid_cache['events']:
                     rm['evoked-file'].add({'subject': subject, 'session': session})
+                    rm['epochs-cache-file'].add({'subject': subject,
+                                                 'session': session})
 
                 # variables
                 for var in invalid_cache['variables']:
@@ -1476,6 +1498,7 @@ class MneExperiment(FileTree):
                 for raw in invalid_cache['raw']:
                     rm['cached-raw-file'].add({'raw': raw})
                     rm['evoked-file'].add({'raw': raw})
+                    rm['epochs-cache-file'].add({'raw': raw})
                     analysis = {'analysis': '* %s *' % raw}
                     rm['test-file'].add(analysis)
                     rm['report-file'].add(analysis)
@@ -1485,6 +1508,7 @@ class MneExperiment(FileTree):
                 # epochs
                 for epoch in invalid_cache['epochs']:
                     rm['evoked-file'].add({'epoch': epoch})
+                    rm['epochs-cache-file'].add({'epoch': epoch})
                     for cov, cov_params in self._covs.items():
                         if cov_params.get('epoch') != epoch:
                             continue
@@ -1511,6 +1535,7 @@ class MneExperiment(FileTree):
                     rm['annot-file'].add({'parc': parc})
                     rm['test-file'].add({'data_parc': parc})
                     rm['report-file'].add({'folder': parc})
+                    rm['report-parc-cache-file'].add({'parc': parc})
                     rm['res-file'].add({'analysis': 'Source Annot',
                                         'resname': parc + ' * *', 'ext': 'p*'})
 
@@ -1519,6 +1544,10 @@ class MneExperiment(FileTree):
                     rm['test-file'].add({'test': test})
                     rm['report-file'].add({'test': test})
 
+                # cached report sections follow the report files
+                for args in rm['report-file']:
+                    rm['report-cache-file'].add(args)
+
                 # find actual files to delete
                 files = set()
                 for temp, arg_dicts in rm.items():
@@ -1831,7 +1860,8 @@ class MneExperiment(FileTree):
         return {'min' + dim: criteria[dim] for dim in dims if dim in criteria}
 
     def _add_epochs(self, ds, epoch, baseline, ndvar, data_raw, pad, decim,
-                    reject, apply_ica, trigger_shift, eog, tmin, tmax):
+                    reject, apply_ica, trigger_shift, eog, tmin, tmax,
+                    dtype=None):
         modality = self.get('modality')
         if tmin is None:
             tmin = epoch.tmin
@@ -1867,17 +1897,18 @@ class MneExperiment(FileTree):
         if reject and ds.info[INTERPOLATE_CHANNELS]:
             if modality == '':
                 interp_path = self.get('interp-file')
-                if exists(interp_path):
-                    interp_cache = load.unpickle(interp_path)
-                else:
-                    interp_cache = {}
-                n_in_cache = len(interp_cache)
-                _interpolate_bads_meg(ds['epochs'], ds[INTERPOLATE_CHANNELS],
-                                      interp_cache)
-                if len(interp_cache) > n_in_cache:
-                    save.pickle(interp_cache, interp_path)
+                interpolate = _interpolate_bads_meg
             else:
-                _interpolate_bads_eeg(ds['epochs'], ds[INTERPOLATE_CHANNELS])
+                interp_path = self.get('interp-eeg-file')
+                interpolate = _interpolate_bads_eeg
+            if exists(interp_path):
+                interp_cache = load.unpickle(interp_path)
+            else:
+                interp_cache = {}
+            n_in_cache = len(interp_cache)
+            interpolate(ds['epochs'], ds[INTERPOLATE_CHANNELS], interp_cache)
+            if len(interp_cache) > n_in_cache:
+                save.pickle(interp_cache, interp_path)
 
         # ICA
         if ica is not None:
@@ -1889,7 +1920,8 @@ class MneExperiment(FileTree):
             sysname = self._sysname(ds.info['raw'], ds.info['subject'], modality)
             name = self._ndvar_name_for_modality(modality)
             ds[name] = load.fiff.epochs_ndvar(ds['epochs'], sysname=sysname,
-                                              data=self._data_arg(modality, eog))
+                                              data=self._data_arg(modality, eog),
+                                              dtype=dtype)
             if ndvar != 'both':
                 del ds['epochs']
             if modality == 'eeg':
@@ -1900,7 +1932,51 @@ class MneExperiment(FileTree):
 
         return ds
 
-    def _add_epochs_stc(self, ds, ndvar, baseline, morph, mask):
+    def _add_epochs_cached(self, ds, epoch, baseline, data_raw, pad, decim,
+                           reject, apply_ica, trigger_shift, eog, tmin, tmax,
+                           add_bads, cat, dtype=None):
+        "Like ._add_epochs() with ndvar=True, using the epochs cache"
+        key = (baseline, pad, decim, reject, apply_ica, trigger_shift, eog,
+               tmin, tmax, add_bads, cat, self.get('modality'))
+        if dtype is not None:
+            key += (np.dtype(dtype).str,)
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        base = '%s %s' % (self.get('epochs-cache-base', mkdir=True),
+                          digest[:10])
+        data_path = base + '.npy'
+        info_path = base + '.pickled'
+        i_start = ds['i_start'].x
+
+        # load from cache
+        mtime = self._epochs_mtime()
+        if mtime and exists(info_path) and getmtime(info_path) > mtime:
+            name, dims, info, cached_i_start = load.unpickle(info_path)
+            if np.array_equal(cached_i_start, i_start):
+                # copy-on-write: in-place modification does not affect cache
+                x = np.load(data_path, mmap_mode='c')
+                ds[name] = NDVar(x, dims, info, name)
+                if data_raw is False:
+                    del ds.info['raw']
+                return ds
+
+        ds = self._add_epochs(ds, epoch, baseline, True, data_raw or True, pad,
+                              decim, reject, apply_ica, trigger_shift, eog,
+                              tmin, tmax, dtype)
+        name = self._ndvar_name_for_modality(self.get('modality'))
+        y = ds[name]
+        # write to a new file and move it into place: arrays loaded earlier
+        # still map the old file, which must not be modified in place
+        tmp_path = base + '.tmp.npy'
+        np.save(tmp_path, y.x)
+        os.replace(tmp_path, data_path)
+        # info file is written last and marks the cache as complete
+        save.pickle((name, y.dims, y.info, i_start), info_path)
+        if data_raw is False:
+            del ds.info['raw']
+        return ds
+
+    def _add_epochs_stc(self, ds, ndvar, baseline, morph, mask, dtype=None,
+                        memmap=False):
         """
         Transform epochs contained in ds into source space
 
@@ -1922,6 +1998,11 @@ class MneExperiment(FileTree):
         mask : bool | str
             Discard data that is labelled 'unknown' by the parcellation (only
             applies to NDVars, default False).
+        dtype : numpy dtype
+            Data type for the source estimate NDVar (default float64).
+        memmap : bool
+            Write the source estimate NDVar to a memory-mapped file (see
+            :meth:`.load_epochs_stc`).
         """
         subject = ds['subject']
         if len(subject.cells) != 1:
@@ -1934,7 +2015,6 @@ class MneExperiment(FileTree):
 
         epochs = ds['epochs']
         inv = self.load_inv(epochs)
-        stc = apply_inverse_epochs(epochs, inv, **self._params['apply_inv_kw'])
 
         if ndvar:
             parc = self.get('parc') or None
@@ -1942,34 +2022,99 @@ class MneExperiment(FileTree):
                 parc = mask
                 self.set(parc=mask)
             self.make_annot()
-            subject = self.get('mrisubject')
-            src = self.get('src')
-            mri_sdir = self.get('mri-sdir')
-            src = load.fiff.stc_ndvar(stc, subject, src, mri_sdir,
-                                      self._params['apply_inv_kw']['method'],
-                                      self._params['make_inv_kw'].get('fixed', False),
-                                      parc=parc,
-                                      connectivity=self.get('connectivity'))
-            if baseline:
-                src -= src.summary(time=baseline)
-
-            if morph:
-                common_brain = self.get('common_brain')
-                with self._temporary_state:
-                    self.make_annot(mrisubject=common_brain)
-                ds['srcm'] = morph_source_space(src, common_brain)
-                if mask:
-                    _mask_ndvar(ds, 'srcm')
-            else:
-                ds['src'] = src
-                if mask:
-                    _mask_ndvar(ds, 'src')
+            key = 'srcm' if morph else 'src'
+            ds[key] = self._apply_inverse_epochs_ndvar(epochs, inv, baseline,
+                                                       morph, mask, parc, dtype,
+                                                       memmap)
         else:
             if baseline:
                 raise NotImplementedError("Baseline for SourceEstimate")
+            if memmap:
+                raise NotImplementedError("memmap for SourceEstimate")
             if morph:
                 raise NotImplementedError("Morphing for SourceEstimate")
-            ds['stc'] = stc
+            ds['stc'] = apply_inverse_epochs(epochs, inv,
+                                             **self._params['apply_inv_kw'])
+
+    def _apply_inverse_epochs_ndvar(self, epochs, inv, baseline, morph, mask,
+                                    parc, dtype=None, memmap=False):
+        """Source estimates for epochs as NDVar
+
+        The inverse kernel is applied to blocks of epochs, and each block is
+        baseline corrected, morphed and masked before it is written to the
+        output array. This avoids holding intermediate copies of the whole
+        dataset in memory. Blocks are computed in double precision and only
+        converted to ``dtype`` when they are written to the output array,
+        which can be memory-mapped (``memmap=True``).
+        """
+        apply_kw = self._params['apply_inv_kw']
+        kernel = InverseKernel(inv, epochs.ch_names, **apply_kw)
+        mrisubject = self.get('mrisubject')
+        mri_sdir = self.get('mri-sdir')
+        source = _source_space_dim(kernel.vertices, mrisubject,
+                                   self.get('src'), mri_sdir, parc,
+                                   self.get('connectivity'))
+        time = UTS(epochs.times[0], 1. / epochs.info['sfreq'],
+                   len(epochs.times))
+        info = _stc_info(apply_kw['method'],
+                         self._params['make_inv_kw'].get('fixed', False))
+
+        if morph:
+            common_brain = self.get('common_brain')
+            with self._temporary_state:
+                self.make_annot(mrisubject=common_brain)
+                src_to = self.load_src(mrisubject=common_brain)
+            vertices_to = [ss['vertno'] for ss in src_to]
+            if mrisubject == common_brain or is_fake_mri(self.get('mri-dir')):
+                morph_mat = None  # morph_source_space() does not need it
+            else:
+                morph_mat = mne.compute_morph_matrix(
+                    mrisubject, common_brain, source.vertno, vertices_to, None,
+                    mri_sdir)
+
+        data = epochs.get_data()
+        n_epochs = len(data)
+        block_size = kernel.block_size(len(time))
+        out = keep = None
+        for start in range(0, n_epochs, block_size):
+            stop = min(start + block_size, n_epochs)
+            y = NDVar(kernel.apply(data[start:stop]), ('case', source, time),
+                      info)
+            if baseline:
+                y -= y.summary(time=baseline)
+            if morph:
+                y = morph_source_space(y, common_brain, vertices_to, morph_mat)
+            if mask and out is None:
+                keep = np.invert(y.source.parc.startswith('unknown'))
+                if keep.all():
+                    keep = None
+            if keep is not None:
+                y = y.sub(source=keep)
+            if out is None:
+                shape = (n_epochs,) + y.shape[1:]
+                if memmap:
+                    x = self._stc_memmap(shape, dtype)
+                else:
+                    x = np.empty(shape, dtype)
+                out = NDVar(x, ('case',) + y.dims[1:], y.info.copy())
+            out.x[start:stop] = y.x
+        return out
+
+    def _stc_memmap(self, shape, dtype):
+        """Memory-mapped array in the cache directory
+
+        The file is removed right away where the operating system allows it,
+        so that its storage is released when the array is deleted.
+        """
+        fd, path = tempfile.mkstemp('.npy', dir=self.get('stc-memmap-dir',
+                                                         mkdir=True))
+        os.close(fd)
+        x = np.lib.format.open_memmap(path, 'w+', np.dtype(dtype), shape)
+        try:
+            os.remove(path)
+        except OSError:  # Windows does not allow removing open files
+            pass
+        return x
 
     def _add_evoked_stc(self, ds, ind_stc=False, ind_ndvar=False, morph_stc=False,
                         morph_ndvar=False, baseline=None, keep_evoked=False,
@@ -2007,6 +2152,11 @@ class MneExperiment(FileTree):
         -----
         Assumes that all Evoked of the same subject share the same inverse
         operator.
+
+        Morphed source estimates for ``morph_ndvar`` are written into a
+        preallocated array as they are computed, so that peak memory use is
+        bounded by the final array plus the source estimates of a single
+        evoked response.
         """
         if not any((ind_stc, ind_ndvar, morph_stc, morph_ndvar)):
             raise ValueError("Nothing to load, set at least one of (ind_stc, "
@@ -2037,6 +2187,9 @@ class MneExperiment(FileTree):
 
         collect_morphed_stcs = (morph_stc or morph_ndvar)
         collect_ind_stcs = ind_stc or ind_ndvar
+        src = self.get('src')
+        parc = mask if isinstance(mask, str) else self.get('parc') or None
+        mri_sdir = self.get('mri-sdir')
 
         # make sure annot files are available (needed only for NDVar)
         all_are_common_brain = all(v == common_brain for v in list(from_subjects.values()))
@@ -2050,7 +2203,8 @@ class MneExperiment(FileTree):
         mstcs = []
         invs = {}
         mm_cache = CacheDict(self.load_morph_matrix, 'mrisubject')
-        for subject, evoked in zip(ds['subject'], ds['evoked']):
+        srcm = keep = None
+        for i, (subject, evoked) in enumerate(zip(ds['subject'], ds['evoked'])):
             subject_from = from_subjects[subject]
 
             # get inv
@@ -2078,13 +2232,29 @@ class MneExperiment(FileTree):
                     mm, v_to = mm_cache[subject_from]
                     stc = mne.morph_data_precomputed(subject_from, common_brain,
                                                      stc, v_to, mm)
-                mstcs.append(stc)
+                if morph_stc:
+                    mstcs.append(stc)
+                if morph_ndvar:
+                    if srcm is None:
+                        source = _source_space_dim(
+                            stc.vertices, common_brain, src, mri_sdir, parc,
+                            self.get('connectivity'))
+                        if mask:
+                            keep = np.invert(source.parc.startswith('unknown'))
+                            if keep.all():
+                                keep = None
+                            else:
+                                source = source[keep]
+                        time = UTS(stc.tmin, stc.tstep, stc.shape[1])
+                        info = _stc_info(
+                            self._params['apply_inv_kw']['method'],
+                            self._params['make_inv_kw'].get('fixed', False))
+                        srcm = NDVar(np.empty((ds.n_cases, len(source),
+                                               len(time))),
+                                     ('case', source, time), info)
+                    srcm.x[i] = stc.data if keep is None else stc.data[keep]
 
         # add to Dataset
-        src = self.get('src')
-        parc = mask if isinstance(mask, str) else self.get('parc') or None
-        mri_sdir = self.get('mri-sdir')
-        # for name, key in izip(do, keys):
         if ind_stc:
             ds['stc'] = stcs
         if ind_ndvar:
@@ -2096,17 +2266,10 @@ class MneExperiment(FileTree):
                                             connectivity=self.get('connectivity'))
             if mask:
                 _mask_ndvar(ds, 'src')
-        if morph_stc or morph_ndvar:
-            if morph_stc:
-                ds['stcm'] = mstcs
-            if morph_ndvar:
-                ds['srcm'] = load.fiff.stc_ndvar(mstcs, common_brain, src, mri_sdir,
-                                                 self._params['apply_inv_kw']['method'],
-                                                 self._params['make_inv_kw'].get('fixed', False),
-                                                 parc=parc,
-                                                 connectivity=self.get('connectivity'))
-                if mask:
-                    _mask_ndvar(ds, 'srcm')
+        if morph_stc:
+            ds['stcm'] = mstcs
+        if morph_ndvar:
+            ds['srcm'] = srcm
 
         if not keep_evoked:
             del ds['evoked']
@@ -2579,7 +2742,7 @@ class MneExperiment(FileTree):
                     add_bads=True, reject=True, cat=None,
                     decim=None, pad=0, data_raw=False, vardef=None,
                     eog=False, trigger_shift=True, apply_ica=True, tmin=None,
-                    tmax=None, **kwargs):
+                    tmax=None, dtype=None, **kwargs):
         """
         Load a Dataset with epochs for a given epoch definition
 
@@ -2630,6 +2793,15 @@ class MneExperiment(FileTree):
             Override the epoch's ``tmin`` parameter.
         tmax : scalar
             Override the epoch's ``tmax`` parameter.
+        dtype : numpy dtype
+            Data type for the NDVar (default float64). Use ``np.float32`` to
+            halve the memory footprint of large datasets.
+
+        Notes
+        -----
+        With :attr:`MneExperiment.cache_epochs` set to ``True``, epochs loaded
+        with ``ndvar=True`` are cached, and the data of the returned
+        :class:`NDVar` are memory-mapped from the cache file.
         """
         if ndvar:
             if isinstance(ndvar, str):
@@ -2642,7 +2814,7 @@ class MneExperiment(FileTree):
             for _ in self.iter(group=group):
                 ds = self.load_epochs(None, baseline, ndvar, add_bads, reject,
                                       cat, decim, pad, data_raw, vardef,
-                                      tmin=tmin, tmax=tmax)
+                                      tmin=tmin, tmax=tmax, dtype=dtype)
                 dss.append(ds)
 
             return combine(dss)
@@ -2652,11 +2824,11 @@ class MneExperiment(FileTree):
                 ds_meg = self.load_epochs(subject, baseline, ndvar, add_bads,
                                           reject, cat, decim, pad, data_raw,
                                           vardef, tmin=tmin, tmax=tmax,
-                                          modality='')
+                                          dtype=dtype, modality='')
                 ds_eeg = self.load_epochs(subject, baseline, ndvar, add_bads,
                                           reject, cat, decim, pad, data_raw,
                                           vardef, tmin=tmin, tmax=tmax,
-                                          modality='eeg')
+                                          dtype=dtype, modality='eeg')
             ds, eeg_epochs = align(ds_meg, ds_eeg['epochs'], 'index',
                                    ds_eeg['index'])
             ds['epochs'] = mne.epochs.add_channels_epochs((ds['epochs'], eeg_epochs))
@@ -2675,16 +2847,23 @@ class MneExperiment(FileTree):
                 raise RuntimeError(err)
 
             # load sensor space data
-            ds = self._add_epochs(ds, epoch, baseline, ndvar, data_raw, pad,
-                                  decim, reject, apply_ica, trigger_shift, eog,
-                                  tmin, tmax)
+            if self.cache_epochs and ndvar is True:
+                ds = self._add_epochs_cached(ds, epoch, baseline, data_raw,
+                                             pad, decim, reject, apply_ica,
+                                             trigger_shift, eog, tmin, tmax,
+                                             add_bads, cat, dtype)
+            else:
+                ds = self._add_epochs(ds, epoch, baseline, ndvar, data_raw,
+                                      pad, decim, reject, apply_ica,
+                                      trigger_shift, eog, tmin, tmax, dtype)
 
         return ds
 
     def load_epochs_stc(self, subject=None, sns_baseline=True,
                         src_baseline=False, ndvar=True, cat=None,
                         keep_epochs=False, morph=False, mask=False,
-                        data_raw=False, vardef=None, decim=None, **kwargs):
+                        data_raw=False, vardef=None, decim=None, dtype=None,
+                        memmap=False, **kwargs):
         """Load a Dataset with stcs for single epochs
 
         Parameters
@@ -2722,6 +2901,14 @@ class MneExperiment(FileTree):
             Name of a 2-stage test defining additional variables.
         decim : None | int
             Set to an int in order to override the epoch decim factor.
+        dtype : numpy dtype
+            Data type for the source estimate NDVar (default float64).
+        memmap : bool
+            Write the source estimate NDVar to a memory-mapped file in the
+            cache directory instead of keeping it in memory (only for a single
+            subject with ``ndvar=True``; default False). The file is private
+            to the returned NDVar; its storage is released when the NDVar is
+            deleted.
 
         Returns
         -------
@@ -2747,17 +2934,22 @@ class MneExperiment(FileTree):
                 raise ValueError("Source estimates can only be combined after "
                                  "morphing data to common brain model. Set "
                                  "morph=True.")
+            elif memmap:
+                raise ValueError("Can not memory-map source estimates "
+                                 "combined from multiple subjects. Set "
+                                 "memmap=False (default).")
             dss = []
             for _ in self.iter(group=group):
                 ds = self.load_epochs_stc(None, sns_baseline, src_baseline,
                                           ndvar, cat, keep_epochs, morph, mask,
-                                          False, vardef, decim)
+                                          False, vardef, decim, dtype)
                 dss.append(ds)
             return combine(dss)
         else:
             ds = self.load_epochs(subject, sns_baseline, False, cat=cat,
                                   decim=decim, data_raw=data_raw, vardef=vardef)
-            self._add_epochs_stc(ds, ndvar, src_baseline, morph, mask)
+            self._add_epochs_stc(ds, ndvar, src_baseline, morph, mask, dtype,
+                                 memmap)
             if not keep_epochs:
                 del ds['epochs']
             return ds
@@ -3698,6 +3890,8 @@ class MneExperiment(FileTree):
                         lms.append(spm.LM(y_name, stage1, ds, subject=subject))
                     if return_data:
                         dss.append(ds)
+                    # release the subject's data before loading the next one
+                    del ds
                 print(prog_str % ('#' * n, 'done'))
 
                 if res is None:
@@ -4608,6 +4802,45 @@ class MneExperiment(FileTree):
         pipe = self._raw[self.get('raw')]
         pipe.cache(self.get('subject'), self.get('session'))
 
+    def make_raw_all(self, raw=None, n_jobs=None, **state):
+        """Bring raw files up to date for all subjects and sessions
+
+        Parameters
+        ----------
+        raw : str | sequence of str
+            Raw pipe(s) to update (default is the current ``raw`` setting).
+        n_jobs : int
+            Number of processes to use (default is the number of CPUs).
+        *others* : str
+            State parameters (use the ``group`` parameter to update raw files
+            for a specific group only).
+
+        Notes
+        -----
+        Outdated cache files (including the ones for intermediate pipes,
+        e.g. a Maxwell filter a band-pass filter is based on) are determined
+        upfront, and independent files are then computed in parallel. The
+        mne-python log for each file is saved as ``*.log`` file next to the
+        cache file. Each process holds one raw file in memory, so ``n_jobs``
+        might have to be limited by the available memory.
+        """
+        if state:
+            self.set(**state)
+        if raw is None:
+            raw = (self.get('raw'),)
+        elif isinstance(raw, str):
+            raw = (raw,)
+        pipes = []
+        for name in raw:
+            if name not in self._raw:
+                raise ValueError("raw=%r: no raw pipe named %r" % (raw, name))
+            elif isinstance(self._raw[name], CachedRawPipe):
+                pipes.append(self._raw[name])
+        if not pipes:
+            return
+        items = list(self.iter(('subject', 'session')))
+        cache_raw_pipes(pipes, items, n_jobs or cpu_count(), self._log)
+
     def make_rej(self, decim=None, auto=None, overwrite=False, **kwargs):
         """Open the SelectEpochs GUI for manual epoch selection
 
@@ -4723,6 +4956,59 @@ class MneExperiment(FileTree):
                                 "to recompute: %s", desc)
                 return True
 
+    def _report_section_file(self, kind, mtime, **params):
+        """Cache file for a report section of the current test
+
+        Parameters
+        ----------
+        kind : str
+            Kind of section.
+        mtime : None | scalar
+            Modification time of the data on which the section is based; if
+            the data is not available (None) the section is not cached.
+        ...
+            Parameters on which the section depends.
+
+        Returns
+        -------
+        path : None | str
+            Path of the cached section (content-addressed by ``kind``,
+            ``mtime`` and ``params`` in the ``report-cache-dir`` of the
+            current test), or None if the section can not be cached.
+        """
+        if not mtime:
+            return
+        key = repr((kind, mtime, sorted(params.items())))
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return join(self.get('report-cache-dir', mkdir=True),
+                    '%s.pickled' % name)
+
+    def _test_section_file(self, kind, data, **params):
+        "Cache file for a report section based on the current test"
+        mtime = self._result_mtime(data)
+        return self._report_section_file(kind, mtime,
+                                         test_options=self.get('test_options'),
+                                         **params)
+
+    def _load_report_sections(self, paths):
+        "Load cached report sections (None unless all of them are available)"
+        if not all(path and exists(path) for path in paths):
+            return
+        try:
+            sections = [load.unpickle(path) for path in paths]
+        except Exception as exception:
+            self._log.debug("Error loading cached report section: %s",
+                            exception)
+            return
+        self._log.debug("Using %i cached report sections", len(sections))
+        return sections
+
+    @staticmethod
+    def _save_report_sections(paths, sections):
+        for path, section in zip(paths, sections):
+            if path:
+                save.pickle(section, path)
+
     def make_report(self, test, parc=None, mask=None, pmin=None, tstart=0.15,
                     tstop=None, samples=10000, sns_baseline=True,
                     src_baseline=None, include=0.2, redo=False, **state):
@@ -4758,7 +5044,17 @@ class MneExperiment(FileTree):
             Create plots for all clusters with p-values smaller or equal this value.
         redo : bool
             If the target file already exists, delete and recreate it. This
-            only applies to the HTML result file, not to the test.
+            only applies to the HTML result file, not to the test or to cached
+            report sections that are still valid.
+
+        Notes
+        -----
+        Report sections are cached in the ``report-cache-dir`` of each test,
+        keyed by the parameters they depend on and the modification time of
+        the data entering the test. When a report needs to be recreated, only
+        sections whose parameters changed are computed again. The
+        parcellation image is cached separately for each parcellation and
+        shared between all reports.
         """
         if samples < 1:
             raise ValueError("samples needs to be > 0")
@@ -4789,69 +5085,82 @@ class MneExperiment(FileTree):
 
         # report signature
         report.sign(('eelbrain', 'mne', 'surfer', 'scipy', 'numpy'))
-        report.save_html(dst, meta={'samples': samples})
+        report.save_html(dst, meta={'samples': samples}, stream=True)
 
     def _evoked_report(self, report, test, sns_baseline, src_baseline, pmin,
                        samples, tstart, tstop, parc, mask, include):
-        # load data
-        ds, res = self._load_test(test, tstart, tstop, pmin, parc, mask, samples,
-                                  'source', sns_baseline, src_baseline, True, True)
-
-        # info
         surfer_kwargs = self._surfer_plot_kwargs()
-        self._report_test_info(report.add_section("Test Info"), ds, test, res,
-                               'source', include)
-        if parc:
-            section = report.add_section(parc)
-            caption = "Labels in the %s parcellation." % parc
-            self._report_parc_image(section, caption)
-        elif mask:
-            title = "Whole Brain Masked by %s" % mask
-            section = report.add_section(title)
-            caption = "Mask: %s" % mask.capitalize()
-            self._report_parc_image(section, caption)
-
-        model = self._tests[test]['model']
-        colors = plot.colors_for_categorial(ds.eval(model))
-        report.append(_report.source_time_results(res, ds, colors, include,
-                                                  surfer_kwargs, parc=parc))
+        paths = (
+            self._test_section_file('test-info', 'source', include=include,
+                                    samples=samples),
+            self._test_section_file('source-time-results', 'source',
+                                    include=include, samples=samples,
+                                    parc=parc, surfer_kwargs=surfer_kwargs),
+        )
+        sections = self._load_report_sections(paths)
+        if sections is None:
+            # load data
+            ds, res = self._load_test(test, tstart, tstop, pmin, parc, mask,
+                                      samples, 'source', sns_baseline,
+                                      src_baseline, True, True)
+            # info
+            info_section = Section("Test Info")
+            self._report_test_info(info_section, ds, test, res, 'source',
+                                   include)
+            # results
+            model = self._tests[test]['model']
+            colors = plot.colors_for_categorial(ds.eval(model))
+            results = _report.source_time_results(res, ds, colors, include,
+                                                  surfer_kwargs, parc=parc)
+            sections = (info_section, results)
+            self._save_report_sections(paths, sections)
+
+        info_section, results = sections
+        report.append(info_section)
+        self._report_parc_section(report, parc, mask)
+        report.append(results)
 
     def _two_stage_report(self, report, test, sns_baseline, src_baseline, pmin,
                           samples, tstart, tstop, parc, mask, include):
-        model = self._tests[test].get('model')
-        rlm = self._load_test(test, tstart, tstop, pmin, parc, mask, samples,
-                              'source', sns_baseline, src_baseline, bool(model),
-                              True)
-        if model:
-            group_ds, rlm = rlm
-        else:
-            group_ds = None
-
-        # start report
         surfer_kwargs = self._surfer_plot_kwargs()
-        info_section = report.add_section("Test Info")
-        if parc:
-            section = report.add_section(parc)
-            caption = "Labels in the %s parcellation." % parc
-            self._report_parc_image(section, caption)
-        elif mask:
-            title = "Whole Brain Masked by %s" % mask
-            section = report.add_section(title)
-            caption = "Mask: %s" % mask.capitalize()
-            self._report_parc_image(section, caption)
-
-        # Design matrix
-        section = report.add_section("Design Matrix")
-        section.append(rlm.design())
-
-        # add results to report
-        for term in rlm.column_names:
-            res = rlm.tests[term]
-            ds = rlm._single_column_coefficient(term, asds=True)
-            report.append(_report.source_time_results(res, ds, None, include,
-                                                      surfer_kwargs, term))
-
-        self._report_test_info(info_section, group_ds or ds, test, res, 'source')
+        path = self._test_section_file('two-stage-results', 'source',
+                                       include=include, samples=samples,
+                                       surfer_kwargs=surfer_kwargs)
+        sections = self._load_report_sections((path,))
+        if sections is None:
+            model = self._tests[test].get('model')
+            rlm = self._load_test(test, tstart, tstop, pmin, parc, mask,
+                                  samples, 'source', sns_baseline, src_baseline,
+                                  bool(model), True)
+            if model:
+                group_ds, rlm = rlm
+            else:
+                group_ds = None
+
+            # Design matrix
+            design_section = Section("Design Matrix")
+            design_section.append(rlm.design())
+
+            # results
+            results = []
+            for term in rlm.column_names:
+                res = rlm.tests[term]
+                ds = rlm._single_column_coefficient(term, asds=True)
+                results.append(_report.source_time_results(
+                    res, ds, None, include, surfer_kwargs, term))
+
+            info_section = Section("Test Info")
+            self._report_test_info(info_section, group_ds or ds, test, res,
+                                   'source')
+            sections = ((info_section, design_section, results),)
+            self._save_report_sections((path,), sections)
+
+        info_section, design_section, results = sections[0]
+        report.append(info_section)
+        self._report_parc_section(report, parc, mask)
+        report.append(design_section)
+        for section in results:
+            report.append(section)
 
     def make_report_rois(self, test, parc=None, pmin=None, tstart=0.15, tstop=None,
                          samples=10000, sns_baseline=True, src_baseline=False,
@@ -4900,6 +5209,33 @@ class MneExperiment(FileTree):
         if self._need_not_recompute_report(dst, samples, 'source', redo):
             return
 
+        # the tests for the different ROIs are coupled through the multiple
+        # comparison correction, so their sections are cached together
+        path = self._test_section_file('roi-results', 'source',
+                                       samples=samples)
+        sections = self._load_report_sections((path,))
+        if sections is None:
+            sections = (self._roi_report_sections(test, parc, pmin, tstart,
+                                                  tstop, samples, sns_baseline,
+                                                  src_baseline),)
+            self._save_report_sections((path,), sections)
+        info_section, hemi_sections = sections[0]
+
+        # start report
+        title = self.format('{session} {epoch} {test} {test_options}')
+        report = Report(title)
+        report.append(info_section)
+        caption = "ROIs in the %s parcellation." % parc
+        self._report_parc_section(report, parc, None, caption)
+        for section in hemi_sections:
+            report.append(section)
+
+        report.sign(('eelbrain', 'mne', 'surfer', 'scipy', 'numpy'))
+        report.save_html(dst, meta={'samples': samples}, stream=True)
+
+    def _roi_report_sections(self, test, parc, pmin, tstart, tstop, samples,
+                             sns_baseline, src_baseline):
+        "Compute the test sections for make_report_rois()"
         # load data
         label_names = None
         dss = []
@@ -4925,18 +5261,6 @@ class MneExperiment(FileTree):
                 del label_keys[name]
         ds.info['label_keys'] = label_keys
 
-        # start report
-        title = self.format('{session} {epoch} {test} {test_options}')
-        report = Report(title)
-
-        # method intro (compose it later when data is available)
-        info_section = report.add_section("Test Info")
-
-        # add parc image
-        section = report.add_section(parc)
-        caption = "ROIs in the %s parcellation." % parc
-        self._report_parc_image(section, caption)
-
         # sort labels
         labels_lh = []
         labels_rh = []
@@ -4970,18 +5294,19 @@ class MneExperiment(FileTree):
         else:
             merged_dist = None
 
+        hemi_sections = []
         for hemi, label_names in (('Left', labels_lh), ('Right', labels_rh)):
-            section = report.add_section("%s Hemisphere" % hemi)
+            section = Section("%s Hemisphere" % hemi)
+            hemi_sections.append(section)
             for label in label_names:
                 res = label_results[label]
                 _report.roi_timecourse(section, ds, label, res, colors,
                                        merged_dist=merged_dist)
 
         # compose info
+        info_section = Section("Test Info")
         self._report_test_info(info_section, ds, test, res, 'source')
-
-        report.sign(('eelbrain', 'mne', 'surfer', 'scipy', 'numpy'))
-        report.save_html(dst, meta={'samples': samples})
+        return info_section, hemi_sections
 
     def _make_report_eeg(self, test, pmin=None, tstart=0.15, tstop=None,
                          samples=10000, baseline=True, include=1, **state):
@@ -5152,16 +5477,43 @@ class MneExperiment(FileTree):
         section.append(self._report_subject_info(ds, test_params.get('model')))
         section.append(self.show_state(hide=('hemi', 'subject', 'mrisubject')))
 
-    def _report_parc_image(self, section, caption):
-        "Add picture of the current parcellation"
+    def _report_parc_image(self):
+        "Images of the current parcellation"
         with self._temporary_state:
             self.set(mrisubject=self.get('common_brain'))
             brain, legend = self.plot_annot(axw=500, show=False)
 
         content = [brain.image('parc'), legend.image('parc-legend')]
-        section.add_image_figure(content, caption)
-
         legend.close()
+        return content
+
+    def _report_parc_section(self, report, parc, mask, caption=None):
+        "Add a section with the parcellation used in a test"
+        if parc:
+            title = parc
+            if caption is None:
+                caption = "Labels in the %s parcellation." % parc
+        elif mask:
+            title = "Whole Brain Masked by %s" % mask
+            caption = "Mask: %s" % mask.capitalize()
+        else:
+            return
+
+        # the images only depend on the parcellation
+        mtime = self._annot_file_mtime(self.get('common_brain'))
+        path = self.get('report-parc-cache-file', mkdir=True)
+        content = None
+        if mtime and exists(path) and getmtime(path) > mtime:
+            sections = self._load_report_sections((path,))
+            if sections is not None:
+                content = sections[0]
+        if content is None:
+            content = self._report_parc_image()
+            if mtime:
+                save.pickle(content, path)
+        section = Section(title)
+        section.add_image_figure(content, caption)
+        report.append(section)
 
     def _make_report_lm(self, pmin=0.01, sns_baseline=True, src_baseline=False,
                         mask='lobes'):
@@ -1,7 +1,10 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
 """Pre-processing operations based on NDVars"""
-from os import mkdir, remove
+from multiprocessing import Pool
+from os import makedirs, remove
 from os.path import dirname, exists, getmtime
+from queue import Queue
+import traceback
 
 import mne
 from mne.io import read_raw_fif
@@ -24,6 +27,9 @@ class RawPipe(object):
     def load(self, subject, session, add_bads=True, preload=False):
         path = self.path.format(subject=subject, session=session)
         raw = read_raw_fif(path, preload=preload)
+        return self._set_bads(raw, subject, session, add_bads)
+
+    def _set_bads(self, raw, subject, session, add_bads):
         if add_bads:
             raw.info['bads'] = self.load_bad_channels(subject, session)
         else:
@@ -105,14 +111,25 @@ class RawSource(RawPipe):
 
 
 class CachedRawPipe(RawPipe):
+    """Raw pipe whose output is saved as raw file
 
+    Notes
+    -----
+    With ``'cache': False`` in the raw definition (e.g.,
+    ``{'source': 'raw', 'type': 'filter', 'args': (1, 40), 'cache': False}``),
+    the pipe is virtual: its output is computed in memory whenever it is
+    loaded (on top of its source's output, which might itself be virtual), and
+    no raw file is saved. Making intermediate pipes virtual saves writing and
+    reading the whole recording for each step.
+    """
     _bad_chs_affect_cache = False
 
-    def __init__(self, name, source, path, log):
+    def __init__(self, name, source, path, log, cached=True):
         assert isinstance(source, RawPipe)
         path = path.format(raw=name, subject='{subject}', session='{session}')
         RawPipe.__init__(self, name, path, log)
         self.source = source
+        self.cached = cached
 
     def as_dict(self):
         out = RawPipe.as_dict(self)
@@ -121,17 +138,33 @@ class CachedRawPipe(RawPipe):
 
     def cache(self, subject, session):
         "Make sure the cache is up to date"
-        path = self.path.format(subject=subject, session=session)
-        if (not exists(path) or getmtime(path) <
-                self.mtime(subject, session, self._bad_chs_affect_cache)):
-            dir_path = dirname(path)
-            if not exists(dir_path):
-                mkdir(dir_path)
+        if self.cached and self.cache_outdated(subject, session):
+            path = self.path.format(subject=subject, session=session)
+            # jobs for different sessions might run in parallel
+            makedirs(dirname(path), exist_ok=True)
             with CaptureLog(path[:-3] + 'log'):
                 raw = self._make(subject, session)
             raw.save(path, overwrite=True)
 
+    def cache_outdated(self, subject, session):
+        "Whether the cache needs to be (re-)computed"
+        if not self.cached:
+            return False
+        path = self.path.format(subject=subject, session=session)
+        return (not exists(path) or getmtime(path) <
+                self.mtime(subject, session, self._bad_chs_affect_cache))
+
+    def cached_source(self):
+        "The closest pipe upstream whose output is not virtual"
+        pipe = self.source
+        while isinstance(pipe, CachedRawPipe) and not pipe.cached:
+            pipe = pipe.source
+        return pipe
+
     def load(self, subject, session, add_bads=True, preload=False):
+        if not self.cached:
+            raw = self._make(subject, session)
+            return self._set_bads(raw, subject, session, add_bads)
         self.cache(subject, session)
         return RawPipe.load(self, subject, session, add_bads, preload)
 
@@ -153,8 +186,8 @@ class CachedRawPipe(RawPipe):
 
 class RawFilter(CachedRawPipe):
 
-    def __init__(self, name, source, path, log, args, kwargs):
-        CachedRawPipe.__init__(self, name, source, path, log)
+    def __init__(self, name, source, path, log, args, kwargs, cached=True):
+        CachedRawPipe.__init__(self, name, source, path, log, cached)
         self.args = args
         self.kwargs = kwargs
 
@@ -193,8 +226,9 @@ class RawICA(CachedRawPipe):
     recomputed.
     """
 
-    def __init__(self, name, source, path, ica_path, log, session, kwargs):
-        CachedRawPipe.__init__(self, name, source, path, log)
+    def __init__(self, name, source, path, ica_path, log, session, kwargs,
+                 cached=True):
+        CachedRawPipe.__init__(self, name, source, path, log, cached)
         if isinstance(session, str):
             self.session = (session,)
         else:
@@ -261,8 +295,8 @@ class RawMaxwell(CachedRawPipe):
 
     _bad_chs_affect_cache = True
 
-    def __init__(self, name, source, path, log, kwargs):
-        CachedRawPipe.__init__(self, name, source, path, log)
+    def __init__(self, name, source, path, log, kwargs, cached=True):
+        CachedRawPipe.__init__(self, name, source, path, log, cached)
         self.kwargs = kwargs
 
     def as_dict(self):
@@ -295,17 +329,19 @@ def assemble_pipeline(raw_dict, raw_path, bads_path, cache_path, ica_path, log):
                 has_source = name or True
                 del unassigned[name]
             elif source in raw:
+                cached = params.get('cache', True)
                 if params['type'] == 'filter':
                     raw[name] = RawFilter(name, raw[source], cache_path, log,
                                           params['args'],
-                                          params.get('kwargs', {}))
+                                          params.get('kwargs', {}), cached)
                 elif params['type'] == 'ica':
                     raw[name] = RawICA(name, raw[source], cache_path,
                                        ica_path.replace('{raw}', name), log,
-                                       params['session'], params['kwargs'])
+                                       params['session'], params['kwargs'],
+                                       cached)
                 elif params['type'] == 'maxwell_filter':
                     raw[name] = RawMaxwell(name, raw[source], cache_path, log,
-                                           params['kwargs'])
+                                           params['kwargs'], cached)
                 else:
                     raise ValueError("unknonw raw pipe type=%s" %
                                      repr(params['type']))
@@ -322,6 +358,108 @@ def assemble_pipeline(raw_dict, raw_path, bads_path, cache_path, ica_path, log):
     return raw
 
 
+def _cache_job(pipe, key):
+    "Worker function for cache_raw_pipes()"
+    try:
+        pipe.cache(key[1], key[2])
+    except Exception:
+        return key, traceback.format_exc()
+    return key, None
+
+
+def cache_raw_pipes(pipes, items, n_jobs, log):
+    """Bring the caches of raw pipes up to date
+
+    Parameters
+    ----------
+    pipes : sequence of CachedRawPipe
+        Pipes whose caches should be updated. Outdated caches of the pipes
+        they depend on are updated as well.
+    items : sequence of (str, str)
+        ``(subject, session)`` pairs for which to update the caches.
+    n_jobs : int
+        Number of processes for updating independent caches in parallel.
+    log : Logger
+        Logger for progress messages.
+
+    Notes
+    -----
+    Each cache file only depends on the cache file of its closest cached
+    source pipe for the same subject and session (virtual pipes in between
+    are computed as part of the job). Caches that are up to date are skipped
+    according to :meth:`CachedRawPipe.cache_outdated`. All other caches are
+    computed as soon as their source is up to date. The mne-python log of
+    each job is saved in a ``*.log`` file next to the cache file.
+    """
+    # find outdated caches: {(pipe, subject, session): (pipe, source_key)}
+    jobs = {}
+    for subject, session in items:
+        for pipe in pipes:
+            if pipe.mtime(subject, session, False) is None:
+                log.warning("Raw file missing for %s %s", subject, session)
+                break
+            if not pipe.cached:
+                pipe = pipe.cached_source()
+            while isinstance(pipe, CachedRawPipe):
+                key = (pipe.name, subject, session)
+                if key in jobs or not pipe.cache_outdated(subject, session):
+                    break
+                source = pipe.cached_source()
+                jobs[key] = (pipe, (source.name, subject, session))
+                pipe = source
+
+    n_jobs = min(n_jobs, len(jobs))
+    if not jobs:
+        log.info("All raw caches are up to date")
+        return
+    log.info("Updating %i raw cache files with %i processes...", len(jobs),
+             n_jobs)
+
+    pool = Pool(n_jobs, maxtasksperchild=1) if n_jobs > 1 else None
+    results = Queue()
+    pending = dict(jobs)
+    done = set()
+    failed = {}
+    n_running = 0
+    try:
+        while pending or n_running:
+            for key in tuple(pending):
+                pipe, source_key = pending[key]
+                if source_key in failed:
+                    failed[key] = "Source %s failed" % (source_key[0],)
+                    del pending[key]
+                elif source_key not in jobs or source_key in done:
+                    del pending[key]
+                    n_running += 1
+                    if pool is None:
+                        results.put(_cache_job(pipe, key))
+                    else:
+                        pool.apply_async(
+                            _cache_job, (pipe, key), callback=results.put,
+                            error_callback=lambda error, key=key:
+                            results.put((key, repr(error))))
+            if not n_running:
+                continue
+            key, error = results.get()
+            n_running -= 1
+            if error is None:
+                done.add(key)
+            else:
+                failed[key] = error
+                log.error("Raw %s for %s %s failed:\n%s", *(key + (error,)))
+            log.info("Raw cache %i of %i: %s %s %s", len(done) + len(failed),
+                     len(jobs), *key)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if failed:
+        raise RuntimeError("Updating raw cache failed for %i of %i files: %s" %
+                           (len(failed), len(jobs), ', '.join(
+                               '/'.join(key) for key in sorted(failed))))
+
+
 ###############################################################################
 # Comparing pipelines
 ######################
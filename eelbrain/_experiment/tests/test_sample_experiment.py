@@ -1,9 +1,10 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
 """Test MneExperiment using mne-python sample data"""
 import imp
-from os.path import join, realpath
+from os.path import exists, getmtime, join, realpath
 
-from nose.tools import eq_
+from nose.tools import eq_, ok_
+import numpy as np
 
 from eelbrain import *
 
@@ -29,6 +30,34 @@ def test_sample():
     eq_(e.get('subject'), 'R0000')
     eq_(e.get('subject', subject='R0002'), 'R0002')
 
+    # raw cache
+    e.make_raw_all('1-40', n_jobs=2)
+    path = e.get('cached-raw-file', subject='R0002', raw='1-40')
+    mtime = getmtime(path)
+    e.make_raw_all('1-40', n_jobs=2)
+    eq_(getmtime(path), mtime)
+
+    # virtual raw pipe
+    class VirtualExperiment(e_module.SampleExperiment):
+        raw = {'v1-40': {'source': 'raw', 'type': 'filter', 'args': (1, 40),
+                         'kwargs': {'method': 'iir'}, 'cache': False}}
+    ve = VirtualExperiment(root)
+    raw = ve.load_raw(raw='v1-40', subject='R0002', ndvar=True)
+    assert_dataobj_equal(raw, e.load_raw(raw='1-40', subject='R0002',
+                                         ndvar=True))
+    ok_(not exists(ve.get('cached-raw-file')))
+
+    # epochs cache
+    e.set('R0001', rej='')
+    ds = e.load_epochs()
+    e.cache_epochs = True
+    ds_cached = e.load_epochs()
+    assert_dataobj_equal(ds_cached, ds)
+    ds_cached = e.load_epochs()
+    ok_(isinstance(ds_cached['meg'].x, np.memmap))
+    assert_dataobj_equal(ds_cached, ds)
+    e.cache_epochs = False
+
     # evoked cache invalidated by change in bads
     e.set('R0001', rej='')
     ds = e.load_evoked()
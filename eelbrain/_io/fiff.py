@@ -669,7 +669,7 @@ def raw_ndvar(raw, i_start=None, i_stop=None, decim=1, inv=None, lambda2=1,
 
 
 def epochs_ndvar(epochs, name=None, data=None, exclude='bads', mult=1,
-                 info=None, sensors=None, vmax=None, sysname=None):
+                 info=None, sensors=None, vmax=None, sysname=None, dtype=None):
     """
     Convert an :class:`mne.Epochs` object to an :class:`NDVar`.
 
@@ -697,6 +697,9 @@ def epochs_ndvar(epochs, name=None, data=None, exclude='bads', mult=1,
         Set a default range for plotting.
     sysname : str
         Name of the sensor system (used to load sensor connectivity).
+    dtype : numpy dtype
+        Data type of the NDVar (e.g., ``np.float32`` to reduce memory use; the
+        default is the data type of the epochs, usually ``np.float64``).
     """
     if isinstance(epochs, str):
         epochs = mne.read_epochs(epochs)
@@ -727,6 +730,8 @@ def epochs_ndvar(epochs, name=None, data=None, exclude='bads', mult=1,
     picks = _picks(epochs.info, data, exclude)
     if len(picks) < x.shape[1]:
         x = x[:, picks]
+    if dtype is not None:
+        x = x.astype(dtype, copy=False)
 
     if mult != 1:
         x *= mult
@@ -879,7 +884,8 @@ def forward_operator(fwd, src, subjects_dir=None, parc='aparc', name=None):
 
 
 def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
-              name=None, check=True, parc='aparc', connectivity=None):
+              name=None, check=True, parc='aparc', connectivity=None,
+              dtype=None):
     """
     Convert one or more :class:`mne.SourceEstimate` objects to an :class:`NDVar`.
 
@@ -909,6 +915,9 @@ def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
     connectivity : 'link-midline'
         Modify source space connectivity to link medial sources of the two
         hemispheres across the midline.
+    dtype : numpy dtype
+        Data type of the NDVar (e.g., ``np.float32`` to reduce memory use; the
+        default is the data type of the source estimates).
     """
     subjects_dir = mne.utils.get_subjects_dir(subjects_dir)
 
@@ -918,7 +927,7 @@ def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
     # construct data array
     if isinstance(stc, _BaseSourceEstimate):
         case = False
-        x = stc.data
+        x = stc.data if dtype is None else stc.data.astype(dtype, copy=False)
     else:
         case = True
         stcs = stc
@@ -930,14 +939,29 @@ def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
                 assert np.array_equal(stc_.times, times)
                 for v1, v0 in izip_longest(stc_.vertices, vertices):
                     assert np.array_equal(v1, v0)
-        x = np.array([s.data for s in stcs])
+        x = np.array([s.data for s in stcs], dtype)
 
     # Construct NDVar Dimensions
     time = UTS(stc.tmin, stc.tstep, stc.shape[1])
     if isinstance(stc, mne.VolSourceEstimate):
-        ss = SourceSpace([stc.vertices], subject, src, subjects_dir, parc)
+        vertices = [stc.vertices]
     else:
-        ss = SourceSpace(stc.vertices, subject, src, subjects_dir, parc)
+        vertices = stc.vertices
+    ss = _source_space_dim(vertices, subject, src, subjects_dir, parc,
+                           connectivity)
+    # assemble dims
+    if case:
+        dims = ('case', ss, time)
+    else:
+        dims = (ss, time)
+
+    return NDVar(x, dims, _stc_info(method, fixed), name)
+
+
+def _source_space_dim(vertices, subject, src, subjects_dir, parc,
+                      connectivity):
+    "SourceSpace dimension for source estimates (see stc_ndvar)"
+    ss = SourceSpace(vertices, subject, src, subjects_dir, parc)
     # Apply connectivity modification
     if isinstance(connectivity, str):
         if connectivity == 'link-midline':
@@ -946,13 +970,11 @@ def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
             raise ValueError("connectivity=%s" % repr(connectivity))
     elif connectivity is not None:
         raise TypeError("connectivity=%s" % repr(connectivity))
-    # assemble dims
-    if case:
-        dims = ('case', ss, time)
-    else:
-        dims = (ss, time)
+    return ss
+
 
-    # find the right measurement info
+def _stc_info(method, fixed):
+    "NDVar info for source estimates (see stc_ndvar)"
     info = {}
     if fixed is False:
         info['meas'] = 'Activation'
@@ -970,8 +992,7 @@ def stc_ndvar(stc, subject, src, subjects_dir=None, method=None, fixed=None,
             raise ValueError("method=%s" % repr(method))
     elif fixed is not None:
         raise ValueError("fixed=%s" % repr(fixed))
-
-    return NDVar(x, dims, info, name)
+    return info
 
 
 def _trim_ds(ds, epochs):
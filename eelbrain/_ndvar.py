@@ -1,15 +1,15 @@
 """NDVar operations"""
-from collections import defaultdict
-
-from math import floor
+from math import ceil, floor
 
 import mne
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy import linalg, signal
 
 from . import mne_fixes
 from . import _colorspaces as cs
 from ._data_obj import NDVar, UTS, Ordered, DimensionMismatchError
+from ._utils.numpy_utils import FFT_MIN_TRF_LENGTH, apply_kernel
 
 
 def concatenate(ndvars, dim='time', name=None, tmin=0):
@@ -53,7 +53,7 @@ def concatenate(ndvars, dim='time', name=None, tmin=0):
     return NDVar(x, dims, {}, name or ndvar.name)
 
 
-def convolve(h, x):
+def convolve(h, x, method='auto'):
     """Convolve ``h`` and ``x`` along the time dimension
 
     Parameters
@@ -62,6 +62,10 @@ def convolve(h, x):
         Kernel.
     x : NDVar | sequence of NDVar
         Data to convolve, corresponding to ``h``.
+    method : 'auto' | 'direct' | 'fft'
+        Convolution method: direct convolution or FFT-based overlap-add
+        convolution. With the default, FFT convolution is used for long
+        kernels.
 
     Returns
     -------
@@ -69,57 +73,91 @@ def convolve(h, x):
         Convolution, with same time dimension as ``x``.
     """
     if isinstance(h, NDVar):
-        if not isinstance(x, NDVar):
-            raise TypeError("If h is an NDVar, x also needs to be an NDVar "
-                            "(got x=%r)" % (x,))
-        elif h.ndim != x.ndim:
-            raise ValueError("x and h do not have same number of dimensions")
-
-        if h.ndim == 1:
-            ht = h.get_dim('time')
-            xt = x.get_dim('time')
-        elif h.ndim == 2:
-            hdim, ht = h.get_dims((None, 'time'))
-            xdim, xt = x.get_dims((None, 'time'))
-            if hdim != xdim:
-                raise ValueError("h %s dimension and x %s dimension do not "
-                                 "match" % (hdim.name, xdim.name))
+        h = (h,)
+        x = (x,)
+    else:
+        h = tuple(h)
+        x = tuple(x)
+        if len(h) != len(x):
+            raise ValueError("h and x need to have the same number of items "
+                             "(got %i and %i)" % (len(h), len(x)))
+    args = [_convolve_args(h_, x_) for h_, x_ in zip(h, x)]
+    xt = args[0][1]
+    if any(arg[1] != xt for arg in args[1:]):
+        raise ValueError("All x need to have the same time dimension")
+
+    # for FFT convolution, group terms with the same kernel time axis to
+    # convolve them in one step; direct convolution sums terms in order
+    groups = []
+    for ht, _, h_data, x_data in args:
+        if method == 'auto':
+            if ht.nsamples >= FFT_MIN_TRF_LENGTH:
+                term_method = 'fft'
+            else:
+                term_method = 'direct'
         else:
-            raise ValueError("h and x must be 1 or 2 dimensional, got "
-                             "ndim=%i" % h.ndim)
-
-        if ht.tstep != xt.tstep:
-            raise ValueError(
-                "h and x need to have same time-step (got h.time.tstep=%s, "
-                "x.time.tstep=%s)" % (ht.tstep, xt.tstep))
-
-        if h.ndim == 1:
-            data = np.convolve(h.x, x.x)
+            term_method = method
+        for group in groups:
+            if term_method == 'fft' and group[0] == ht and group[3] == 'fft':
+                group[1].append(h_data)
+                group[2].append(x_data)
+                break
         else:
-            data = None
-            for h_i, x_i in zip(h.get_data((hdim.name, 'time')),
-                                 x.get_data((xdim.name, 'time'))):
-                if data is None:
-                    data = np.convolve(h_i, x_i)
-                else:
-                    data += np.convolve(h_i, x_i)
+            groups.append((ht, [h_data], [x_data], term_method))
 
+    data = None
+    for ht, h_data, x_data, term_method in groups:
+        h_data = h_data[0] if len(h_data) == 1 else np.vstack(h_data)
+        x_data = x_data[0] if len(x_data) == 1 else np.vstack(x_data)
         i_start = -int(round(ht.tmin / ht.tstep))
-        i_stop = i_start + xt.nsamples
         if i_start < 0:
-            data = np.concatenate((np.zeros(-i_start), data[:i_stop]))
+            data_ = np.zeros(xt.nsamples)
+            apply_kernel(x_data, h_data, data_[-i_start:], term_method)
         else:
-            data = data[i_start: i_stop]
-
-        return NDVar(data, (xt,), x.info.copy(), x.name)
+            data_ = apply_kernel(x_data, h_data,
+                                 np.empty(xt.nsamples + i_start),
+                                 term_method)
+            data_ = data_[i_start:]
+        if data is None:
+            data = data_
+        else:
+            data += data_
+
+    return NDVar(data, (xt,), x[0].info.copy(), x[0].name)
+
+
+def _convolve_args(h, x):
+    "Check NDVars for convolve(); return (h.time, x.time, h_data, x_data)"
+    if not isinstance(h, NDVar):
+        raise TypeError("h needs to be an NDVar, got h=%r" % (h,))
+    elif not isinstance(x, NDVar):
+        raise TypeError("If h is an NDVar, x also needs to be an NDVar "
+                        "(got x=%r)" % (x,))
+    elif h.ndim != x.ndim:
+        raise ValueError("x and h do not have same number of dimensions")
+
+    if h.ndim == 1:
+        ht = h.get_dim('time')
+        xt = x.get_dim('time')
+        h_data = h.x[np.newaxis]
+        x_data = x.x[np.newaxis]
+    elif h.ndim == 2:
+        hdim, ht = h.get_dims((None, 'time'))
+        xdim, xt = x.get_dims((None, 'time'))
+        if hdim != xdim:
+            raise ValueError("h %s dimension and x %s dimension do not "
+                             "match" % (hdim.name, xdim.name))
+        h_data = h.get_data((hdim.name, 'time'))
+        x_data = x.get_data((xdim.name, 'time'))
     else:
-        out = None
-        for h_, x_ in zip(h, x):
-            if out is None:
-                out = convolve(h_, x_)
-            else:
-                out += convolve(h_, x_)
-        return out
+        raise ValueError("h and x must be 1 or 2 dimensional, got "
+                         "ndim=%i" % h.ndim)
+
+    if ht.tstep != xt.tstep:
+        raise ValueError(
+            "h and x need to have same time-step (got h.time.tstep=%s, "
+            "x.time.tstep=%s)" % (ht.tstep, xt.tstep))
+    return ht, xt, h_data, x_data
 
 
 def cwt_morlet(y, freqs, use_fft=True, n_cycles=3.0, zero_mean=False,
@@ -302,18 +340,18 @@ def neighbor_correlation(x, dim='sensor', obs='time', name=None):
                          (dim, dim_obj._index_repr(low_var)))
 
 
-    # find neighbors
-    neighbors = defaultdict(list)
-    for a, b in dim_obj.connectivity():
-        neighbors[a].append(b)
-        neighbors[b].append(a)
-
     # for each point, find the average correlation with its neighbors
     data = x.get_data((dim, obs))
     cc = np.corrcoef(data)
-    y = np.empty(len(dim_obj))
-    for i in range(len(dim_obj)):
-        y[i] = np.mean(cc[i, neighbors[i]])
+    conn = dim_obj.connectivity()
+    src = conn[:, 0]
+    dst = conn[:, 1]
+    n = len(dim_obj)
+    cc_edges = cc[src, dst]
+    cc_sum = (np.bincount(src, cc_edges, n) +
+              np.bincount(dst, cc_edges, n))
+    n_neighbors = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    y = cc_sum / n_neighbors
 
     info = cs.set_info_cs(x.info, cs.stat_info('r'))
     return NDVar(y, (dim_obj,), info, name or x.name)
@@ -460,7 +498,7 @@ class Butterworth(Filter):
             raise ValueError("Neither low nor high set")
 
 
-def segment(continuous, times, tstart, tstop, decim=1):
+def segment(continuous, times, tstart, tstop, decim=1, view=False):
     """Segment a continuous NDVar
 
     Parameters
@@ -476,6 +514,10 @@ def segment(continuous, times, tstart, tstop, decim=1):
     decim : int
         Decimate data after segmenting by factor ``decim`` (the default is
         ``1``, i.e. no decimation).
+    view : bool
+        Instead of copying the data, return an NDVar with a read-only view on
+        the data in ``continuous``. This is only possible if ``times`` are
+        spaced regularly in samples (default ``False``).
 
     Returns
     -------
@@ -486,14 +528,50 @@ def segment(continuous, times, tstart, tstop, decim=1):
     if continuous.has_case:
         raise ValueError("Continuous data can't have case dimension")
     axis = continuous.get_axis('time')
-    tstep = None if decim == 1 else continuous.time.tstep * decim
-    segments = [continuous.sub(time=(t + tstart, t + tstop, tstep)) for
-                t in times]
+    time = continuous.time
+    times = np.asarray(times, float)
+    if times.ndim != 1 or len(times) == 0:
+        raise ValueError("times needs to be a non-empty sequence of scalars, "
+                         "got %r" % (times,))
+    elif tstart >= tstop:
+        raise ValueError("tstart must be smaller than tstop")
+
+    # sample indexes (same rounding as UTS.dimindex for slices)
+    i_start = np.ceil((times + tstart - time.tmin) / time.tstep - 0.000001)
+    i_start = i_start.astype(np.intp)
+    i_stop_0 = int(ceil((times[0] + tstop - time.tmin) / time.tstep - 0.000001))
+    n_samples = i_stop_0 - i_start[0]
+    if i_start.min() < 0:
+        raise IndexError("Segment starts before beginning of data: %s" %
+                         (times[i_start.argmin()] + tstart,))
+    elif i_start.max() + n_samples > time.nsamples:
+        raise ValueError("Segment extends beyond end of data: %s" %
+                         (times[i_start.argmax()] + tstop,))
+    offsets = np.arange(0, n_samples, decim)
+    n_times = len(offsets)
+
+    shape = (len(times),) + continuous.shape[:axis] + (n_times,) + \
+            continuous.shape[axis + 1:]
+    if view:
+        start_steps = np.unique(np.diff(i_start))
+        if len(start_steps) > 1:
+            raise ValueError("view=True: times need to be regularly spaced in "
+                             "samples")
+        start_step = start_steps[0] if len(start_steps) else 0
+        x = continuous.x
+        strides = x.strides
+        t_stride = strides[axis]
+        x = as_strided(x[(slice(None),) * axis + (i_start[0],)], shape,
+                       (start_step * t_stride,) + strides[:axis] +
+                       (decim * t_stride,) + strides[axis + 1:])
+        x.flags.writeable = False
+    else:
+        x = np.empty(shape, continuous.x.dtype)
+        index = i_start[:, np.newaxis] + offsets
+        np.take(continuous.x, index, axis, np.moveaxis(x, 0, axis), 'clip')
 
-    s0_time = segments[0].time
     dims = (('case',) +
             continuous.dims[:axis] +
-            (UTS(tstart, s0_time.tstep, s0_time.nsamples),) +
+            (UTS(tstart, time.tstep * decim, n_times),) +
             continuous.dims[axis + 1:])
-    return NDVar(np.array(tuple(s.x for s in segments)), dims,
-                 continuous.info.copy(), continuous.name)
+    return NDVar(x, dims, continuous.info.copy(), continuous.name)
@@ -6,7 +6,68 @@ from . import plot
 from . import test
 from ._data_obj import cellname, combine
 from ._stats.stats import ttest_t
-from .fmtxt import ms, Section, Figure, linebreak
+from .fmtxt import ms, Section, Figure, Image, linebreak
+from .plot._base import RenderJob, render_jobs
+
+
+class FigureRenderer(object):
+    """Collect figures for a report and render them in parallel
+
+    Parameters
+    ----------
+    n_workers : int
+        Number of worker processes (default is the number of CPUs).
+    """
+    def __init__(self, n_workers=None):
+        self.n_workers = n_workers
+        self._jobs = []
+        self._images = []
+
+    def image(self, job):
+        """Image placeholder for a figure that is rendered with :meth:`render`
+
+        Parameters
+        ----------
+        job : RenderJob
+            The figure.
+        """
+        image = Image(job.name, job.format)
+        self._jobs.append(job)
+        self._images.append(image)
+        return image
+
+    def render(self):
+        "Render all figures and write them to the corresponding images"
+        data = render_jobs(self._jobs, self.n_workers)
+        for job, image, buf in zip(self._jobs, self._images, data):
+            image.write(buf.decode() if job.format == 'svg' else buf)
+        self._jobs = []
+        self._images = []
+
+
+def _mark_time_window(p, tstart, tstop, zero_line=False):
+    "Mark a cluster's time window in a UTSStat plot"
+    for ax in p._axes:
+        ax.axvspan(tstart, tstop, color='r', alpha=0.2, zorder=-2)
+    if zero_line:
+        p._axes[0].axhline(0, color='k')
+
+
+def _mark_time_limits(p, tstart, tstop):
+    "Mark the time window of a test in a UTSStat plot"
+    ax = p._axes[0]
+    if tstart is not None:
+        ax.axvline(tstart, color='k')
+    if tstop is not None:
+        ax.axvline(tstop, color='k')
+
+
+def _utsstat_legend(*args, **kwargs):
+    "Legend of a UTSStat plot"
+    p = plot.UTSStat(*args, **kwargs)
+    legend = p.plot_legend(show=False)
+    p.close()
+    return legend
 
 
 def n_of(n, of, plural_for_0=False):
@@ -89,37 +150,39 @@ def sensor_results(res, ds, color):
 
 def sensor_time_results(res, ds, colors, include=1):
     y = ds.eval(res.Y)
+    renderer = FigureRenderer()
     if res._kind in ('raw', 'tfce'):
         report = Section("Results")
         section = report.add_section("P<=.05")
-        sensor_bin_table(section, res, 0.05)
+        sensor_bin_table(section, res, renderer, 0.05)
         clusters = res.find_clusters(0.05, maps=True)
         clusters.sort('tstart')
         for cluster in clusters.itercases():
             sensor_time_cluster(section, cluster, y, res._plot_model(), ds,
-                                colors, res.match)
+                                colors, renderer, res.match)
 
         # trend section
         section = report.add_section("Trend: p<=.1")
-        sensor_bin_table(section, res, 0.1)
+        sensor_bin_table(section, res, renderer, 0.1)
 
         # not quite there section
         section = report.add_section("Anything: P<=.2")
-        sensor_bin_table(section, res, 0.2)
+        sensor_bin_table(section, res, renderer, 0.2)
     elif res._kind == 'cluster':
         report = Section("Clusters")
-        sensor_bin_table(report, res)
+        sensor_bin_table(report, res, renderer)
         clusters = res.find_clusters(include, maps=True)
         clusters.sort('tstart')
         for cluster in clusters.itercases():
             sensor_time_cluster(report, cluster, y, res._plot_model(), ds,
-                                colors, res.match)
+                                colors, renderer, res.match)
     else:
         raise NotImplementedError("Result kind %r" % res._kind)
+    renderer.render()
     return report
 
 
-def sensor_bin_table(section, res, pmin=1):
+def sensor_bin_table(section, res, renderer, pmin=1):
     if pmin == 1:
         caption = "All clusters"
     else:
@@ -138,11 +201,12 @@ def sensor_bin_table(section, res, pmin=1):
             caption_ = "%s: %s" % (effect, caption)
         else:
             caption_ = caption
-        p = plot.TopomapBins(ndvar, show=False)
-        section.add_image_figure(p, caption_)
+        image = renderer.image(RenderJob('TopomapBins', (ndvar,)))
+        section.add_image_figure(image, caption_)
 
 
-def sensor_time_cluster(section, cluster, y, model, ds, colors, match='subject'):
+def sensor_time_cluster(section, cluster, y, model, ds, colors, renderer,
+                        match='subject'):
     # cluster properties
     tstart_ms = ms(cluster['tstart'])
     tstop_ms = ms(cluster['tstop'])
@@ -173,18 +237,20 @@ def sensor_time_cluster(section, cluster, y, model, ds, colors, match='subject')
                   cluster_topo] for cell in x.cells]
     else:
         topos = [[topo, cluster_topo]]
-    p = plot.Topomap(topos, axh=3, nrow=1, show=False)
-    p.mark_sensors(np.flatnonzero(cluster_topo.x), c='y', marker='o')
+    mark = ('mark_sensors', (np.flatnonzero(cluster_topo.x),),
+            {'c': 'y', 'marker': 'o'})
+    image = renderer.image(RenderJob('Topomap', (topos,),
+                                     {'axh': 3, 'nrow': 1}, (mark,)))
 
     caption_ = ["Cluster"]
     if 'effect' in cluster:
         caption_.extend(('effect of', cluster['effect']))
     caption_.append("%i - %i ms." % (tstart_ms, tstop_ms))
     caption = ' '.join(caption_)
-    section.add_image_figure(p, caption)
-    p.close()
+    section.add_image_figure(image, caption)
 
-    cluster_timecourse(section, cluster, y, 'sensor', model, ds, colors, match)
+    cluster_timecourse(section, cluster, y, 'sensor', model, ds, colors,
+                       renderer, match)
 
 
 def source_results(res, surfer_kwargs={}, title="Results", diff_cmap=None,
@@ -273,6 +339,7 @@ def source_tfce_pmap(res, surfer_kwargs, caption='TFCE map'):
 def source_time_results(res, ds, colors, include=0.1, surfer_kwargs={},
                         title="Results", parc=True):
     report = Section(title)
+    renderer = FigureRenderer()
     y = ds[res.Y]
     if parc is True:
         parc = res._first_cdist.parc
@@ -287,7 +354,7 @@ def source_time_results(res, ds, colors, include=0.1, surfer_kwargs={},
 
             clusters = res.find_clusters(source=label)
             source_time_clusters(section, clusters, y, ds, model, include,
-                                 title, colors, res)
+                                 title, colors, res, renderer)
     elif not parc and res._kind == 'cluster':
         source_bin_table(report, res, surfer_kwargs)
 
@@ -295,7 +362,7 @@ def source_time_results(res, ds, colors, include=0.1, surfer_kwargs={},
         clusters.sort('tstart')
         title = "{tstart}-{tstop} {location} p={p}{mark} {effect}"
         source_time_clusters(report, clusters, y, ds, model, include, title,
-                             colors, res)
+                             colors, res, renderer)
     elif not parc and res._kind in ('raw', 'tfce'):
         section = report.add_section("P<=.05")
         source_bin_table(section, res, surfer_kwargs, 0.05)
@@ -304,7 +371,7 @@ def source_time_results(res, ds, colors, include=0.1, surfer_kwargs={},
         title = "{tstart}-{tstop} {location} p={p}{mark} {effect}"
         for cluster in clusters.itercases():
             source_time_cluster(section, cluster, y, model, ds, title, colors,
-                                res.match)
+                                res.match, renderer)
 
         # trend section
         section = report.add_section("Trend: p<=.1")
@@ -326,9 +393,10 @@ def source_time_results(res, ds, colors, include=0.1, surfer_kwargs={},
             clusters = combine((clusters_sig, clusters_trend, clusters_all))
             clusters.sort('tstart')
             source_time_clusters(section, clusters, y, ds, model, include,
-                                 title, colors, res)
+                                 title, colors, res, renderer)
     else:
         raise RuntimeError
+    renderer.render()
     return report
 
 
@@ -374,7 +442,8 @@ def source_time_lm(lm, pmin):
     return out
 
 
-def source_time_clusters(section, clusters, y, ds, model, include, title, colors, res):
+def source_time_clusters(section, clusters, y, ds, model, include, title,
+                         colors, res, renderer):
     """Plot cluster with source and time dimensions
 
     Parameters
@@ -408,10 +477,11 @@ def source_time_clusters(section, clusters, y, ds, model, include, title, colors
             else:
                 cluster['cluster'] = res.cluster(cluster['id'])
         source_time_cluster(section, cluster, y, model, ds, title, colors,
-                            res.match)
+                            res.match, renderer)
 
 
-def source_time_cluster(section, cluster, y, model, ds, title, colors, match):
+def source_time_cluster(section, cluster, y, model, ds, title, colors, match,
+                        renderer):
     # cluster properties
     tstart_ms = ms(cluster['tstart'])
     tstop_ms = ms(cluster['tstop'])
@@ -452,47 +522,43 @@ def source_time_cluster(section, cluster, y, model, ds, title, colors, match):
         if len(reduced_model) < len(model):
             colors_ = plot.colors_for_categorial(ds.eval(reduced_model))
             cluster_timecourse(section, cluster, y, 'source', reduced_model, ds,
-                               colors_, match)
-    cluster_timecourse(section, cluster, y, 'source', model, ds, colors, match)
+                               colors_, renderer, match)
+    cluster_timecourse(section, cluster, y, 'source', model, ds, colors,
+                       renderer, match)
 
 
-def cluster_timecourse(section, cluster, y, dim, model, ds, colors, match):
+def cluster_timecourse(section, cluster, y, dim, model, ds, colors, renderer,
+                       match):
     c_extent = cluster['cluster']
     cid = cluster['id']
+    # only send the relevant variables to the renderer
+    x = ds.eval(model) if model else None
+    match_ = ds.eval(match) if match else None
 
     # cluster time course
     idx = c_extent.any('time')
     tc = y[idx].mean(dim)
-    p = plot.UTSStat(tc, model, match=match, ds=ds, legend=None, h=4,
-                     colors=colors, show=False)
+    args = (tc, x)
+    kwargs = {'match': match_, 'legend': None, 'h': 4, 'colors': colors}
     # mark original cluster
-    for ax in p._axes:
-        ax.axvspan(cluster['tstart'], cluster['tstop'], color='r',
-                   alpha=0.2, zorder=-2)
-
+    mark = (_mark_time_window, (cluster['tstart'], cluster['tstop'], not model),
+            {})
+    image_tc = renderer.image(RenderJob('UTSStat', args, kwargs, (mark,),
+                                        'cluster_%i_timecourse' % cid))
     if model:
-        # legend
-        legend_p = p.plot_legend(show=False)
-        legend = legend_p.image("Legend")
-        legend_p.close()
-    else:
-        p._axes[0].axhline(0, color='k')
-    image_tc = p.image('cluster_%i_timecourse' % cid)
-    p.close()
+        legend = renderer.image(RenderJob(_utsstat_legend, args, kwargs,
+                                          name="Legend"))
 
     # Barplot
     idx = (c_extent != 0)
     v = y.mean(idx)
-    p = plot.Barplot(v, model, match, ds=ds, corr=None, colors=colors, h=4,
-                     show=False)
-    image_bar = p.image('cluster_%i_barplot.png' % cid)
-    p.close()
+    kwargs = {'corr': None, 'colors': colors, 'h': 4}
+    image_bar = renderer.image(RenderJob('Barplot', (v, x, match_), kwargs,
+                                         name='cluster_%i_barplot.png' % cid))
 
     # Boxplot
-    p = plot.Boxplot(v, model, match, ds=ds, corr=None, colors=colors, h=4,
-                     show=False)
-    image_box = p.image('cluster_%i_boxplot.png' % cid)
-    p.close()
+    image_box = renderer.image(RenderJob('Boxplot', (v, x, match_), kwargs,
+                                         name='cluster_%i_boxplot.png' % cid))
 
     if model:
         # compose figure
@@ -557,21 +623,17 @@ def time_results(res, ds, colors, title='Results', caption="Timecourse",
     # plotting arguments
     model = res._plot_model()
     sub = res._plot_sub()
+    renderer = FigureRenderer()
 
     # add UTSStat plot
-    p = plot.UTSStat(res.Y, model, None, res.match, sub, ds, colors=colors,
-                     legend=None, clusters=clusters, show=False)
-    ax = p._axes[0]
-    if res.tstart is not None:
-        ax.axvline(res.tstart, color='k')
-    if res.tstop is not None:
-        ax.axvline(res.tstop, color='k')
-    image = p.image('%s_cluster.png')
-    legend_p = p.plot_legend(show=False)
-    legend = legend_p.image("Legend")
+    args = (res.Y, model, None, res.match, sub, ds)
+    kwargs = {'colors': colors, 'legend': None, 'clusters': clusters}
+    mark = (_mark_time_limits, (res.tstart, res.tstop), {})
+    image = renderer.image(RenderJob('UTSStat', args, kwargs, (mark,),
+                                     '%s_cluster.png'))
+    legend = renderer.image(RenderJob(_utsstat_legend, args, kwargs,
+                                      name="Legend"))
     section.add_figure(tc_caption, [image, legend])
-    p.close()
-    legend_p.close()
 
     # add cluster table
     if clusters.n_cases:
@@ -597,14 +659,15 @@ def time_results(res, ds, colors, title='Results', caption="Timecourse",
             else:
                 title = "Cluster %s%s: %s" % (cid, cluster['sig'], tw_str)
             y_ = ds[res.Y].summary(time=(c_tstart, c_tstop))
-            p = plot.Barplot(y_, model_, res.match, sub, ds=ds, corr=None,
-                             show=False, colors=colors_, title=title)
-            plots.append(p.image())
-            p.close()
+            job = RenderJob('Barplot', (y_, model_, res.match, sub),
+                            {'ds': ds, 'corr': None, 'colors': colors_,
+                             'title': title})
+            plots.append(renderer.image(job))
 
         section.add_image_figure(plots, "Value in the time-window of the clusters "
                                  "with uncorrected pairwise t-tests.")
 
+    renderer.render()
     return section
 
 
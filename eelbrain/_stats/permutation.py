@@ -41,7 +41,8 @@ def _resample_params(N, samples):
     return n_samples, samples
 
 
-def permute_order(n, samples=10000, replacement=False, unit=None, seed=0):
+def permute_order(n, samples=10000, replacement=False, unit=None, seed=0,
+                  start=0, stop=None):
     """Generator function to create indices to shuffle n items
 
     Parameters
@@ -59,38 +60,55 @@ def permute_order(n, samples=10000, replacement=False, unit=None, seed=0):
         unit (with or without replacement) and then shuffling the values
         within units (no replacement).
     seed : None | int
-        Seed the random state of the relevant randomization module
-        (:mod:`random` or :mod:`numpy.random`) to make replication possible.
-        None to skip seeding (default 0).
+        Seed for the random permutations to make replication possible (None
+        to use a random seed; default 0).
+    start : int
+        Index of the first permutation to yield (default 0).
+    stop : None | int
+        Index after the last permutation to yield (default ``samples``).
 
     Returns
     -------
     Iterator over index.
+
+    Notes
+    -----
+    The sequence of permutations is determined by ``seed`` alone (independent
+    of the global random state), so that any range of permutations
+    (``start``, ``stop``) can be computed independently and is identical to
+    the corresponding part of the complete sequence. With ``seed=None``, a
+    new random state is used; unlike in earlier versions, the sequence is
+    not drawn from :mod:`numpy.random`, so :func:`numpy.random.seed` does
+    not affect it.
     """
     n = int(n)
     samples = int(samples)
     if samples < 0:
         err = "Complete permutation for resampling through reordering"
         raise NotImplementedError(err)
+    if stop is None:
+        stop = samples
 
     if _YIELD_ORIGINAL:
         original = np.arange(n)
-        for _ in range(samples):
+        for _ in range(start, stop):
             yield original
         return
 
-    if seed is not None:
-        np.random.seed(seed)
+    random_state = np.random.RandomState(seed)
 
     if unit is None:
         if replacement:
-            for _ in range(samples):
-                yield np.random.randint(n, n)
+            for i in range(stop):
+                index = random_state.randint(n, size=n)
+                if i >= start:
+                    yield index
         else:
             index = np.arange(n)
-            for _ in range(samples):
-                np.random.shuffle(index)
-                yield index
+            for i in range(stop):
+                random_state.shuffle(index)
+                if i >= start:
+                    yield index
     else:
         if replacement:
             raise NotImplementedError("Replacement and units")
@@ -98,15 +116,16 @@ def permute_order(n, samples=10000, replacement=False, unit=None, seed=0):
             idx_orig = np.arange(n)
             idx_perm = np.arange(n)
             unit_idxs = [np.nonzero(unit == cell)[0] for cell in unit.cells]
-            for _ in range(samples):
+            for i in range(stop):
                 for idx_ in unit_idxs:
                     v = idx_orig[idx_]
-                    np.random.shuffle(v)
+                    random_state.shuffle(v)
                     idx_perm[idx_] = v
-                yield idx_perm
+                if i >= start:
+                    yield idx_perm
 
 
-def permute_sign_flip(n, samples=10000, seed=0):
+def permute_sign_flip(n, samples=10000, seed=0, start=0, stop=None):
     """Iterate over indices for ``samples`` permutations of the data
 
     Parameters
@@ -117,8 +136,13 @@ def permute_sign_flip(n, samples=10000, seed=0):
         Number of samples to yield. If < 0, all possible permutations are
         performed.
     seed : None | int
-        Seed the random state of the randomization module (:mod:`random`) to
-        make replication possible. None to skip seeding (default 0).
+        Seed for drawing the random sample of permutations to make
+        replication possible (None to use a random seed; default 0).
+    start : int
+        Index of the first permutation to yield (default 0).
+    stop : None | int
+        Index after the last permutation to yield (default is to yield all
+        permutations).
 
     Returns
     -------
@@ -129,11 +153,13 @@ def permute_sign_flip(n, samples=10000, seed=0):
     Notes
     -----
     Sign flip of each element is encoded in successive bits. These bits are
-    recoded as integer.
+    recoded as integer. The sequence of permutations is determined by
+    ``seed`` alone, so that subsets of it (``start``, ``stop``) can be
+    computed independently. With ``seed=None``, a new random state is used;
+    unlike in earlier versions, the sequence is not drawn from the
+    :mod:`random` module, so :func:`random.seed` does not affect it.
     """
     n = int(n)
-    if seed is not None:
-        random.seed(seed)
 
     # determine possible number of permutations
     n_perm = 2 ** n
@@ -145,7 +171,9 @@ def permute_sign_flip(n, samples=10000, seed=0):
         sample_sequences = range(1, n_perm)
     else:
         # random resampling
-        sample_sequences = random.sample(range(1, n_perm), samples)
+        sample_sequences = random.Random(seed).sample(range(1, n_perm),
+                                                      samples)
+    sample_sequences = sample_sequences[start:stop]
 
     sign = np.empty(n, np.int8)
     mult = 2 ** np.arange(n, dtype=np.int64)
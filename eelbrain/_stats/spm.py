@@ -10,7 +10,7 @@ from .._data_obj import (Dataset, Factor, Var, NDVar, asmodel, asndvar,
                          DimensionMismatchError)
 from . import opt
 from .stats import lm_betas_se_1d
-from .testnd import ttest_1samp
+from .testnd import ttest_1samp, shared_permutation
 from functools import reduce
 
 
@@ -138,9 +138,11 @@ class RandomLM(object):
         self.column_names = lm.column_names
 
         if self.tests is None:
-            self.samples = None
+            self.samples = self.n_samples = None
         else:
-            self.samples = self.tests[self.column_names[0]].samples
+            test = self.tests[self.column_names[0]]
+            self.samples = test.samples
+            self.n_samples = test.n_samples
 
     def __getstate__(self):
         return {'lms': self._lms, 'tests': self.tests,
@@ -228,8 +230,12 @@ class RandomLM(object):
         return table
 
     def _column_ttests(self, *args, **kwargs):
-        "Precompute all tests"
+        "Precompute all tests (permutations are evaluated in a single pass)"
         self.tests = {}
-        for term in self.column_names:
-            self.tests[term] = self.column_ttest(term, False, *args, **kwargs)
-        self.samples = self.tests[self.column_names[0]].samples
+        with shared_permutation():
+            for term in self.column_names:
+                self.tests[term] = self.column_ttest(term, False, *args,
+                                                     **kwargs)
+        test = self.tests[self.column_names[0]]
+        self.samples = test.samples
+        self.n_samples = test.n_samples
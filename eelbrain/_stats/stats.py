@@ -6,7 +6,7 @@ import numpy as np
 import scipy.stats
 from scipy.linalg import inv
 
-from .._data_obj import asfactor, asmodel, Model
+from .._data_obj import asfactor, asmodel, Model, Var
 from . import opt
 
 
@@ -391,6 +391,160 @@ def ttest_t(p, df, tail=0):
     return t
 
 
+def _parse_variability_spec(spec):
+    "Parse a variability specification into (scale, kind)"
+    try:
+        m = re.match("^([.\d]*)(\%?)(ci|sem)$", spec.lower())
+        scale, perc, kind = m.groups()
+        if scale:
+            scale = float(scale)
+            if perc:
+                scale /= 100
+        elif kind == 'ci':
+            scale = .95
+        else:
+            scale = 1
+    except:
+        raise ValueError("Invalid variability specification: %r" % spec)
+    return scale, kind
+
+
+class CellStats(object):
+    """Descriptive statistics and pairwise tests for several cells
+
+    All statistics are computed from a single pass over the data of all cells
+    (instead of separately for each cell and each pair of cells).
+
+    Parameters
+    ----------
+    data : list of array  [n_cases, ...] | list of Var
+        Data for each cell, first dimension reflecting cases.
+    within : bool
+        Whether the cells contain related measures (all cells contain the same
+        cases in the same order, as in :attr:`Celltable.all_within`).
+
+    Attributes
+    ----------
+    n : array  [n_cells]
+        Number of cases in each cell.
+    mean : array  [n_cells, ...]
+        Mean of each cell (NaN for empty cells).
+    var : array  [n_cells, ...]
+        Variance (``ddof=1``) of each cell.
+    """
+    def __init__(self, data, within=False):
+        data = [y.x if isinstance(y, Var) else np.asarray(y) for y in data]
+        self.n = n = np.array([len(y) for y in data])
+        y = np.concatenate(data)
+        n_ = n.reshape((-1,) + (1,) * (y.ndim - 1))
+        # statistics of empty cells are NaN
+        nonempty = n > 0
+        starts = np.concatenate(([0], np.cumsum(n[nonempty][:-1])))
+        self.mean = np.full((len(n),) + y.shape[1:], np.nan)
+        self.ss = np.full((len(n),) + y.shape[1:], np.nan)
+        if np.any(nonempty):
+            self.mean[nonempty] = np.add.reduceat(y, starts) / n_[nonempty]
+            dev = y - np.repeat(self.mean, n, 0)
+            self.ss[nonempty] = np.add.reduceat(dev ** 2, starts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.var = self.ss / (n_ - 1)
+        self.n_cells = len(data)
+        self._n_ = n_
+        if within and np.any(n != n[0]):
+            raise ValueError("Related measures (within=True) require the "
+                             "same number of cases in each cell (got %s)"
+                             % ', '.join(map(str, n)))
+        self.within = bool(within)
+        if self.within:
+            self._y = y.reshape((self.n_cells, n[0]) + y.shape[1:])
+
+    def error(self, spec, pool=False):
+        """Variability estimate for each cell (see :func:`variability`)
+
+        Parameters
+        ----------
+        spec : str
+            Specification of the kind of variability estimate (e.g. 'sem',
+            '2sem' or '95%ci').
+        pool : bool
+            Pool the variability to create a single estimate. For related
+            measures (``within=True``), the estimate is based on the
+            within-subject variability (Loftus & Masson 1994).
+
+        Returns
+        -------
+        error : array  [n_cells, ...] | array  [...]
+            Variability estimate for each cell, or a single estimate if errors
+            are pooled.
+        """
+        scale, kind = _parse_variability_spec(spec)
+        if pool:
+            n = self.n[0]
+            if np.any(self.n != n):
+                raise NotImplementedError("Pooled variability for cells with "
+                                          "unequal number of cases")
+            if self.within:
+                if n == 1:
+                    raise ValueError("Can't calculate within-subject error "
+                                     "because the match predictor explains "
+                                     "all variability")
+                # residuals of the additive cell + match model
+                res = (self._y - self.mean[:, None] -
+                       self._y.mean(0)[None] + self.mean.mean(0))
+                df = (self.n_cells - 1) * (n - 1)
+                out = (res ** 2).sum((0, 1)) / df
+            else:
+                df = self.n.sum() - self.n_cells
+                out = self.ss.sum(0) / df
+            out = np.sqrt(out / n)
+        else:
+            df = self._n_ - 1
+            out = np.sqrt(self.var / self._n_)
+
+        if kind == 'ci':
+            out = out * scipy.stats.t.isf((1 - scale) / 2, df)
+        elif scale != 1:
+            out = out * scale
+        return out
+
+    def pairwise_t(self):
+        """T-tests for all pairs of cells
+
+        Paired tests if ``within`` is True, otherwise independent samples
+        tests assuming equal variance (equivalent to
+        :func:`scipy.stats.ttest_rel` and :func:`scipy.stats.ttest_ind`).
+
+        Returns
+        -------
+        t : array  [n_pairs, ...]
+            T value for each pair ``(i, j), i < j`` (in the order of
+            :func:`itertools.combinations`).
+        df : array  [n_pairs]
+            Degrees of freedom for each test.
+        p : array  [n_pairs, ...]
+            Two-tailed p-value for each test.
+        """
+        i, j = np.triu_indices(self.n_cells, 1)
+        if self.within:
+            d = self._y[i] - self._y[j]
+            n = self.n[0]
+            df = np.repeat(n - 1, len(i))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = d.mean(1) / np.sqrt(d.var(1, ddof=1) / n)
+        else:
+            n_i = self._n_[i]
+            n_j = self._n_[j]
+            df = self.n[i] + self.n[j] - 2
+            df_ = n_i + n_j - 2
+            svar = (self.ss[i] + self.ss[j]) / df_
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = ((self.mean[i] - self.mean[j]) /
+                     np.sqrt(svar * (1. / n_i + 1. / n_j)))
+        p = 2 * scipy.stats.t.sf(np.abs(t), df.reshape(
+            (-1,) + (1,) * (t.ndim - 1)))
+        return t, df, p
+
+
 def variability(y, x, match, spec, pool, cells=None):
     """Calculate data variability
 
@@ -418,19 +572,7 @@ def variability(y, x, match, spec, pool, cells=None):
         Variability estimate. A single estimate if errors are pooled, otherwise
         an estimate for every cell in x.
     """
-    try:
-        m = re.match("^([.\d]*)(\%?)(ci|sem)$", spec.lower())
-        scale, perc, kind = m.groups()
-        if scale:
-            scale = float(scale)
-            if perc:
-                scale /= 100
-        elif kind == 'ci':
-            scale = .95
-        else:
-            scale = 1
-    except:
-        raise ValueError("Invalid variability specification: %r" % spec)
+    scale, kind = _parse_variability_spec(spec)
 
     if x is None:
         if match is not None and match.df == len(match) - 1:
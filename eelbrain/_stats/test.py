@@ -633,10 +633,8 @@ def _pairwise(data, within=True, parametric=True, corr='Hochberg',
         test_name = "t-Tests ({0} samples)"
         statistic = "t"
         if within:
-            test_func = scipy.stats.ttest_rel
             test_name = test_name.format('paired')
         else:
-            test_func = scipy.stats.ttest_ind
             test_name = test_name.format('independent')
     elif within:
         test_name = "Wilcoxon Signed-Rank Test"
@@ -649,13 +647,20 @@ def _pairwise(data, within=True, parametric=True, corr='Hochberg',
         statistic = "u"
 
     # perform test
-    _K = []  # kennwerte
-    _P = []
-    _df = []
-    i = 0
     indexes = {}
-    for x in range(k):
-        for y in range(x + 1, k):
+    for i, (x, y) in enumerate(itertools.combinations(range(k), 2)):
+        indexes[(x, y)] = indexes[(y, x)] = i
+
+    if parametric:  # all pairs at once
+        _K, _df, _P = stats.CellStats(data, within).pairwise_t()
+        _K = _K.tolist()
+        _df = _df.tolist()
+        _P = _P.tolist()
+    else:
+        _K = []  # kennwerte
+        _P = []
+        _df = []
+        for x, y in itertools.combinations(range(k), 2):
             Y1, Y2 = data[x], data[y]
             t, p = test_func(Y1, Y2)
             _K.append(t)
@@ -663,10 +668,7 @@ def _pairwise(data, within=True, parametric=True, corr='Hochberg',
                 _df.append(len(Y1) - 1)
             else:
                 _df.append(len(Y1) + len(Y2) - 2)
-
             _P.append(p)
-            indexes[(x, y)] = indexes[(y, x)] = i
-            i += 1
     # add stars
     if corr:
         p_adjusted = mcp_adjust(_P, corr)
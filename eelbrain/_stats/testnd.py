@@ -27,13 +27,15 @@ from datetime import datetime, timedelta
 from math import ceil
 from multiprocessing import Process, cpu_count
 from multiprocessing.queues import SimpleQueue
-from multiprocessing.sharedctypes import RawArray
+from multiprocessing.sharedctypes import RawArray, RawValue
 import logging
+import hashlib
 import operator
 import os
+import pickle
 import re
 import socket
-from time import time as current_time
+from time import sleep, time as current_time
 from warnings import warn
 
 import numpy as np
@@ -95,6 +97,257 @@ def configure(ncpus=None):
             N_WORKERS = min(ncpus, cpu_count())
 
 
+# permutation shards (set by permutation_shard and merge_permutation_shards)
+_SHARD = None
+_SHARD_DISTS = None
+# tests waiting for a shared permutation pass (set by shared_permutation)
+_SHARED_PERMUTATION = None
+# sequential stopping parameters (set by early_stopping)
+_EARLY_STOPPING = None
+
+
+class permutation_shard(object):
+    """Compute only a part of the permutations of permutation tests
+
+    Context manager for splitting permutation tests into shards that can be
+    computed independently (e.g., as separate jobs on a computing cluster).
+    Tests conducted in the context only compute the permutations belonging
+    to one shard, and their partial permutation distributions are saved to
+    ``path`` when the context is exited. Use :class:`merge_permutation_shards`
+    to combine the shards into the complete test.
+
+    Parameters
+    ----------
+    index : int
+        Index of the shard (``0 <= index < n_shards``).
+    n_shards : int
+        Total number of shards.
+    path : str
+        File in which to save the partial permutation distributions.
+
+    Notes
+    -----
+    Test results computed in the context are based on the permutations in the
+    shard only.
+
+    Examples
+    --------
+    In each job (``i`` is the job index)::
+
+        >>> with testnd.permutation_shard(i, 10, 'shard %i.pickled' % i):
+        ...     testnd.ttest_rel('y', 'A', match='rm', ds=ds, pmin=0.05)
+
+    And subsequently::
+
+        >>> paths = ['shard %i.pickled' % i for i in range(10)]
+        >>> with testnd.merge_permutation_shards(paths):
+        ...     res = testnd.ttest_rel('y', 'A', match='rm', ds=ds, pmin=0.05)
+    """
+    def __init__(self, index, n_shards, path):
+        if not 0 <= index < n_shards:
+            raise ValueError("index=%r for n_shards=%r" % (index, n_shards))
+        self.index = index
+        self.n_shards = n_shards
+        self.path = path
+        self.dists = {}
+
+    def __enter__(self):
+        global _SHARD
+        if _SHARD is not None or _SHARD_DISTS is not None:
+            raise RuntimeError("Permutation shard context already active")
+        _SHARD = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _SHARD
+        _SHARD = None
+        if exc_type is None:
+            with open(self.path, 'wb') as fid:
+                pickle.dump(self.dists, fid, pickle.HIGHEST_PROTOCOL)
+
+    def range(self, samples):
+        "Range of permutation indexes that belong to this shard"
+        start = samples * self.index // self.n_shards
+        stop = samples * (self.index + 1) // self.n_shards
+        return start, stop
+
+    def add(self, cdist):
+        "Add the partial distribution of a _ClusterDist"
+        key = cdist._shard_key()
+        self.dists[key] = (cdist.perm_start, cdist.perm_stop,
+                           np.array(cdist.dist), cdist.dt_perm)
+
+
+class merge_permutation_shards(object):
+    """Combine permutation shards into complete permutation tests
+
+    Context manager in which permutation tests are completed with the
+    permutation distributions computed in separate shards instead of
+    computing the permutations (see :class:`permutation_shard`). The result
+    is identical to computing the test in a single run.
+
+    Parameters
+    ----------
+    paths : sequence of str
+        Files saved by :class:`permutation_shard`.
+    """
+    def __init__(self, paths):
+        self.dists = {}
+        for path in paths:
+            with open(path, 'rb') as fid:
+                for key, piece in pickle.load(fid).items():
+                    self.dists.setdefault(key, []).append(piece)
+
+    def __enter__(self):
+        global _SHARD_DISTS
+        if _SHARD is not None or _SHARD_DISTS is not None:
+            raise RuntimeError("Permutation shard context already active")
+        _SHARD_DISTS = self.dists
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _SHARD_DISTS
+        _SHARD_DISTS = None
+
+
+class shared_permutation(object):
+    """Evaluate the permutations of several tests in a single pass
+
+    Context manager for tests that share the same cases and permutation scheme.
+    Instead of permuting the data of each test separately, the permutations
+    of all tests conducted in the context are computed together when the
+    context is exited: the data are transferred to the worker processes once,
+    a single permutation sequence is generated, and each permutation is
+    applied to the data of all tests.
+
+    Notes
+    -----
+    Results of tests conducted in the context are only complete after the
+    context is exited. Tests whose permutations are not compatible (e.g.,
+    because they differ in the number of cases or samples) are evaluated in
+    separate passes. Since all tests use the same seed for their permutations,
+    the results are identical to conducting the tests separately.
+    :class:`anova` already evaluates all its effects in a single pass and
+    always computes its permutations immediately.
+
+    Examples
+    --------
+    Test several contrasts in the same data::
+
+        >>> with testnd.shared_permutation():
+        ...     res_b = testnd.ttest_rel('y', 'A', 'b', 'a', 'rm', ds=ds, pmin=0.05)
+        ...     res_c = testnd.ttest_rel('y', 'A', 'c', 'a', 'rm', ds=ds, pmin=0.05)
+        >>> res_b.clusters
+    """
+    def __init__(self):
+        self._groups = {}
+
+    def __enter__(self):
+        global _SHARED_PERMUTATION
+        if _SHARED_PERMUTATION is not None:
+            raise RuntimeError("Shared permutation context already active")
+        _SHARED_PERMUTATION = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _SHARED_PERMUTATION
+        _SHARED_PERMUTATION = None
+        if exc_type is not None:
+            return
+        for group in self._groups.values():
+            results, test_funcs, dists, iterators, use_mp = zip(*group)
+            run_permutation_multi(test_funcs, dists, iterators[0], all(use_mp))
+            for res in results:
+                res._expand_state()
+        self._groups.clear()
+
+    def add(self, res, test_func, cdist, iterator, scheme, use_mp=True):
+        """Defer the permutations for a test result
+
+        Parameters
+        ----------
+        res : _Result
+            Test result; ``res._expand_state()`` is called after the
+            permutations are done.
+        test_func : callable
+            Function computing the statistic map (``test_func(y, out, perm)``).
+        cdist : _ClusterDist
+            Distribution for the test.
+        iterator : iterator
+            Permutations for the test.
+        scheme : tuple
+            Parameters describing the permutation scheme (apart from the
+            number of permutations); tests with the same scheme share a pass.
+        use_mp : bool
+            Whether ``test_func`` can be used with multiprocessing.
+        """
+        key = scheme + (cdist._total_samples, cdist.perm_start,
+                        cdist.perm_stop, cdist.dist_shape)
+        self._groups.setdefault(key, []).append(
+            (res, test_func, cdist, iterator, use_mp))
+
+
+class early_stopping(object):
+    """Stop permutation tests as soon as their p-values are determined
+
+    Context manager for a sequential mode of permutation tests, e.g. for
+    exploratory analyses across many time windows. Every ``interval``
+    permutations, the p-value of each original cluster (or data point, for
+    tests without clusters) is estimated with a confidence interval. Once all
+    p-values are known to be either smaller or larger than ``alpha``,
+    the remaining permutations are skipped.
+
+    Parameters
+    ----------
+    alpha : scalar
+        Significance level to which p-values are compared (default 0.05).
+    confidence : scalar
+        Confidence level for the (Clopper-Pearson) interval of each p-value
+        (default 0.99).
+    interval : int
+        Number of permutations between checks (default 100).
+
+    Notes
+    -----
+    The permutation distribution of a test that stopped early only contains
+    the permutations that were actually computed, and p-values are based on
+    this number (stored as ``samples`` of the cluster distribution, e.g.
+    ``res._cdist.samples``). P-values are thus less precise than with the
+    full number of permutations; this mode is not intended for final
+    analyses. Early stopping does not apply to tests computed in
+    :class:`permutation_shard` contexts.
+
+    Examples
+    --------
+    ::
+
+        >>> with testnd.early_stopping():
+        ...     res = testnd.ttest_rel('y', 'A', match='rm', ds=ds, pmin=0.05,
+        ...                            samples=10000)
+    """
+    def __init__(self, alpha=0.05, confidence=0.99, interval=100):
+        if not 0 < alpha < 1:
+            raise ValueError("alpha=%r" % (alpha,))
+        elif not 0 < confidence < 1:
+            raise ValueError("confidence=%r" % (confidence,))
+        elif interval < 1:
+            raise ValueError("interval=%r" % (interval,))
+        self.alpha = alpha
+        self.confidence = confidence
+        self.interval = int(interval)
+
+    def __enter__(self):
+        global _EARLY_STOPPING
+        if _EARLY_STOPPING is not None:
+            raise RuntimeError("Early stopping context already active")
+        _EARLY_STOPPING = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _EARLY_STOPPING
+        _EARLY_STOPPING = None
+
+
 class _Result(object):
     """Baseclass for testnd test results
 
@@ -193,6 +446,15 @@ class _Result(object):
             self.p = cdist.probability_map
             self._kind = cdist.kind
 
+    def _run_permutation(self, test_func, cdist, iterator, scheme,
+                         use_mp=True):
+        "Run permutations, or defer them to an active shared_permutation"
+        if _SHARED_PERMUTATION is None:
+            run_permutation(test_func, cdist, iterator, use_mp)
+        else:
+            _SHARED_PERMUTATION.add(self, test_func, cdist, iterator, scheme,
+                                    use_mp)
+
     def _iter_cdists(self):
         yield (None, self._cdist)
 
@@ -347,6 +609,9 @@ class _Result(object):
         # n samples
         if self.samples == -1:
             l.add_item("In all %s possible permutations" % self.n_samples)
+        elif cdist.samples < self.samples:  # early stopping
+            l.add_item("In %s of %s random permutations" %
+                       (cdist.samples, self.samples))
         else:
             l.add_item("In %s random permutations" % self.samples)
 
@@ -358,8 +623,10 @@ class _Result(object):
 
     @property
     def n_samples(self):
-        if self.samples == -1:
-            return self._first_cdist.samples
+        "Number of permutations that were actually evaluated"
+        cdist = self._first_cdist
+        if self.samples and cdist is not None:
+            return cdist.samples
         else:
             return self.samples
 
@@ -484,9 +751,12 @@ class t_contrast_rel(_Result):
                                  parc, force_permutation)
             cdist.add_original(tmap)
             if cdist.do_permutation:
-                iterator = permute_order(len(ct.Y), samples, unit=ct.match)
-                run_permutation(t_contrast, cdist, iterator,
-                                MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
+                iterator = permute_order(len(ct.Y), samples, unit=ct.match,
+                                         start=cdist.perm_start,
+                                         stop=cdist.perm_stop)
+                self._run_permutation(t_contrast, cdist, iterator,
+                                      ('order', len(ct.Y), tuple(ct.match)),
+                                      MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
 
         # store attributes
         _Result.__init__(self, ct.Y, ct.match, sub, samples, tfce, pmin, cdist,
@@ -498,7 +768,8 @@ class t_contrast_rel(_Result):
         self.tmin = tmin
         self.t = t
 
-        self._expand_state()
+        if cdist is None or cdist._finalized:
+            self._expand_state()
 
     def _name(self):
         if self.Y:
@@ -630,9 +901,13 @@ class corr(_Result):
             if cdist.do_permutation:
                 def test_func(y, out, perm):
                     return stats.corr(y, x, out, perm)
-                iterator = permute_order(n, samples, unit=match)
-                run_permutation(test_func, cdist, iterator,
-                                MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
+                iterator = permute_order(n, samples, unit=match,
+                                         start=cdist.perm_start,
+                                         stop=cdist.perm_stop)
+                unit = None if match is None else tuple(match)
+                self._run_permutation(test_func, cdist, iterator,
+                                      ('order', n, unit),
+                                      MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
 
         # compile results
         dims = Y.dims[1:]
@@ -648,7 +923,8 @@ class corr(_Result):
         self.df = df
         self.r = r
 
-        self._expand_state()
+        if cdist is None or cdist._finalized:
+            self._expand_state()
 
     def _expand_state(self):
         _Result._expand_state(self)
@@ -783,8 +1059,10 @@ class ttest_1samp(_Result):
                                  parc, force_permutation)
             cdist.add_original(tmap)
             if cdist.do_permutation:
-                iterator = permute_sign_flip(n, samples)
-                run_permutation(opt.t_1samp_perm, cdist, iterator)
+                iterator = permute_sign_flip(n, samples, start=cdist.perm_start,
+                                             stop=cdist.perm_stop)
+                self._run_permutation(opt.t_1samp_perm, cdist, iterator,
+                                      ('sign', n))
 
         # NDVar map of t-values
         dims = ct.Y.dims[1:]
@@ -806,7 +1084,8 @@ class ttest_1samp(_Result):
         self.diff = diff
         self.t = t
 
-        self._expand_state()
+        if cdist is None or cdist._finalized:
+            self._expand_state()
 
     def _expand_state(self):
         _Result._expand_state(self)
@@ -938,9 +1217,11 @@ class ttest_ind(_Result):
             if cdist.do_permutation:
                 def test_func(y, out, perm):
                     return stats.t_ind(y, n1, n0, True, out, perm)
-                iterator = permute_order(n, samples)
-                run_permutation(test_func, cdist, iterator,
-                                MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
+                iterator = permute_order(n, samples, start=cdist.perm_start,
+                                         stop=cdist.perm_stop)
+                self._run_permutation(test_func, cdist, iterator,
+                                      ('order', n, None),
+                                      MP_FOR_NON_TOP_LEVEL_FUNCTIONS)
 
         dims = ct.Y.dims[1:]
 
@@ -969,7 +1250,8 @@ class ttest_ind(_Result):
         self.c0_mean = c0_mean
         self.t = t
 
-        self._expand_state()
+        if cdist is None or cdist._finalized:
+            self._expand_state()
 
     def _expand_state(self):
         _Result._expand_state(self)
@@ -1147,8 +1429,10 @@ class ttest_rel(_Result):
                                  criteria, parc, force_permutation)
             cdist.add_original(tmap)
             if cdist.do_permutation:
-                iterator = permute_sign_flip(n, samples)
-                run_permutation(opt.t_1samp_perm, cdist, iterator)
+                iterator = permute_sign_flip(n, samples, start=cdist.perm_start,
+                                             stop=cdist.perm_stop)
+                self._run_permutation(opt.t_1samp_perm, cdist, iterator,
+                                      ('sign', n))
 
         dims = ct.Y.dims[1:]
         t0, t1, t2 = stats.ttest_t((.05, .01, .001), df, tail)
@@ -1174,7 +1458,8 @@ class ttest_rel(_Result):
         self.c0_mean = c0_mean
         self.t = t
 
-        self._expand_state()
+        if cdist is None or cdist._finalized:
+            self._expand_state()
 
     def _expand_state(self):
         _Result._expand_state(self)
@@ -1492,7 +1777,10 @@ class anova(_MultiEffectResult):
                 do_permutation += cdist.do_permutation
 
             if do_permutation:
-                iterator = permute_order(len(Y), samples, unit=match)
+                cdist = cdists[0]
+                iterator = permute_order(len(Y), samples, unit=match,
+                                         start=cdist.perm_start,
+                                         stop=cdist.perm_stop)
                 run_permutation_me(lm, cdists, iterator)
 
         # create ndvars
@@ -2070,6 +2358,10 @@ class _ClusterDist:
 
         # prepare distribution
         samples = int(samples)
+        if _SHARD is None:
+            perm_start, perm_stop = 0, samples
+        else:
+            perm_start, perm_stop = _SHARD.range(samples)
         if parc:
             if kind == 'tfce':
                 raise NotImplementedError("parc for TFCE")
@@ -2083,12 +2375,12 @@ class _ClusterDist:
             # find parameters for aggregating dist
             parc_ = nad_dim.parc
             parc_dim = Categorial(nad_dim.name, parc_.cells)
-            dist_shape = (samples, len(parc_dim))
+            dist_shape = (perm_stop - perm_start, len(parc_dim))
             dist_dims = ('case', parc_dim)
             parc_indexes = tuple(np.flatnonzero(parc_ == cell) for cell in parc_.cells)
             max_axes = tuple(range(1, ndim))
         else:
-            dist_shape = (samples,)
+            dist_shape = (perm_stop - perm_start,)
             dist_dims = None
             max_axes = None
             parc_indexes = None
@@ -2108,7 +2400,10 @@ class _ClusterDist:
         self.dims = y_perm.dims
         self.shape = shape  # internal shape for maps
         self._connectivity = connectivity
-        self.samples = samples
+        self.samples = perm_stop - perm_start
+        self.perm_start = perm_start  # range of permutation indexes
+        self.perm_stop = perm_stop
+        self._total_samples = samples
         self.dist_shape = dist_shape
         self._dist_dims = dist_dims
         self._max_axes = max_axes
@@ -2199,6 +2494,8 @@ class _ClusterDist:
         if self.force_permutation or (self.samples and n_clusters):
             self._create_dist()
             self.do_permutation = True
+            if _SHARD_DISTS is not None:
+                self._merge_shards(_SHARD_DISTS)
         else:
             self.dist_array = None
             self.finalize()
@@ -2217,6 +2514,72 @@ class _ClusterDist:
         self.dist_array = dist_array
         self.dist = dist
 
+    def _original_values(self):
+        "Values of the original data that are compared to the distribution"
+        if self.kind == 'cluster':
+            if not self.n_clusters:
+                return np.empty(0)
+            cluster_v = ndimage.sum(self._original_param_map,
+                                    self._original_cluster_map, self._cids)
+            return np.abs(cluster_v)
+        elif self.kind == 'tfce':
+            return self._original_cluster_map.ravel()
+        elif self.tail == 0:
+            return np.abs(self._original_param_map).ravel()
+        elif self.tail < 0:
+            return -self._original_param_map.ravel()
+        else:
+            return self._original_param_map.ravel()
+
+    def _original_parcels(self):
+        "Parcel index for each of the original values (None without parc)"
+        if not self.parc:
+            return None
+        parcel = np.empty(self.shape[0], int)
+        for i, index in enumerate(self.map_args[3]):
+            parcel[index] = i
+        if self.kind == 'cluster':
+            return np.array([parcel[np.nonzero(self._original_cluster_map ==
+                                               cid)[0][0]]
+                             for cid in self._cids], int)
+        index = (slice(None),) + (np.newaxis,) * (len(self.shape) - 1)
+        return np.broadcast_to(parcel[index], self.shape).ravel()
+
+    def _truncate_dist(self, n):
+        "Only keep the first n permutations (after stopping early)"
+        self.dist = self.dist[:n]
+        self.dist_shape = (n,) + self.dist_shape[1:]
+        self.samples = n
+        self.perm_stop = self.perm_start + n
+
+    def _shard_key(self):
+        "Identify the distribution across permutation shards"
+        params = (self.kind, self.threshold, self.tail, self.tstart,
+                  self.tstop, sorted(self.criteria.items()), self.parc,
+                  self.meas, self.name, self._total_samples)
+        h = hashlib.sha1(repr(params).encode('utf-8'))
+        h.update(np.ascontiguousarray(self._original_param_map).tobytes())
+        return h.hexdigest()
+
+    def _merge_shards(self, shard_dists):
+        "Fill the distribution from permutation shards"
+        pieces = shard_dists.get(self._shard_key())
+        if not pieces:
+            raise RuntimeError("No permutation shards found for %s" % self.name)
+        done = np.zeros(self.samples, bool)
+        dt_perm = 0
+        for start, stop, dist, dt in pieces:
+            self.dist[start:stop] = dist
+            done[start:stop] = True
+            dt_perm += dt
+        if not done.all():
+            raise RuntimeError("Permutation shards for %s are incomplete: %i "
+                               "of %i permutations are missing" %
+                               (self.name, np.sum(~done), self.samples))
+        self.dt_perm = dt_perm
+        self.do_permutation = False
+        self.finalize()
+
     def _aggregate_dist(self, **sub):
         """Aggregate permutation distribution to one value per permutation
 
@@ -2493,10 +2856,7 @@ class _ClusterDist:
         if not raw:
             return x.reshape((len(x), -1))
 
-        n = reduce(operator.mul, self.y_perm.shape)
-        ra = RawArray('d', n)
-        ra[:] = x.ravel()  # OPT: don't copy data
-        return ra, x.shape
+        return _raw_array(x), x.shape
 
     def _cluster_properties(self, cluster_map, cids):
         """Create a Dataset with cluster properties
@@ -2916,7 +3276,7 @@ class _MergedTemporalClusterDist:
         return clusters
 
 
-def distribution_worker(dist_array, dist_shape, in_queue):
+def distribution_worker(dist_array, dist_shape, in_queue, n_done):
     "Worker that accumulates values and places them into the distribution"
     n = reduce(operator.mul, dist_shape)
     dist = np.frombuffer(dist_array, np.float64, n)
@@ -2924,12 +3284,12 @@ def distribution_worker(dist_array, dist_shape, in_queue):
     samples = dist_shape[0]
     for i in trange(samples, desc="Permutation test", unit=' permutations'):
         dist[i] = in_queue.get()
+        n_done.value = i + 1
 
 
 def permutation_worker(in_queue, out_queue, y, shape, test_func, map_args):
     "Worker for 1 sample t-test"
-    n = reduce(operator.mul, shape)
-    y = np.frombuffer(y, np.float64, n).reshape((shape[0], -1))
+    y = np.ctypeslib.as_array(y).reshape((shape[0], -1))
     stat_map = np.empty(shape[1:])
     stat_map_flat = stat_map.ravel()
     map_processor = get_map_processor(*map_args)
@@ -2942,29 +3302,139 @@ def permutation_worker(in_queue, out_queue, y, shape, test_func, map_args):
         out_queue.put(max_v)
 
 
-def run_permutation(test_func, dist, iterator, use_mp=True):
-    if use_mp and MULTIPROCESSING:
-        workers, out_queue = setup_workers(test_func, dist)
+def _run_workers(workers, permutation_queue, n_done, iterator, dists):
+    "Feed permutations to the workers and wait for them to finish"
+    stop = _early_stop(dists)
+    max_backlog = 2 * (len(workers) - 1)
+    n_sent = 0
+    for perm in iterator:
+        if stop:
+            # permutations that are queued are computed even after stopping
+            while n_sent - n_done.value >= max_backlog:
+                sleep(0.001)
+        permutation_queue.put(perm)
+        n_sent += 1
+        if stop and stop(n_done.value):
+            break
+    else:
+        stop = None
+
+    for _ in range(len(workers) - 1):
+        permutation_queue.put(None)
+
+    logger = logging.getLogger(__name__)
+    for w in workers[:-1]:
+        w.join()
+        logger.debug("worker joined")
+
+    dist_worker = workers[-1]
+    if stop:
+        # permutations already sent are added to the distribution
+        while n_done.value < n_sent:
+            sleep(0.01)
+        dist_worker.terminate()
+        stop.truncate(n_sent)
+    dist_worker.join()
+    logger.debug("worker joined")
+
+
+def _early_stop(dists):
+    "Early stopping check for an active early_stopping context (or None)"
+    if _EARLY_STOPPING is None or _SHARD is not None:
+        return None
+    return _EarlyStop(dists, _EARLY_STOPPING.alpha, _EARLY_STOPPING.confidence,
+                      _EARLY_STOPPING.interval)
 
-        for perm in iterator:
-            out_queue.put(perm)
 
-        for _ in range(len(workers) - 1):
-            out_queue.put(None)
+class _EarlyStop(object):
+    """Check whether the p-values of permutation tests are determined
 
+    Calling the object with the number of completed permutations ``n`` returns
+    ``True`` if the p-values of all ``dists`` are determined (checks are only
+    performed every ``interval`` permutations).
+    """
+    def __init__(self, dists, alpha, confidence, interval):
+        self.dists = dists
+        self.alpha = alpha
+        self.confidence = confidence
+        self.interval = interval
+        self._values = [(d._original_values(), d._original_parcels())
+                        for d in dists]
+        self._next_check = interval
+
+    def __call__(self, n):
+        if n < self._next_check:
+            return False
+        self._next_check = n + self.interval
+        return all(_p_determined(d.dist[:n], values, self.alpha,
+                                 self.confidence, parcels)
+                   for d, (values, parcels) in zip(self.dists, self._values))
+
+    def truncate(self, n):
+        "Discard the distributions after the first ``n`` permutations"
         logger = logging.getLogger(__name__)
-        for w in workers:
-            w.join()
-            logger.debug("worker joined")
+        logger.info("Permutation test stopped early after %i of %i "
+                    "permutations", n, self.dists[0].samples)
+        for d in self.dists:
+            d._truncate_dist(n)
+
+
+def _p_determined(dist, values, alpha, confidence, parcels=None):
+    """Whether p-values are on one side of alpha with a given confidence
+
+    Parameters
+    ----------
+    dist : array  (n_permutations[, ...])
+        Permutation distribution (maximum values are used for multiple
+        dimensions).
+    values : array  (n_values,)
+        Values of the original data.
+    alpha : scalar
+        Significance level.
+    confidence : scalar
+        Confidence level of the (Clopper-Pearson) interval for the p-values.
+    parcels : None | array of int  (n_values,)
+        For a distribution with one column per parcel, the parcel of each
+        value. Values are compared to the distribution of their own parcel
+        as well as to the maximum across parcels.
+    """
+    if parcels is not None:
+        for i in np.unique(parcels):
+            if not _p_determined(dist[:, i], values[parcels == i], alpha,
+                                 confidence):
+                return False
+    if dist.ndim > 1:
+        dist = dist.max(tuple(range(1, dist.ndim)))
+    n = len(dist)
+    # number of permutations exceeding each value (as in probability maps)
+    n_larger = n - np.searchsorted(np.sort(dist), values, 'right')
+    k = np.unique(n_larger)
+    a = (1 - confidence) / 2
+    with np.errstate(invalid='ignore'):
+        lower = np.where(k == 0, 0, scipy.stats.beta.ppf(a, k, n - k + 1))
+        upper = np.where(k == n, 1, scipy.stats.beta.ppf(1 - a, k + 1, n - k))
+    return bool(np.all((upper < alpha) | (lower > alpha)))
+
+
+def run_permutation(test_func, dist, iterator, use_mp=True):
+    if use_mp and MULTIPROCESSING:
+        workers, out_queue, n_done = setup_workers(test_func, dist)
+        _run_workers(workers, out_queue, n_done, iterator, [dist])
     else:
         y = dist.data_for_permutation(False)
         map_processor = get_map_processor(*dist.map_args)
         stat_map = np.empty(dist.shape)
         stat_map_flat = stat_map.ravel()
+        stop = _early_stop([dist])
         for i, perm in enumerate(iterator):
             test_func(y, stat_map_flat, perm)
             dist.dist[i] = map_processor.max_stat(stat_map)
+            if stop and stop(i + 1):
+                stop.truncate(i + 1)
+                break
     dist.finalize()
+    if _SHARD is not None:
+        _SHARD.add(dist)
 
 
 def setup_workers(test_func, dist):
@@ -2984,12 +3454,13 @@ def setup_workers(test_func, dist):
         workers.append(w)
 
     # distribution worker
-    args = (dist.dist_array, dist.dist_shape, dist_queue)
+    n_done = RawValue('l', 0)
+    args = (dist.dist_array, dist.dist_shape, dist_queue, n_done)
     w = Process(target=distribution_worker, args=args)
     w.start()
     workers.append(w)
 
-    return workers, permutation_queue
+    return workers, permutation_queue, n_done
 
 
 def run_permutation_me(test, dists, iterator):
@@ -3000,18 +3471,9 @@ def run_permutation_me(test, dists, iterator):
         thresholds = None
 
     if MULTIPROCESSING:
-        workers, out_queue = setup_workers_me(test, dists, thresholds)
-
-        for perm in iterator:
-            out_queue.put(perm)
-
-        for _ in range(len(workers) - 1):
-            out_queue.put(None)
-
-        logger = logging.getLogger(__name__)
-        for w in workers:
-            w.join()
-            logger.debug("worker joined")
+        workers, out_queue, n_done = setup_workers_me(test, dists, thresholds)
+        _run_workers(workers, out_queue, n_done, iterator,
+                     [d for d in dists if d.do_permutation])
     else:
         y = dist.data_for_permutation(False)
         map_processor = get_map_processor(*dist.map_args)
@@ -3023,6 +3485,7 @@ def run_permutation_me(test, dists, iterator):
         else:
             stat_maps_iter = list(zip(stat_maps_iter, dists))
 
+        stop = _early_stop([d for d in dists if d.do_permutation])
         for i, perm in enumerate(iterator):
             test.map(y, perm)
             if thresholds:
@@ -3033,10 +3496,15 @@ def run_permutation_me(test, dists, iterator):
                 for m, d in stat_maps_iter:
                     if d.do_permutation:
                         d.dist[i] = map_processor.max_stat(m)
+            if stop and stop(i + 1):
+                stop.truncate(i + 1)
+                break
 
     for d in dists:
         if d.do_permutation:
             d.finalize()
+            if _SHARD is not None:
+                _SHARD.add(d)
 
 
 def setup_workers_me(test_func, dists, thresholds):
@@ -3058,18 +3526,18 @@ def setup_workers_me(test_func, dists, thresholds):
         workers.append(w)
 
     # distribution worker
-    args = ([d.dist_array for d in dists], dist.dist_shape, dist_queue)
+    n_done = RawValue('l', 0)
+    args = ([d.dist_array for d in dists], dist.dist_shape, dist_queue, n_done)
     w = Process(target=distribution_worker_me, args=args)
     w.start()
     workers.append(w)
 
-    return workers, permutation_queue
+    return workers, permutation_queue, n_done
 
 
 def permutation_worker_me(in_queue, out_queue, y, shape, test, map_args,
                           thresholds):
-    n = reduce(operator.mul, shape)
-    y = np.frombuffer(y, np.float64, n).reshape((shape[0], -1))
+    y = np.ctypeslib.as_array(y).reshape((shape[0], -1))
     iterator = list(test.preallocate(shape))
     if thresholds:
         iterator = list(zip(iterator, thresholds))
@@ -3087,7 +3555,7 @@ def permutation_worker_me(in_queue, out_queue, y, shape, test, map_args,
         out_queue.put(max_v)
 
 
-def distribution_worker_me(dist_arrays, dist_shape, in_queue):
+def distribution_worker_me(dist_arrays, dist_shape, in_queue, n_done):
     "Worker that accumulates values and places them into the distribution"
     n = reduce(operator.mul, dist_shape)
     dists = [d if d is None else np.frombuffer(d, np.float64, n).reshape(dist_shape)
@@ -3097,3 +3565,113 @@ def distribution_worker_me(dist_arrays, dist_shape, in_queue):
         for dist, v in zip(dists, in_queue.get()):
             if dist is not None:
                 dist[i] = v
+        n_done.value = i + 1
+
+
+def run_permutation_multi(test_funcs, dists, iterator, use_mp=True):
+    """Evaluate the permutations of several tests in one pass
+
+    Parameters
+    ----------
+    test_funcs : sequence of callable
+        For each test, the function computing the statistic map
+        (``test_func(y, out, perm)``).
+    dists : sequence of _ClusterDist
+        Distributions for the tests (all tests need to share the same cases
+        and the same ``dist_shape``).
+    iterator : iterator
+        Permutations, applied to all tests.
+    use_mp : bool
+        Use multiprocessing (if enabled through :func:`configure`).
+    """
+    # concatenate the data of all tests along the flattened data axis
+    ys = [d.data_for_permutation(False) for d in dists]
+    bounds = np.cumsum([0] + [y.shape[1] for y in ys])
+    y = np.concatenate(ys, 1)
+    del ys
+    map_shapes = [d.shape for d in dists]
+    map_args = [d.map_args for d in dists]
+
+    if use_mp and MULTIPROCESSING:
+        workers, out_queue, n_done = setup_workers_multi(test_funcs, dists, y,
+                                                         bounds)
+        _run_workers(workers, out_queue, n_done, iterator, dists)
+    else:
+        maps = _MultiMaps(y, bounds, test_funcs, map_shapes, map_args)
+        stop = _early_stop(dists)
+        for i, perm in enumerate(iterator):
+            for d, v in zip(dists, maps.max_stats(perm)):
+                d.dist[i] = v
+            if stop and stop(i + 1):
+                stop.truncate(i + 1)
+                break
+
+    for d in dists:
+        d.finalize()
+        if _SHARD is not None:
+            _SHARD.add(d)
+
+
+def setup_workers_multi(test_funcs, dists, y, bounds):
+    "Initialize workers for permutation tests sharing a permutation pass"
+    logger = logging.getLogger(__name__)
+    logger.debug("Setting up %i worker processes..." % N_WORKERS)
+    permutation_queue = SimpleQueue()
+    dist_queue = SimpleQueue()
+
+    # permutation workers
+    args = (permutation_queue, dist_queue, _raw_array(y), y.shape, test_funcs,
+            bounds, [d.shape for d in dists], [d.map_args for d in dists])
+    workers = []
+    for _ in range(N_WORKERS):
+        w = Process(target=permutation_worker_multi, args=args)
+        w.start()
+        workers.append(w)
+
+    # distribution worker
+    n_done = RawValue('l', 0)
+    args = ([d.dist_array for d in dists], dists[0].dist_shape, dist_queue,
+            n_done)
+    w = Process(target=distribution_worker_me, args=args)
+    w.start()
+    workers.append(w)
+
+    return workers, permutation_queue, n_done
+
+
+def permutation_worker_multi(in_queue, out_queue, y, shape, test_funcs, bounds,
+                             map_shapes, map_args):
+    y = np.ctypeslib.as_array(y).reshape(shape)
+    maps = _MultiMaps(y, bounds, test_funcs, map_shapes, map_args)
+    while True:
+        perm = in_queue.get()
+        if perm is None:
+            break
+        out_queue.put(maps.max_stats(perm))
+
+
+class _MultiMaps(object):
+    "Statistic maps for several tests on slices of the same data array"
+    def __init__(self, y, bounds, test_funcs, map_shapes, map_args):
+        self._ys = [y[:, i0:i1] for i0, i1 in zip(bounds[:-1], bounds[1:])]
+        self._test_funcs = test_funcs
+        self._maps = [np.empty(shape) for shape in map_shapes]
+        self._flat_maps = [m.ravel() for m in self._maps]
+        self._map_processors = [get_map_processor(*args) for args in map_args]
+
+    def max_stats(self, perm):
+        "Maximum statistic of each test for one permutation"
+        out = []
+        for y, test_func, stat_map, flat_map, map_processor in zip(
+                self._ys, self._test_funcs, self._maps, self._flat_maps,
+                self._map_processors):
+            test_func(y, flat_map, perm)
+            out.append(map_processor.max_stat(stat_map))
+        return out
+
+
+def _raw_array(x):
+    "Copy an array into a shared RawArray"
+    ra = RawArray('f' if x.dtype == np.float32 else 'd', x.size)
+    np.ctypeslib.as_array(ra)[:] = x.ravel()  # OPT: don't copy data
+    return ra
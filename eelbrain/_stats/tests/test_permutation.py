@@ -3,9 +3,11 @@ import logging
 
 from nose.tools import eq_, ok_, assert_raises
 import numpy as np
+from numpy.testing import assert_array_equal
 
 from eelbrain import Factor, Var
-from eelbrain._stats.permutation import resample, permute_sign_flip
+from eelbrain._stats.permutation import (
+    resample, permute_order, permute_sign_flip)
 
 
 def test_permutation():
@@ -45,3 +47,20 @@ def test_permutation_sign_flip():
         eq_(np.any(np.all(row == res[:i], 1)), False)
 
     assert_raises(NotImplementedError, permute_sign_flip(63).__next__)
+
+
+def test_permutation_range():
+    "Test computing subsets of the permutation sequence"
+    unit = Factor('abc', tile=4)
+    for kwargs in ({}, {'unit': unit}):
+        perms = [p.copy() for p in permute_order(12, 20, **kwargs)]
+        np.random.seed(1)  # independent of global random state
+        part = [p.copy() for p in permute_order(12, 20, start=5, stop=12,
+                                                **kwargs)]
+        eq_(len(part), 7)
+        assert_array_equal(part, perms[5:12])
+
+    perms = [p.copy() for p in permute_sign_flip(12, 20)]
+    part = [p.copy() for p in permute_sign_flip(12, 20, start=5, stop=12)]
+    eq_(len(part), 7)
+    assert_array_equal(part, perms[5:12])
@@ -6,6 +6,7 @@ from numpy.testing import assert_array_equal
 
 from eelbrain import datasets
 from eelbrain._stats.spm import LM, RandomLM
+from eelbrain._utils.testing import assert_dataobj_equal
 
 
 def test_lm():
@@ -42,3 +43,12 @@ def test_random_lm():
     # persistence
     rlm_p = pickle.loads(pickle.dumps(rlm, pickle.HIGHEST_PROTOCOL))
     eq_(rlm_p.dims, rlm.dims)
+
+    # all columns in a shared permutation pass
+    rlm._column_ttests(samples=100, pmin=0.05, mintime=0.025)
+    eq_(rlm.samples, 100)
+    eq_(rlm.tests['A x B'].clusters.n_cases, 6)
+    assert_dataobj_equal(rlm.tests['A x B'].p, res.p)
+    for term in ('intercept', 'Y'):
+        res = rlm.column_ttest(term, samples=100, pmin=0.05, mintime=0.025)
+        assert_dataobj_equal(rlm.tests[term].p, res.p)
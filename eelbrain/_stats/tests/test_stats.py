@@ -1,4 +1,5 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
+from itertools import combinations
 import warnings
 
 from nose.tools import assert_almost_equal, eq_, assert_raises
@@ -6,11 +7,53 @@ import numpy as np
 from numpy.testing import assert_allclose, assert_equal
 import scipy.stats
 
-from eelbrain import datasets
+from eelbrain import datasets, Celltable, Factor
 from eelbrain._stats import stats
 from eelbrain._stats.permutation import permute_order
 
 
+def test_cell_stats():
+    "Test CellStats against cell-wise computations"
+    ds = datasets.get_loftus_masson_1994()
+    ct = Celltable(ds['n_recalled'], ds['exposure'].as_factor(), ds['subject'])
+    y = ct.Y.x
+    x = ct.X
+    data = [d.x for d in ct.get_data()]
+
+    # related measures
+    cs = stats.CellStats(data, ct.all_within)
+    assert_allclose(cs.mean, [d.mean() for d in data])
+    assert_allclose(cs.error('sem'), [scipy.stats.sem(d) for d in data])
+    assert_allclose(cs.error('95%ci'),
+                    stats.variability(y, x, None, '95%ci', False, ct.cells))
+    assert_allclose(cs.error('sem', True),
+                    stats.variability(y, x, ct.match, 'sem', True))
+    assert_allclose(cs.error('ci', True),
+                    stats.variability(y, x, ct.match, 'ci', True))
+    t, df, p = cs.pairwise_t()
+    for i, (a, b) in enumerate(combinations(data, 2)):
+        t_, p_ = scipy.stats.ttest_rel(a, b)
+        assert_almost_equal(t[i], t_)
+        assert_almost_equal(p[i], p_)
+        eq_(df[i], len(a) - 1)
+
+    # independent measures
+    data[1] = data[1][2:]
+    assert_raises(ValueError, stats.CellStats, data, True)
+    cs = stats.CellStats(data)
+    t, df, p = cs.pairwise_t()
+    for i, (a, b) in enumerate(combinations(data, 2)):
+        t_, p_ = scipy.stats.ttest_ind(a, b)
+        assert_almost_equal(t[i], t_)
+        assert_almost_equal(p[i], p_)
+        eq_(df[i], len(a) + len(b) - 2)
+    assert_raises(NotImplementedError, cs.error, 'sem', True)
+    cs = stats.CellStats(data[::2])
+    assert_allclose(cs.error('2sem', True), stats.variability(
+        np.hstack(data[::2]), Factor('ab', repeat=len(data[0])), None, '2sem',
+        True))
+
+
 def test_confidence_interval():
     "Test confidence_interval()"
     from rpy2.robjects import r
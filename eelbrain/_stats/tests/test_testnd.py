@@ -4,20 +4,22 @@
 from itertools import product
 import pickle as pickle
 import logging
+import os
 
 from nose.tools import (eq_, assert_equal, assert_not_equal,
                         assert_greater_equal, assert_less, assert_in,
                         assert_not_in, assert_raises)
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose, assert_array_equal
 from scipy import ndimage
 
 import eelbrain
 from eelbrain import datasets, testnd, NDVar, set_log_level, cwt_morlet
 from eelbrain._data_obj import UTS, Ordered, Sensor
-from eelbrain._stats.testnd import _ClusterDist, label_clusters, _MergedTemporalClusterDist
+from eelbrain._stats.testnd import _ClusterDist, label_clusters, _MergedTemporalClusterDist, \
+    _p_determined
 from eelbrain._utils.testing import assert_dataobj_equal, assert_dataset_equal, \
-    requires_mne_sample_data
+    requires_mne_sample_data, TempDir
 
 
 def test_anova():
@@ -322,6 +324,120 @@ def test_corr():
     assert_dataobj_equal(res.p, res_.p)
 
 
+def test_early_stopping():
+    "Test stopping permutation tests early"
+    ds = datasets.get_uts(True)
+    uts = ds['uts']
+    ds['uts_effect'] = NDVar(uts.x + 10, uts.dims)
+    kwargs = dict(ds=ds, samples=1000, pmin=0.05, mintime=0.02)
+    testnd.configure(0)
+    res = testnd.ttest_rel('uts', 'A', 'a1', 'a0', 'rm', **kwargs)
+    for multiprocessing in (0, 1):
+        testnd.configure(multiprocessing)
+        with testnd.early_stopping(interval=50):
+            eres = testnd.ttest_1samp('uts_effect', **kwargs)
+            sres = testnd.ttest_rel('uts', 'A', 'a1', 'a0', 'rm', **kwargs)
+            ares = testnd.anova('utsnd', 'A*B', **kwargs)
+        # a single cluster with p = 0 is determined after 150 permutations
+        if multiprocessing:
+            assert_less(eres._cdist.samples, 1000)
+        else:
+            eq_(eres._cdist.samples, 150)
+        eq_(eres.n_samples, eres._cdist.samples)
+        eq_(eres.clusters['p'][0], 0)
+        cdist = sres._cdist
+        eq_(len(cdist.dist), cdist.samples)
+        if not multiprocessing:
+            # permutations that were computed are the same (with
+            # multiprocessing, values are stored in the order they arrive)
+            assert_array_equal(cdist.dist, res._cdist.dist[:cdist.samples])
+        for cdist in ares._cdist:
+            if cdist.dist is not None:
+                eq_(len(cdist.dist), cdist.samples)
+    testnd.configure(-1)
+    assert_raises(ValueError, testnd.early_stopping, 1.5)
+
+    # with parc, values are compared to the distribution of their parcel
+    dist = np.column_stack((np.arange(200.), np.arange(200.) + 1000))
+    values = np.array([195.])
+    eq_(_p_determined(dist, values, 0.05, 0.99), True)
+    eq_(_p_determined(dist, values, 0.05, 0.99, np.array([0])), False)
+
+
+def test_float32():
+    "Test permutation tests with single precision data"
+    ds = datasets.get_uts(True)
+    utsnd = ds['utsnd']
+    ds['utsnd32'] = NDVar(utsnd.x.astype(np.float32), utsnd.dims)
+    for multiprocessing in (0, 1):
+        testnd.configure(multiprocessing)
+        res = testnd.ttest_1samp('utsnd', ds=ds, samples=10, pmin=0.05)
+        res32 = testnd.ttest_1samp('utsnd32', ds=ds, samples=10, pmin=0.05)
+        eq_(res32.t.x.dtype, np.float64)
+        assert_allclose(res32.t.x, res.t.x, 1e-5)
+
+        res = testnd.anova('utsnd', 'A*B', ds=ds, samples=10, pmin=0.05)
+        res32 = testnd.anova('utsnd32', 'A*B', ds=ds, samples=10, pmin=0.05)
+        for f, f32 in zip(res.f, res32.f):
+            assert_allclose(f32.x, f.x, 1e-5)
+    testnd.configure(-1)
+
+
+def test_permutation_shards():
+    "Test computing permutation tests in shards"
+    ds = datasets.get_uts(True)
+    tempdir = TempDir()
+    paths = [os.path.join(tempdir, 'shard %i.pickled' % i) for i in range(3)]
+    kwargs = dict(ds=ds, samples=20, pmin=0.05)
+
+    res = testnd.ttest_rel('uts', 'A', match='rm', **kwargs)
+    ares = testnd.anova('utsnd', 'A*B*rm', match='rm', **kwargs)
+    for i, path in enumerate(paths):
+        with testnd.permutation_shard(i, 3, path):
+            res_ = testnd.ttest_rel('uts', 'A', match='rm', **kwargs)
+            testnd.anova('utsnd', 'A*B*rm', match='rm', **kwargs)
+        eq_(res_._cdist.samples, (6, 7, 7)[i])
+    with testnd.merge_permutation_shards(paths):
+        mres = testnd.ttest_rel('uts', 'A', match='rm', **kwargs)
+        mares = testnd.anova('utsnd', 'A*B*rm', match='rm', **kwargs)
+    # with multiprocessing, the order of the distribution can differ
+    assert_array_equal(np.sort(mres._cdist.dist), np.sort(res._cdist.dist))
+    assert_dataobj_equal(mres.clusters, res.clusters)
+    for cdist, mcdist in zip(ares._cdist, mares._cdist):
+        assert_array_equal(np.sort(mcdist.dist), np.sort(cdist.dist))
+
+    # incomplete shards
+    with testnd.merge_permutation_shards(paths[:2]):
+        assert_raises(RuntimeError, testnd.ttest_rel, 'uts', 'A', match='rm',
+                      **kwargs)
+
+
+def test_shared_permutation():
+    "Test evaluating several tests in a shared permutation pass"
+    ds = datasets.get_uts(True)
+    kwargs = dict(ds=ds, samples=20, pmin=0.05)
+    tests = (
+        (testnd.ttest_rel, ('uts', 'A', 'a1', 'a0', 'rm')),
+        (testnd.ttest_rel, ('utsnd', 'A', 'a1', 'a0', 'rm')),
+        (testnd.ttest_1samp, ('uts',)),
+        (testnd.ttest_ind, ('utsnd', 'A')),
+        (testnd.corr, ('uts', 'Y')),
+    )
+    testnd.configure(0)
+    ress = [func(*args, **kwargs) for func, args in tests]
+    for multiprocessing in (0, 1):
+        testnd.configure(multiprocessing)
+        with testnd.shared_permutation():
+            sress = [func(*args, **kwargs) for func, args in tests]
+        for res, sres in zip(ress, sress):
+            # with multiprocessing, the order of the distribution can differ
+            assert_array_equal(np.sort(sres._cdist.dist),
+                               np.sort(res._cdist.dist))
+            assert_dataobj_equal(sres.p, res.p)
+            eq_(repr(sres), repr(res))
+    testnd.configure(-1)
+
+
 def test_t_contrast():
     ds = datasets.get_uts()
 
@@ -12,6 +12,7 @@ from . import fmtxt
 from ._data_obj import (
     Celltable, Dataset, Factor, Interaction, Var, ascategorial,
     as_legal_dataset_key, asndvar, asvar, assub, cellname, combine, isuv)
+from ._stats.stats import CellStats
 
 
 def difference(y, x, c1, c0, match, by=None, sub=None, ds=None):
@@ -377,14 +378,15 @@ def stats(y, row, col=None, match=None, sub=None, fmt='%.4g', funcs=[np.mean],
         table.midrule()
 
         # table entries
+        values = _cell_statistics(ct, funcs)
         for cell in ct.cells:
-            data = ct.data[cell]
             table.cell(cell)
-            for func in funcs:
-                table.cell(fmt % func(data.x))
+            for v in values[cell]:
+                table.cell(fmt % v)
     else:
         col = ascategorial(col, sub, ds)
         ct = Celltable(y, row % col, match=match)
+        cell_values = _cell_statistics(ct, funcs)
 
         N = len(col.cells)
         table = fmtxt.Table('l' * (N + 1))
@@ -422,10 +424,9 @@ def stats(y, row, col=None, match=None, sub=None, fmt='%.4g', funcs=[np.mean],
                     a += (Xcell,)
 
                 # cell
-                data = ct.data[a]
-                values = (f(data.x) for f in funcs)
+                values = cell_values[a]
                 if fmt_once:
-                    txt = fmt % values
+                    txt = fmt % tuple(values)
                 else:
                     txt = ', '.join((fmt % v for v in values))
 
@@ -434,6 +435,35 @@ def stats(y, row, col=None, match=None, sub=None, fmt='%.4g', funcs=[np.mean],
     return table
 
 
+def _cell_statistics(ct, funcs):
+    """Apply statistics functions to each cell in a Celltable
+
+    Means, variances and standard deviations are computed for all cells at
+    once; other functions are applied to each cell separately.
+
+    Returns
+    -------
+    values : dict
+        ``{cell: [func(data) for func in funcs]}``
+    """
+    data = ct.get_data()
+    cell_stats = CellStats(data)
+    columns = []
+    for func in funcs:
+        if func is np.mean:
+            columns.append(cell_stats.mean)
+        elif func is np.var:
+            with np.errstate(invalid='ignore'):
+                columns.append(cell_stats.ss / cell_stats.n)
+        elif func is np.std:
+            with np.errstate(invalid='ignore'):
+                columns.append(np.sqrt(cell_stats.ss / cell_stats.n))
+        else:
+            columns.append([func(d.x) for d in data])
+    return {cell: [column[i] for column in columns] for i, cell in
+            enumerate(ct.cells)}
+
+
 def repmeas(y, x, match, sub=None, ds=None):
     """Create a repeated-measures table
 
@@ -30,6 +30,7 @@ from .._data_obj import NDVar, UTS, dataobj_repr
 from .._stats.error_functions import (l1, l2, l1_for_delta, l2_for_delta,
                                       update_error)
 from .._utils import LazyProperty
+from .._utils.numpy_utils import apply_kernel
 
 
 # BoostingResult version
@@ -38,6 +39,9 @@ VERSION = 6
 # cross-validation
 N_SEGS = 10
 
+# number of responses to predict at once when evaluating kernels
+N_EVALUATE = 64
+
 # multiprocessing (0 = single process)
 N_WORKERS = cpu_count()
 JOB_TERMINATE = -1
@@ -294,8 +298,9 @@ def boosting(y, x, tstart, tstop, scale_data=True, delta=0.005, mindelta=None,
     pbar = tqdm(desc="Boosting %i signals" % n_y if n_y > 1 else "Boosting",
                 total=n_y * 10)
     # result containers
-    res = np.empty((3, n_y))  # r, rank-r, error
-    h_x = np.empty((n_y, n_x, trf_length))
+    res = np.zeros((3, n_y))  # r, rank-r, error
+    h_x = np.zeros((n_y, n_x, trf_length))
+    has_h = np.zeros(n_y, bool)
     # boosting
     if N_WORKERS:
         # Make sure cross-validations are added in the same order, otherwise
@@ -317,11 +322,8 @@ def boosting(y, x, tstart, tstop, scale_data=True, delta=0.005, mindelta=None,
                     hs = [h for h in (h_seg[i] for i in range(N_SEGS)) if
                           h is not None]
                     if hs:
-                        h = np.mean(hs, 0, out=h_x[y_i])
-                        res[:, y_i] = evaluate_kernel(y_data[y_i], x_data, h, error)
-                    else:
-                        h_x[y_i] = 0
-                        res[:, y_i] = 0.
+                        np.mean(hs, 0, out=h_x[y_i])
+                        has_h[y_i] = True
             else:
                 h_segs[y_i] = {seg_i: h}
     else:
@@ -335,11 +337,14 @@ def boosting(y, x, tstart, tstop, scale_data=True, delta=0.005, mindelta=None,
                 pbar.update()
 
             if hs:
-                h = np.mean(hs, 0, out=h_x[y_i])
-                res[:, y_i] = evaluate_kernel(y_, x_data, h, error)
-            else:
-                h_x[y_i].fill(0)
-                res[:, y_i].fill(0.)
+                np.mean(hs, 0, out=h_x[y_i])
+                has_h[y_i] = True
+
+    # evaluate kernels in blocks of responses (sharing the FFT of x)
+    index = np.flatnonzero(has_h)
+    for i in range(0, len(index), N_EVALUATE):
+        idx = index[i:i + N_EVALUATE]
+        res[:, idx] = evaluate_kernel(y_data[idx], x_data, h_x[idx], error)
 
     pbar.close()
     dt = time.time() - pbar.start_t
@@ -621,26 +626,20 @@ def put_jobs(queue, n_y, n_segs):
         queue.put((JOB_TERMINATE, None))
 
 
-def apply_kernel(x, h, out=None):
-    """Predict ``y`` by applying kernel ``h`` to ``x``
-
-    x.shape is (n_stims, n_samples)
-    h.shape is (n_stims, n_trf_samples)
-    """
-    if out is None:
-        out = np.zeros(x.shape[1])
-    else:
-        out.fill(0)
-
-    for ind in range(len(h)):
-        out += np.convolve(h[ind], x[ind])[:len(out)]
-
-    return out
-
-
 def evaluate_kernel(y, x, h, error):
     """Fit quality statistics
 
+    Parameters
+    ----------
+    y : array (n_times,) | (n_y, n_times)
+        Measured response(s).
+    x : array (n_stims, n_times)
+        Stimulus.
+    h : array (n_stims, n_trf_samples) | (n_y, n_stims, n_trf_samples)
+        Kernel (one for each response if ``y`` is 2-dimensional).
+    error : str
+        Error function to use.
+
     Returns
     -------
     r : float | array
@@ -658,6 +657,13 @@ def evaluate_kernel(y, x, h, error):
     y_pred = y_pred[..., i0:]
 
     error_func = ERROR_FUNC[error]
-    return (np.corrcoef(y, y_pred)[0, 1],
-            spearmanr(y, y_pred)[0],
-            error_func(y - y_pred))
+    if y.ndim == 1:
+        return (np.corrcoef(y, y_pred)[0, 1],
+                spearmanr(y, y_pred)[0],
+                error_func(y - y_pred))
+    res = np.empty((3, len(y)))
+    for i, (y_i, y_pred_i) in enumerate(zip(y, y_pred)):
+        res[:, i] = (np.corrcoef(y_i, y_pred_i)[0, 1],
+                     spearmanr(y_i, y_pred_i)[0],
+                     error_func(y_i - y_pred_i))
+    return res
@@ -9,7 +9,7 @@ import pickle as pickle
 import scipy.io
 from eelbrain import boosting, convolve, datasets
 from eelbrain._trf import _boosting
-from eelbrain._trf._boosting import boost_1seg, evaluate_kernel
+from eelbrain._trf._boosting import apply_kernel, boost_1seg, evaluate_kernel
 from eelbrain._utils.testing import assert_dataobj_equal
 
 
@@ -86,6 +86,9 @@ def test_result():
     y = convolve([ds['h1'], ds['h2']], [ds['x1'], ds['x2']])
     y.name = 'y'
     assert_dataobj_equal(y, ds['y'])
+    y_fft = convolve([ds['h1'], ds['h2']], [ds['x1'], ds['x2']], 'fft')
+    y_fft.name = 'y'
+    assert_dataobj_equal(y_fft, y, decimal=12)
 
     # test prediction with res.h and res.h_scaled
     res = boosting(ds['y'], ds['x1'], 0, 1)
@@ -139,3 +142,24 @@ def test_boosting_func():
     assert_almost_equal(rr, mat['crlt'][1, 0])
     # svdboostV4pred multiplies error by number of predictors
     assert_allclose(test_sse_history, mat['Str_testE'][0] / 3)
+
+
+def test_apply_kernel():
+    "Test apply_kernel() methods"
+    np.random.seed(0)
+    x = np.random.normal(0, 1, (3, 1000))
+    h = np.random.normal(0, 1, (4, 3, 50))
+    y = apply_kernel(x, h, method='direct')
+    eq_(y.shape, (4, 1000))
+    for h_i, y_i in zip(h, y):
+        assert_array_equal(apply_kernel(x, h_i, method='direct'), y_i)
+    assert_allclose(apply_kernel(x, h, method='fft'), y, atol=1e-12)
+    # truncated and extended output
+    for n in (500, 1100):
+        out = np.empty((4, n))
+        y_n = apply_kernel(x, h, out, 'direct')
+        assert_allclose(apply_kernel(x, h, np.empty((4, n)), 'fft'), y_n,
+                        atol=1e-12)
+    assert_array_equal(y_n[:, :1000], y)
+    # empty output
+    eq_(apply_kernel(x, h, np.empty((4, 0)), 'fft').shape, (4, 0))
@@ -1,12 +1,14 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
 from collections import Sequence
 from distutils.version import LooseVersion
-
+from math import ceil, log
 
 import numpy as np
 
 
 full_slice = slice(None)
+# use FFT convolution for kernels of at least this length
+FFT_MIN_TRF_LENGTH = 32
 
 
 def digitize_index(index, values, tol=None):
@@ -116,6 +118,69 @@ def slice_to_arange(s, length):
     return np.arange(start, stop, s.step)
 
 
+def apply_kernel(x, h, out=None, method='auto'):
+    """Predict ``y`` by applying kernel ``h`` to ``x``
+
+    x.shape is (n_stims, n_samples)
+    h.shape is (n_stims, n_trf_samples) or (n_y, n_stims, n_trf_samples)
+    out.shape is (n_samples,) or (n_y, n_samples); ``out`` can have a
+    different number of samples to truncate or extend the prediction
+
+    method : 'auto' | 'direct' | 'fft'
+        Direct convolution or FFT-based overlap-add convolution. The default
+        uses FFT for kernels with at least ``FFT_MIN_TRF_LENGTH`` samples.
+    """
+    n_stims, n_samples = x.shape
+    trf_length = h.shape[-1]
+    if h.shape[-2] != n_stims:
+        raise ValueError("x and h have different number of stimuli")
+    if out is None:
+        out = np.empty(h.shape[:-2] + (n_samples,))
+
+    if method == 'auto':
+        method = 'fft' if trf_length >= FFT_MIN_TRF_LENGTH else 'direct'
+
+    if method == 'direct':
+        out.fill(0)
+        n = min(out.shape[-1], n_samples + trf_length - 1)
+        hs = h[np.newaxis] if h.ndim == 2 else h
+        outs = out[np.newaxis] if out.ndim == 1 else out
+        for h_i, out_i in zip(hs, outs):
+            for ind in range(n_stims):
+                out_i[:n] += np.convolve(h_i[ind], x[ind])[:n]
+    elif method == 'fft':
+        apply_kernel_fft(x, h, out)
+    else:
+        raise ValueError("method=%r" % (method,))
+    return out
+
+
+def apply_kernel_fft(x, h, out):
+    """Overlap-add FFT implementation of :func:`apply_kernel`
+
+    The signal is processed in blocks several times as long as the kernel,
+    so that memory use is bounded independent of the signal length.
+    """
+    n_stims, n_samples = x.shape
+    trf_length = h.shape[-1]
+    n_out = min(out.shape[-1], n_samples + trf_length - 1)
+    n_x = min(n_samples, n_out)  # samples of x that contribute to out
+    out.fill(0)
+    if n_x == 0:
+        return out
+    n_fft = min(2 ** int(ceil(log(max(8 * trf_length, 1024), 2))),
+                2 ** int(ceil(log(n_x + trf_length - 1, 2))))
+    n_block = n_fft - trf_length + 1
+    h_fft = np.fft.rfft(h, n_fft)
+
+    for start in range(0, n_x, n_block):
+        x_fft = np.fft.rfft(x[:, start:min(start + n_block, n_x)], n_fft)
+        y = np.fft.irfft((h_fft * x_fft).sum(-2), n_fft)
+        stop = min(start + n_fft, n_out)
+        out[..., start:stop] += y[..., :stop - start]
+    return out
+
+
 # pre numpy 0.10, digitize requires 1d-array
 if LooseVersion(np.__version__) < LooseVersion('1.10'):
     def digitize(x, bins, right=False):
@@ -106,16 +106,28 @@ class FigureCanvasPanel(FigureCanvasWxAgg):
                 return ax
 
     def redraw(self, axes=(), artists=()):
+        """Redraw parts of the figure on the stored background (blitting)
+
+        Parameters
+        ----------
+        axes : sequence of Axes
+            Axes whose content changed (the stored background is updated to
+            include them).
+        artists : sequence of Artist
+            Animated artists to draw on top (the whole figure is blitted).
+        """
         self.restore_region(self._background)
         for ax in axes:
             ax.draw_artist(ax)
-            extent = ax.get_window_extent()
-            self.blit(extent)
+        if axes:
+            self.store_canvas()
         for artist in artists:
-            # FIXME:  redraw artist instead of whole axes
-            artist.axes.draw_artist(artist.axes)
-            extent = artist.axes.get_window_extent()
-            self.blit(extent)
+            artist.axes.draw_artist(artist)
+        if artists:
+            self.blit(self.figure.bbox)
+        else:
+            for ax in axes:
+                self.blit(ax.get_window_extent())
 
     def store_canvas(self):
         self._background = self.copy_from_bbox(self.figure.bbox)
@@ -758,6 +758,8 @@ class Frame(FileFrame):
         self._topo_ax = None
         self._topo_plot_info_str = None
         self._topo_plot = None
+        self._topo_motion = None  # latest pointer position for the topomap
+        self._topo_motion_pending = False
         self._mean_plot = None
 
         # Finalize
@@ -1019,11 +1021,23 @@ class Frame(FileFrame):
 
         # update topomap
         if self._plot_topo:
-            tseg = self._get_ax_data(ax.ax_idx, event.xdata)
-            self._topo_plot.set_data([tseg])
-            self.canvas.redraw(axes=[self._topo_ax])
-            self._topo_plot_info_str = ("Topomap: %s,  t = %s ms,  marked: %s" %
-                                        (desc, x, ', '.join(self._mark)))
+            # coalesce motion events that arrive while the topomap is drawn
+            self._topo_motion = (ax.ax_idx, event.xdata, desc, x)
+            if not self._topo_motion_pending:
+                self._topo_motion_pending = True
+                wx.CallAfter(self._UpdateTopoFromMotion)
+
+    def _UpdateTopoFromMotion(self):
+        "Draw the topomap for the latest pointer position"
+        if not self:  # frame was closed
+            return
+        self._topo_motion_pending = False
+        ax_idx, t, desc, t_str = self._topo_motion
+        tseg = self._get_ax_data(ax_idx, t)
+        self._topo_plot.set_data([tseg])
+        self.canvas.redraw(axes=[self._topo_ax])
+        self._topo_plot_info_str = ("Topomap: %s,  t = %s ms,  marked: %s" %
+                                    (desc, t_str, ', '.join(self._mark)))
 
     def OnRejectRange(self, event):
         dlg = RejectRangeDialog(self)
@@ -1339,6 +1353,7 @@ class Frame(FileFrame):
         for key in self._vlims:
             self._vlims[key] = vlim
         self.canvas.draw()
+        self.canvas.store_canvas()
 
     def _page_change(self, page):
         "Perform operations common to page change events"
@@ -1381,6 +1396,7 @@ class Frame(FileFrame):
             self._mean_plot.set_data(self._get_page_mean_seg())
 
         self.canvas.draw()
+        self.canvas.store_canvas()
 
     def ShowPage(self, page=None):
         "Dislay a specific page (start counting with 0)"
@@ -44,13 +44,15 @@ The module also provides functions that work with fmtxt objects:
   the clipboard
 - :func:`save_pdf` for saving a pdf
 - :func:`copy_pdf` for copying a pdf to the clipboard
-- :func:`save_html` for saving an HTML file
+- :func:`save_html` for saving an HTML file (optionally streaming the document
+  to the file instead of assembling it in memory)
 
 """
 
 
 
 import datetime
+import hashlib
 from html.parser import HTMLParser
 from importlib import import_module
 
@@ -185,7 +187,7 @@ def rtf_document(fmtext):
     return "{\\rtf1\\ansi\\deff0\n\n%s\n}" % fmtext.get_rtf()
 
 
-def save_html(fmtxt, path=None, embed_images=True, meta=None):
+def save_html(fmtxt, path=None, embed_images=True, meta=None, stream=False):
     """Save an FMText object in HTML format
 
     Parameters
@@ -200,6 +202,12 @@ def save_html(fmtxt, path=None, embed_images=True, meta=None):
         folder containing image files is created.
     meta : dict
         Meta-information for document head.
+    stream : bool
+        Write the document to the file while traversing it, instead of
+        assembling the whole document in memory first (default False). With
+        ``embed_images=False``, image files are named by a hash of their
+        content (identical images are stored only once) and the browser
+        loads them lazily.
     """
     if path is None:
         msg = "Save as HTML"
@@ -225,6 +233,11 @@ def save_html(fmtxt, path=None, embed_images=True, meta=None):
         os.mkdir(resource_dir)
         resource_dir = os.path.relpath(resource_dir, root)
 
+    if stream:
+        with open(file_path, 'w', encoding='utf-8') as fid:
+            write_html_doc(fmtxt, fid, root, resource_dir, meta=meta)
+        return
+
     buf = make_html_doc(fmtxt, root, resource_dir, meta=meta)
     buf_enc = buf.encode('utf-8')
     with open(file_path, 'wb') as fid:
@@ -350,6 +363,49 @@ def make_html_doc(body, root, resource_dir=None, title=None, meta=None):
     html : str
         HTML document.
     """
+    env = {'root': root, 'resource_dir': resource_dir}
+    txt_body = html(body, env)
+    return _html_doc_template.format(body=txt_body,
+                                     **_html_doc_head(body, title, meta))
+
+
+def write_html_doc(body, file, root, resource_dir=None, title=None, meta=None):
+    """Write an HTML document to a file while traversing the document
+
+    Parameters
+    ----------
+    body : fmtxt-object
+        FMTXT object which should be formatted into an HTML document.
+    file : file
+        Text file to which to write the document.
+    root : str
+        Path to the directory in which the HTML file is going to be located.
+    resource_dir : None | str
+        Path to the directory containing resources like images, relative to
+        root. If None, images are embedded. Otherwise, images are saved under
+        names derived from their content, so that identical images are only
+        stored once, and are loaded lazily.
+    title : None | FMText
+        Document title. The default is to try to infer the title from the body
+        or use "Untitled".
+    meta : dict
+        Meta-information for document head.
+
+    Notes
+    -----
+    In contrast to :func:`make_html_doc`, only one element at a time is
+    converted to HTML, so that the memory requirement does not scale with the
+    size of the document.
+    """
+    env = {'root': root, 'resource_dir': resource_dir, 'hash_images': True}
+    head, tail = _html_doc_template.split('{body}')
+    file.write(head.format(**_html_doc_head(body, title, meta)))
+    _write_html(body, file, env)
+    file.write(tail)
+
+
+def _html_doc_head(body, title, meta):
+    "Format arguments for the head of _html_doc_template"
     if title is None:
         if hasattr(body, '_site_title') and body._site_title is not None:
             title = html(body._site_title)
@@ -364,11 +420,15 @@ def make_html_doc(body, root, resource_dir=None, title=None, meta=None):
         meta = ''
 
     style = '\n'.join(('', '<style>', STYLE, '</style>'))
+    return {'meta': meta, 'title': title, 'style': style}
 
-    env = {'root': root, 'resource_dir': resource_dir}
-    txt_body = html(body, env)
-    return _html_doc_template.format(meta=meta, title=title, style=style,
-                                     body=txt_body)
+
+def _write_html(text, file, env):
+    "Write the HTML for any object to file (see :func:`html`)"
+    if hasattr(text, '_write_html'):
+        text._write_html(file, env)
+    else:
+        file.write(html(text, env))
 
 
 def tex(text, env={}):
@@ -556,6 +616,10 @@ class FMTextElement(object):
         "HTML representation of everything inside the tag"
         return escape_html(self._get_core(env))
 
+    def _write_html(self, file, env):
+        "Write the HTML representation to a file"
+        file.write(self.get_html(env))
+
     def get_rtf(self, env={}):
         if self.tag in _RTF_SUBS:
             return _RTF_SUBS[self.tag] % self._get_rtf_core(env)
@@ -589,7 +653,8 @@ class FMTextElement(object):
     def _get_tex_core(self, env):
         return self._get_core(env)
 
-    def save_html(self, path=None, embed_images=True, meta=None):
+    def save_html(self, path=None, embed_images=True, meta=None,
+                  stream=False):
         """Save in HTML format
 
         Parameters
@@ -602,8 +667,11 @@ class FMTextElement(object):
             folder containing image files is created.
         meta : dict
             Meta-information for document head.
+        stream : bool
+            Write the document to the file while traversing it instead of
+            assembling it in memory (see :func:`save_html`).
         """
-        save_html(self, path, embed_images, meta)
+        save_html(self, path, embed_images, meta, stream)
 
     def save_pdf(self, path=None):
         """Save in PDF format
@@ -696,6 +764,13 @@ class FMText(FMTextElement):
     def _get_html_core(self, env):
         return ''.join(i.get_html(env) for i in self.content)
 
+    def _write_html(self, file, env):
+        if self.tag and self.tag in _HTML_TAGS:
+            file.write(self.get_html(env))
+        else:
+            for item in self.content:
+                _write_html(item, file, env)
+
     def _get_rtf_core(self, env):
         return ''.join(i.get_rtf(env) for i in self.content)
 
@@ -1538,6 +1613,18 @@ class Image(FMTextElement, StringIO):
             # http://stackoverflow.com/a/7389616/166700
             data = buf.encode('base64').replace('\n', '')
             src = 'data:image/{};base64,{}'.format(self.format, data)
+        elif env.get('hash_images'):
+            buf = self.getvalue()
+            if not isinstance(buf, bytes):
+                buf = buf.encode('utf-8')
+            filename = os.extsep.join((hashlib.sha1(buf).hexdigest(),
+                                       self.format))
+            abspath = os.path.join(env['root'], resource_dir, filename)
+            if not os.path.exists(abspath):
+                with open(abspath, 'wb') as fid:
+                    fid.write(buf)
+            src = os.path.relpath(abspath, env['root'])
+            return '  <img src="%s" alt="%s" loading="lazy">' % (src, html(self._alt))
         else:
             dirpath = os.path.join(env['root'], resource_dir)
             abspath = os.path.join(dirpath, self._filename)
@@ -1593,6 +1680,18 @@ class Figure(FMText):
             body = '\n'.join((body, caption))
         return _html_element('figure', body, env, self.options)
 
+    def _write_html(self, file, env):
+        if self.options:
+            opt = ' '.join('%s="%s"' % item for item in self.options.items())
+            file.write('<figure %s>' % opt)
+        else:
+            file.write('<figure>')
+        FMText._write_html(self, file, env)
+        if self._caption:
+            file.write('\n')
+            file.write(_html_element('figcaption', self._caption, env))
+        file.write('</figure>')
+
     def get_str(self, env={}):
         body = FMText.get_str(self, env)
         caption = str(self._caption)
@@ -1723,6 +1822,12 @@ class Section(FMText):
         body = FMText.get_html(self, env)
         return '\n\n'.join(('', heading, body))
 
+    def _write_html(self, file, env):
+        env = env.copy()
+        heading = self._get_html_section_heading(env)
+        file.write('\n\n'.join(('', heading, '')))
+        FMText._write_html(self, file, env)
+
     def _get_html_section_heading(self, env):
         heading = self._heading.get_html(env)
 
@@ -1804,15 +1909,36 @@ class Report(Section):
         return out
 
     def get_html(self, env={}):
-        # setup TOC in env
+        env = self._html_env(env)
+        # format document body (& collect document info)
+        body = FMText.get_html(self, env)
+        content = self._get_html_head(env)
+        content.append(body)
+        return '\n<br>\n'.join(content)
+
+    def _write_html(self, file, env):
+        env = self._html_env(env)
+        # the TOC precedes the body but is only known after formatting the
+        # body, so the body is buffered in a temporary file
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as body:
+            FMText._write_html(self, body, env)
+            content = self._get_html_head(env)
+            content.append('')
+            file.write('\n<br>\n'.join(content))
+            body.seek(0)
+            shutil.copyfileobj(body, file)
+
+    @staticmethod
+    def _html_env(env):
+        "Setup TOC in env"
         env = env.copy()
         env['toc'] = []
         env['toc_ids'] = [-1]
         env['level'] = 2
+        return env
 
-        # format document body (& collect document info)
-        body = FMText.get_html(self, env)
-
+    def _get_html_head(self, env):
+        "HTML for the elements preceding the body (after formatting the body)"
         # format TOC
         toc = ['<ul>']
         level = 2
@@ -1837,9 +1963,7 @@ class Report(Section):
             date = html(self._date, env)
             content.append(date)
         content.append(toc)
-        content.append(body)
-        txt = '\n<br>\n'.join(content)
-        return txt
+        return content
 
     def get_str(self, env={}):
         content = []
@@ -1888,7 +2012,7 @@ class Report(Section):
         with open(path, 'wb') as fid:
             pickle.dump(self, fid, pickle.HIGHEST_PROTOCOL)
 
-    def save_html(self, path, embed_images=True, meta=None):
+    def save_html(self, path, embed_images=True, meta=None, stream=False):
         """Save HTML file of the report
 
         Parameters
@@ -1902,11 +2026,14 @@ class Report(Section):
             folder containing image files is created.
         meta : dict
             Meta-information for document head.
+        stream : bool
+            Write the document to the file while traversing it instead of
+            assembling it in memory (see :func:`save_html`).
         """
         if path.endswith('.html'):
             path = path[:-5]
 
-        save_html(self, path, embed_images, meta)
+        save_html(self, path, embed_images, meta, stream)
 
     def sign(self, packages=('eelbrain',)):
         """Add a signature to the report
@@ -1,6 +1,7 @@
 # Authors: Denis Engemann <denis.engemann@gmail.com>
 #
 # License: BSD (3-clause)
+from collections import defaultdict
 import logging
 
 import numpy as np
@@ -177,7 +178,24 @@ def _make_interpolator(inst, bad_channels):
     return goods_idx, bads_idx, interpolation
 
 
-def _interpolate_bads_eeg(epochs, bad_channels_by_epoch):
+def _group_epochs(bad_channels_by_epoch):
+    "Group epochs by bad channels ({sorted_bad_channels: epoch_index})"
+    groups = defaultdict(list)
+    for i, bad_channels in enumerate(bad_channels_by_epoch):
+        if bad_channels:
+            groups[tuple(sorted(bad_channels))].append(i)
+    return {key: np.array(index) for key, index in groups.items()}
+
+
+def _apply_interpolation(data, index, picks_good, picks_bad, interpolation):
+    "Interpolate the same bad channels in several epochs at once"
+    good = data[np.ix_(index, picks_good)]
+    # (n_bad, n_epochs, n_times) -> (n_epochs, n_bad, n_times)
+    bad = np.tensordot(interpolation, good, (1, 1)).swapaxes(0, 1)
+    data[np.ix_(index, picks_bad)] = bad
+
+
+def _interpolate_bads_eeg(epochs, bad_channels_by_epoch, interp_cache=None):
     """Interpolate bad channels per epoch
 
     Parameters
@@ -187,6 +205,8 @@ def _interpolate_bads_eeg(epochs, bad_channels_by_epoch):
     bad_channels_by_epoch : list of list of str
         Bad channel names specified for each epoch. For example, for an Epochs
         instance containing 3 epochs: ``[['F1'], [], ['F3', 'FZ']]``
+    interp_cache : dict
+        Cache for interpolation matrices (optional, will be updated).
     """
     logger = logging.getLogger(__name__)
 
@@ -195,23 +215,25 @@ def _interpolate_bads_eeg(epochs, bad_channels_by_epoch):
                          "bad_channels_by_epoch (%i)"
                          % (len(epochs), len(bad_channels_by_epoch)))
 
-    interp_cache = {}
-    for i, bad_channels in enumerate(bad_channels_by_epoch):
-        if not bad_channels:
-            continue
+    groups = _group_epochs(bad_channels_by_epoch)
+    if not groups:
+        return
 
-        # find interpolation matrix
-        key = tuple(sorted(bad_channels))
-        if key in interp_cache:
-            goods_idx, bads_idx, interpolation = interp_cache[key]
-        else:
-            goods_idx, bads_idx, interpolation = interp_cache[key] \
-                                = _make_interpolator(epochs, key)
+    # make sure the cache is based on the correct channels
+    if interp_cache is None:
+        interp_cache = {}
+    elif interp_cache.get('ch_names') != epochs.ch_names:
+        interp_cache.clear()
+    interp_cache['ch_names'] = epochs.ch_names
 
-        # apply interpolation
-        logger.info('Interpolating %i sensors on epoch %i', bads_idx.sum(), i)
-        epochs._data[i, bads_idx, :] = np.dot(interpolation,
-                                              epochs._data[i, goods_idx, :])
+    for key, index in groups.items():
+        if key not in interp_cache:
+            interp_cache[key] = _make_interpolator(epochs, key)
+        goods_idx, bads_idx, interpolation = interp_cache[key]
+        logger.info('Interpolating %i sensors on %i epochs', bads_idx.sum(),
+                    len(index))
+        _apply_interpolation(epochs._data, index, goods_idx, bads_idx,
+                             interpolation)
 
 
 def _interpolate_bads_meg(epochs, bad_channels_by_epoch, interp_cache):
@@ -247,12 +269,8 @@ def _interpolate_bads_meg(epochs, bad_channels_by_epoch, interp_cache):
                              bad_channels_by_epoch]
 
     # find needed interpolators
-    sorted_bad_chs_by_epoch = [tuple(sorted(bad_channels)) for bad_channels in
-                               bad_channels_by_epoch]
-    needed = set(sorted_bad_chs_by_epoch)
-    needed.discard(())
-    n_keys = len(needed)
-    if not n_keys:
+    groups = _group_epochs(bad_channels_by_epoch)
+    if not groups:
         return
     bads = tuple(sorted(epochs.info['bads']))
 
@@ -262,17 +280,16 @@ def _interpolate_bads_meg(epochs, bad_channels_by_epoch, interp_cache):
         interp_cache['ch_names'] = epochs.ch_names
 
     # create interpolators
-    make_interpolators(interp_cache, needed, bads, epochs)
+    make_interpolators(interp_cache, groups, bads, epochs)
     t1 = time.time()
 
     logger.debug("interpolate epochs")
-    for i, key in enumerate(sorted_bad_chs_by_epoch):
-        if not key:
-            continue
-        # apply interpolation
+    for key, index in groups.items():
         picks_good, picks_bad, interpolation = interp_cache[bads, key]
-        logger.info('Interpolating sensors %s on epoch %s', picks_bad, i)
-        epochs._data[i, picks_bad, :] = interpolation.dot(epochs._data[i, picks_good, :])
+        logger.info('Interpolating sensors %s on %i epochs', picks_bad,
+                    len(index))
+        _apply_interpolation(epochs._data, index, picks_good, picks_bad,
+                             interpolation)
     t2 = time.time()
 
     logger.debug("Interpolation took %s/%s seconds" % (t1 - t0, t2 - t1))
@@ -0,0 +1,84 @@
+# Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
+"""Apply inverse operators to data arrays"""
+import numpy as np
+
+from mne.io.constants import FIFF
+from mne.minimum_norm import prepare_inverse_operator
+from mne.minimum_norm.inverse import (
+    _assemble_kernel, _pick_channels_inverse_operator)
+
+
+class InverseKernel(object):
+    """Inverse operator prepared for application to arrays of epochs
+
+    Equivalent to :func:`mne.minimum_norm.apply_inverse_epochs` (with
+    ``nave=1``), but the kernel is applied to several epochs with a single
+    matrix product and without creating :class:`mne.SourceEstimate` objects.
+
+    Parameters
+    ----------
+    inv : InverseOperator
+        The inverse operator.
+    ch_names : list of str
+        Channel names of the data to which the inverse will be applied.
+    lambda2 : scalar
+        Regularization parameter.
+    method : 'MNE' | 'dSPM' | 'sLORETA'
+        Inverse method.
+    pick_normal : bool
+        Only keep the source component normal to the cortex.
+
+    Attributes
+    ----------
+    vertices : list of array of int
+        Source space vertices of the output.
+    n_sources : int
+        Number of sources in the output.
+    """
+    def __init__(self, inv, ch_names, lambda2, method, pick_normal=False):
+        pick_ori = 'normal' if pick_normal else None
+        inv_ = prepare_inverse_operator(inv, 1, lambda2, method)
+        # mne >= 0.15 returns source normals as additional item
+        kernel, noise_norm, vertices = _assemble_kernel(inv_, None, method,
+                                                        pick_ori)[:3]
+        is_free_ori = (inv['source_ori'] == FIFF.FIFFV_MNE_FREE_ORI and
+                       pick_ori is None)
+        if noise_norm is not None:
+            if is_free_ori:
+                noise_norm = noise_norm.reshape((-1, 1, 1))
+            else:
+                kernel = kernel * noise_norm
+                noise_norm = None
+
+        self._sel = _pick_channels_inverse_operator(ch_names, inv_)
+        self._kernel = kernel
+        self._noise_norm = noise_norm
+        self._is_free_ori = is_free_ori
+        self.vertices = vertices
+        self.n_sources = sum(len(v) for v in vertices)
+
+    def block_size(self, n_times, nbytes=2 ** 27):
+        "Number of epochs per block for intermediate arrays of ``nbytes``"
+        return max(1, nbytes // (8 * len(self._kernel) * n_times))
+
+    def apply(self, data):
+        """Apply the inverse to a block of epochs
+
+        Parameters
+        ----------
+        data : array  (n_epochs, n_channels, n_times)
+            Sensor data.
+
+        Returns
+        -------
+        source_data : array  (n_epochs, n_sources, n_times)
+            Source estimates.
+        """
+        # (n_kernel, n_epochs, n_times)
+        x = np.tensordot(self._kernel, data[:, self._sel], (1, 1))
+        if self._is_free_ori:
+            x = x.reshape((self.n_sources, 3) + x.shape[1:])
+            x = np.sqrt(np.square(x, x).sum(1))
+            if self._noise_norm is not None:
+                x *= self._noise_norm
+        return np.ascontiguousarray(x.swapaxes(0, 1))
@@ -1,8 +1,11 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
+from nose.tools import eq_
+import numpy as np
 from numpy.testing import assert_array_equal, assert_array_almost_equal
 
 from eelbrain import datasets
-from eelbrain.mne_fixes import _interpolate_bads_meg
+from eelbrain.mne_fixes import _interpolate_bads_eeg, _interpolate_bads_meg
+from eelbrain.mne_fixes._interpolation import _make_interpolator
 from eelbrain._utils.testing import requires_mne_sample_data
 
 
@@ -26,3 +29,29 @@ def test_interpolation():
     epochs3.info['bads'] = bads3
     epochs3.interpolate_bads(mode='accurate')
     assert_array_almost_equal(test_epochs._data[3], epochs3._data[3], 25)
+
+
+@requires_mne_sample_data
+def test_interpolation_eeg():
+    "Test EEG channel interpolation by epoch"
+    ds = datasets.get_mne_sample(sub=[0, 1, 2, 3])
+    bads1 = ['EEG 001', 'EEG 012']
+    bads_list = [[], bads1, ['EEG 017'], bads1[::-1]]
+    epochs = ds['epochs']
+    epochs_ref = epochs.copy()
+    epochs_cached = epochs.copy()
+
+    interp_cache = {}
+    _interpolate_bads_eeg(epochs, bads_list, interp_cache)
+    eq_(len(interp_cache), 3)  # 2 interpolators + ch_names
+    for i, bads in enumerate(bads_list):
+        if bads:
+            goods_idx, bads_idx, interpolation = _make_interpolator(
+                epochs_ref, bads)
+            epochs_ref._data[i, bads_idx] = np.dot(
+                interpolation, epochs_ref._data[i, goods_idx])
+    assert_array_almost_equal(epochs._data, epochs_ref._data, 25)
+
+    # cached interpolators
+    _interpolate_bads_eeg(epochs_cached, bads_list, interp_cache)
+    assert_array_equal(epochs_cached._data, epochs._data)
@@ -0,0 +1,23 @@
+# Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
+from mne.minimum_norm import apply_inverse_epochs
+from numpy.testing import assert_allclose
+
+from eelbrain import datasets
+from eelbrain.mne_fixes._inverse import InverseKernel
+from eelbrain._utils.testing import requires_mne_sample_data
+
+
+@requires_mne_sample_data
+def test_inverse_kernel():
+    "Test applying the inverse kernel to blocks of epochs"
+    ds = datasets.get_mne_sample(src='ico', sub=[0, 1, 2, 3])
+    epochs = ds['epochs']
+    inv = ds.info['inv']
+    lambda2 = 1. / 9
+    for method, pick_normal in (('dSPM', False), ('MNE', True)):
+        kernel = InverseKernel(inv, epochs.ch_names, lambda2, method,
+                               pick_normal)
+        x = kernel.apply(epochs.get_data())
+        stcs = apply_inverse_epochs(epochs, inv, lambda2, method,
+                                    pick_ori='normal' if pick_normal else None)
+        assert_allclose(x, [stc.data for stc in stcs], 1e-10)
@@ -61,9 +61,12 @@ functions executed are:
 import __main__
 
 from collections import Iterable, Iterator
+from io import BytesIO
 from itertools import chain
 from logging import getLogger
 import math
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
 import os
 import shutil
 import subprocess
@@ -74,7 +77,7 @@ import matplotlib as mpl
 from matplotlib.figure import SubplotParams
 from matplotlib.ticker import FormatStrFormatter, FuncFormatter, ScalarFormatter
 import numpy as np
-import PIL
+import PIL.Image
 
 from .._utils import deprecated
 from .._utils.subp import command_exists
@@ -838,17 +841,20 @@ class mpl_figure:
         if mpl.get_backend() == 'WXAgg' and do_autorun():
             self._plt.show()
 
-    def redraw(self, axes=[], artists=[]):
+    def redraw(self, axes=(), artists=()):
         "Adapted duplicate of mpl_canvas.FigureCanvasPanel"
         self.canvas.restore_region(self._background)
         for ax in axes:
             ax.draw_artist(ax)
-            extent = ax.get_window_extent()
-            self.canvas.blit(extent)
+        if axes:
+            self.store_canvas()
         for artist in artists:
-            artist.axes.draw_artist(artist.axes)
-            extent = artist.axes.get_window_extent()
-            self.canvas.blit(extent)
+            artist.axes.draw_artist(artist)
+        if artists:
+            self.canvas.blit(self.figure.bbox)
+        else:
+            for ax in axes:
+                self.canvas.blit(ax.get_window_extent())
 
     def store_canvas(self):
         self._background = self.canvas.copy_from_bbox(self.figure.bbox)
@@ -1991,6 +1997,142 @@ class TopoMapKey(object):
                     sensorlabels='name')
 
 
+# level-of-detail drawing for long time series
+LOD_MIN_SAMPLES = 20000  # only decimate lines with at least this many samples
+LOD_FACTOR = 4  # decimation factor between pyramid levels
+
+
+class EnvelopePyramid(object):
+    """Multi-resolution min/max envelope of line data
+
+    Parameters
+    ----------
+    x : array (n_samples,)
+        Monotonically increasing x-axis values.
+    y : array (n_samples, n_lines)
+        Data for each line.
+
+    Notes
+    -----
+    Level ``k`` of the pyramid contains the minimum and maximum of blocks of
+    ``LOD_FACTOR ** k`` samples. Each level is computed from the previous
+    one, so building the pyramid is O(n_samples).
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.levels = []  # [(block, ymin, ymax), ...]
+        block = 1
+        ymin = ymax = y
+        while len(ymin) > LOD_FACTOR:
+            index = np.arange(0, len(ymin), LOD_FACTOR)
+            ymin = np.minimum.reduceat(ymin, index)
+            ymax = np.maximum.reduceat(ymax, index)
+            block *= LOD_FACTOR
+            self.levels.append((block, ymin, ymax))
+
+    def get(self, xmin, xmax, n_pixels):
+        """Line data for a given view
+
+        Parameters
+        ----------
+        xmin, xmax : scalar
+            Visible range of the x-axis.
+        n_pixels : int
+            Width of the view in pixels.
+
+        Returns
+        -------
+        x : array (n_vertices,)
+            X-axis values.
+        y : array (n_vertices, n_lines)
+            Data if the visible range contains few enough samples, otherwise
+            the envelope at the coarsest level that still has at least one
+            block per pixel (alternating block minima and maxima).
+        """
+        x = self.x
+        i0 = max(np.searchsorted(x, xmin, 'right') - 1, 0)
+        i1 = min(np.searchsorted(x, xmax, 'left') + 1, len(x))
+        n = i1 - i0
+        block = None
+        for block_, ymin_, ymax_ in self.levels:
+            if n // block_ < n_pixels:
+                break
+            block, ymin, ymax = block_, ymin_, ymax_
+        if block is None:
+            return x[i0:i1], self.y[i0:i1]
+
+        b0 = i0 // block
+        b1 = -(-i1 // block)
+        out_x = np.repeat(x[b0 * block:b1 * block:block], 2)
+        out_y = np.empty((2 * (b1 - b0),) + ymin.shape[1:], ymin.dtype)
+        out_y[::2] = ymin[b0:b1]
+        out_y[1::2] = ymax[b0:b1]
+        return out_x, out_y
+
+
+class LODLines(object):
+    """Keep lines decimated to the resolution of the axes
+
+    Parameters
+    ----------
+    ax : Axes
+        Axes containing the lines.
+    lines : list of Line2D
+        Lines (one for each column in ``pyramid.y``).
+    pyramid : EnvelopePyramid
+        Line data.
+
+    Notes
+    -----
+    Line data is recomputed whenever the x-axis limits change (e.g., through
+    :class:`XAxisMixin` navigation) or the width of the axes changes in
+    pixels (when the figure is resized).
+    """
+    def __init__(self, ax, lines, pyramid):
+        self.ax = ax
+        self.lines = lines
+        self.pyramid = pyramid
+        self._n_pixels = lod_pixels(ax)
+        self._cid = ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self._canvas = ax.figure.canvas
+        self._resize_cid = self._canvas.mpl_connect('resize_event',
+                                                    self._on_resize)
+
+    @staticmethod
+    def initial_data(ax, x, y):
+        """Pyramid and data for the full x-axis range, for creating lines"""
+        pyramid = EnvelopePyramid(x, y)
+        return pyramid, pyramid.get(x[0], x[-1], lod_pixels(ax))
+
+    def _on_xlim_changed(self, ax):
+        self.update()
+
+    def _on_resize(self, event):
+        if lod_pixels(self.ax) != self._n_pixels:
+            self.update()
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid)
+        self._canvas.mpl_disconnect(self._resize_cid)
+
+    def set_ydata(self, y):
+        self.pyramid = EnvelopePyramid(self.pyramid.x, y)
+        self.update()
+
+    def update(self):
+        xmin, xmax = self.ax.get_xlim()
+        self._n_pixels = lod_pixels(self.ax)
+        x, y = self.pyramid.get(xmin, xmax, self._n_pixels)
+        for line, y_i in zip(self.lines, y.T):
+            line.set_data(x, y_i)
+
+
+def lod_pixels(ax):
+    "Width of the axes in pixels"
+    return max(int(ax.bbox.width), 1)
+
+
 class XAxisMixin(object):
     """Manage x-axis
 
@@ -2227,6 +2369,106 @@ class Figure(EelFigure):
         self._show()
 
 
+def _render_worker_init():
+    "Configure a worker process for headless rendering"
+    from matplotlib import pyplot
+
+    pyplot.switch_backend('Agg')
+    backend['eelbrain'] = False
+    backend['show'] = False
+
+
+def _render(job):
+    return job.render()
+
+
+class RenderJob(object):
+    """Figure specification that can be rendered in a separate process
+
+    Parameters
+    ----------
+    plot : str | callable
+        Name of the plot in :mod:`eelbrain.plot` (e.g., ``'Topomap'``), or a
+        module-level function that returns an :class:`EelFigure`.
+    args : tuple
+        Positional arguments for ``plot``.
+    kwargs : dict
+        Keyword arguments for ``plot`` (``show=False`` is added).
+    calls : sequence of tuple
+        Modifications applied to the figure before it is rendered, each
+        specified as ``(call, args, kwargs)``. ``call`` can be the name of a
+        figure method, or a module-level function that is called as
+        ``call(figure, *args, **kwargs)``.
+    name : str
+        Name for the image (see :meth:`EelFigure.image`).
+    format : str
+        Image format (default is the format set with :func:`configure`).
+
+    Notes
+    -----
+    All arguments need to be pickleable.
+    """
+    def __init__(self, plot, args=(), kwargs=None, calls=(), name=None,
+                 format=None):
+        self.plot = plot
+        self.args = args
+        self.kwargs = {} if kwargs is None else kwargs
+        self.calls = calls
+        self.name = name
+        self.format = backend['format'] if format is None else format
+
+    def render(self):
+        "Create the figure and return the image file content (bytes)"
+        if isinstance(self.plot, str):
+            from .. import plot
+            func = getattr(plot, self.plot)
+        else:
+            func = self.plot
+        p = func(*self.args, show=False, **self.kwargs)
+        try:
+            for call, args, kwargs in self.calls:
+                if isinstance(call, str):
+                    getattr(p, call)(*args, **kwargs)
+                else:
+                    call(p, *args, **kwargs)
+            buf = BytesIO()
+            p.figure.savefig(buf, format=self.format)
+        finally:
+            p.close()
+        return buf.getvalue()
+
+
+def render_jobs(jobs, n_workers=None):
+    """Render figures in parallel worker processes
+
+    Parameters
+    ----------
+    jobs : sequence of RenderJob
+        Figures to render.
+    n_workers : int
+        Number of worker processes (default is the number of CPUs). With
+        ``n_workers <= 1``, figures are rendered in the current process.
+
+    Returns
+    -------
+    images : list of bytes
+        Image file content for each job.
+    """
+    jobs = list(jobs)
+    if n_workers is None:
+        n_workers = cpu_count()
+    n_workers = min(n_workers, len(jobs))
+    if n_workers <= 1:
+        return [job.render() for job in jobs]
+
+    pool = Pool(n_workers, _render_worker_init)
+    try:
+        return pool.map(_render, jobs, 1)
+    finally:
+        pool.close()
+        pool.join()
+
+
 class ImageTiler(object):
     """
     Create tiled images and animations from individual image files.
@@ -2293,6 +2535,59 @@ class ImageTiler(object):
         fname = self._frame_fmt % (t,)
         return os.path.join(dirname, fname)
 
+    def _read_tiles(self, t):
+        "Nested list of tile arrays for time point ``t`` (None if missing)"
+        tiles = []
+        for r in range(self.nrow):
+            row = []
+            for c in range(self.ncol):
+                fname = self.get_tile_fname(c, r, t)
+                if os.path.exists(fname):
+                    row.append(rgb_array(PIL.Image.open(fname)))
+                else:
+                    row.append(None)
+            tiles.append(row)
+        return tiles
+
+    def compose_frame(self, tiles):
+        """Compose a frame from tiles in memory
+
+        Parameters
+        ----------
+        tiles : list of list of (array | PIL.Image | None)
+            Tiles for each row and column (``None`` to leave a tile empty).
+
+        Returns
+        -------
+        frame : array (height, width, 3) of uint8
+            RGB frame. Each column is as wide as its widest tile, each row as
+            high as its highest tile.
+        """
+        if len(tiles) != self.nrow:
+            raise ValueError("tiles: %i rows, need %i" % (len(tiles), self.nrow))
+        tiles = [[None if im is None else rgb_array(im) for im in row]
+                 for row in tiles]
+        colw = [0] * self.ncol
+        rowh = [0] * self.nrow
+        for r, row in enumerate(tiles):
+            if len(row) != self.ncol:
+                raise ValueError("tiles: %i columns in row %i, need %i" %
+                                 (len(row), r, self.ncol))
+            for c, im in enumerate(row):
+                if im is not None:
+                    colw[c] = max(colw[c], im.shape[1])
+                    rowh[r] = max(rowh[r], im.shape[0])
+
+        cpos = np.cumsum([0] + colw)
+        rpos = np.cumsum([0] + rowh)
+        out = np.zeros((rpos[-1], cpos[-1], 3), np.uint8)
+        for r, row in enumerate(tiles):
+            for c, im in enumerate(row):
+                if im is not None:
+                    h, w = im.shape[:2]
+                    out[rpos[r]:rpos[r] + h, cpos[c]:cpos[c] + w] = im
+        return out
+
     def make_frame(self, t=0, redo=False):
         """Produce a single frame."""
         dest = self.get_frame_fname(t)
@@ -2303,40 +2598,65 @@ class ImageTiler(object):
             else:
                 return
 
-        # collect tiles
-        images = []
-        colw = [0] * self.ncol
-        rowh = [0] * self.nrow
-        for r in range(self.nrow):
-            row = []
-            for c in range(self.ncol):
-                fname = self.get_tile_fname(c, r, t)
-                if os.path.exists(fname):
-                    im = PIL.Image.open(fname)
-                    colw[c] = max(colw[c], im.size[0])
-                    rowh[r] = max(rowh[r], im.size[1])
-                else:
-                    im = None
-                row.append(im)
-            images.append(row)
+        frame = self.compose_frame(self._read_tiles(t))
+        PIL.Image.fromarray(frame).save(dest)
 
-        cpos = np.cumsum([0] + colw)
-        rpos = np.cumsum([0] + rowh)
-        out = PIL.Image.new('RGB', (cpos[-1], rpos[-1]))
-        for r, row in enumerate(images):
-            for c, im in enumerate(row):
-                if im is None:
-                    pass
-                else:
-                    out.paste(im, (cpos[c], rpos[r]))
-        out.save(dest)
+    def make_frames(self, n_workers=None):
+        """Produce all frames
+
+        Parameters
+        ----------
+        n_workers : int
+            Number of threads for composing frames (default is the number of
+            CPUs).
+        """
+        if n_workers is None:
+            n_workers = cpu_count()
+        if n_workers <= 1 or self.nt == 1:
+            for t in range(self.nt):
+                self.make_frame(t=t)
+            return
+
+        pool = ThreadPool(min(n_workers, self.nt))
+        try:
+            pool.map(self.make_frame, range(self.nt))
+        finally:
+            pool.close()
+            pool.join()
+
+    def render_tiles(self, jobs, n_workers=None):
+        """Render tiles from figure specifications in parallel
 
-    def make_frames(self):
-        for t in range(self.nt):
-            self.make_frame(t=t)
+        Parameters
+        ----------
+        jobs : dict {(col, row, t): RenderJob}
+            Figures to render for each tile.
+        n_workers : int
+            Number of worker processes (default is the number of CPUs).
+        """
+        keys = list(jobs)
+        images = render_jobs([jobs[key] for key in keys], n_workers)
+        for key, data in zip(keys, images):
+            with open(self.get_tile_fname(*key), 'wb') as fid:
+                fid.write(data)
 
-    def make_movie(self, dest, framerate=10, codec='mpeg4'):
-        """Make all frames and export a movie"""
+    def make_movie(self, dest, framerate=10, codec='mpeg4', tiles=None):
+        """Make all frames and export a movie
+
+        Parameters
+        ----------
+        dest : str
+            Movie file name (``*.mov`` or ``*.avi``).
+        framerate : scalar
+            Frames per second.
+        codec : str
+            Video codec for ffmpeg.
+        tiles : iterator
+            Compose frames in memory instead of reading tile files: for each
+            time point, ``tiles`` should yield a nested list of tiles (see
+            :meth:`.compose_frame`). Frames are encoded as they are produced,
+            so ``tiles`` can be a generator that renders tiles on demand.
+        """
         dest = os.path.expanduser(dest)
         dest = os.path.abspath(dest)
         root, ext = os.path.splitext(dest)
@@ -2347,32 +2667,17 @@ class ImageTiler(object):
             else:
                 dest = dest + '.mov'
 
-        if not command_exists('ffmpeg'):
-            err = ("Need ffmpeg for saving movies. Download from "
-                   "http://ffmpeg.org/download.html")
-            raise RuntimeError(err)
-        elif os.path.exists(dest):
+        if os.path.exists(dest):
             os.remove(dest)
         elif not os.path.exists(dirname):
             os.mkdir(dirname)
 
-        self.make_frames()
-
-        # make the movie
-        frame_name = self._frame_fmt
-        cmd = ['ffmpeg',  # ?!? order of options matters
-               '-f', 'image2',  # force format
-               '-r', str(framerate),  # framerate
-               '-i', frame_name,
-               '-c', codec,
-               '-sameq', dest,
-               '-pass', '2'  #
-               ]
-        sp = subprocess.Popen(cmd, cwd=self.dir, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE)
-        stdout, stderr = sp.communicate()
-        if not os.path.exists(dest):
-            raise RuntimeError("ffmpeg failed:\n" + stderr)
+        if tiles is None:
+            tiles = (self._read_tiles(t) for t in range(self.nt))
+
+        with MovieWriter(dest, framerate, codec) as writer:
+            for frame_tiles in tiles:
+                writer.write(self.compose_frame(frame_tiles))
 
     def save_frame(self, dest, t=0, overwrite=False):
         if not overwrite and os.path.exists(dest):
@@ -2381,3 +2686,120 @@ class ImageTiler(object):
         fname = self.get_frame_fname(t)
         im = PIL.Image.open(fname)
         im.save(dest)
+
+
+def rgb_array(image):
+    """Convert an image to an RGB array
+
+    Parameters
+    ----------
+    image : array | PIL.Image
+        Image; arrays can be uint8 or float in [0, 1], with or without alpha
+        channel (alpha is discarded).
+
+    Returns
+    -------
+    rgb : array (height, width, 3) of uint8
+        RGB image.
+    """
+    if isinstance(image, PIL.Image.Image):
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return np.asarray(image)
+    image = np.asarray(image)
+    if image.ndim != 3 or image.shape[2] not in (3, 4):
+        raise ValueError("image with shape %s; need (height, width, 3 | 4)" %
+                         (image.shape,))
+    image = image[:, :, :3]
+    if image.dtype != np.uint8:
+        image = np.round(np.clip(image, 0, 1) * 255).astype(np.uint8)
+    return image
+
+
+class MovieWriter(object):
+    """Encode a movie by streaming frames to ffmpeg
+
+    Frames are piped to the encoder as raw RGB data as they are written, so
+    only the current frame needs to be in memory.
+
+    Parameters
+    ----------
+    dest : str
+        Movie file name.
+    framerate : scalar
+        Frames per second.
+    codec : str
+        Video codec for ffmpeg.
+
+    Examples
+    --------
+    ::
+
+        with MovieWriter('movie.mov') as writer:
+            for frame in frames:
+                writer.write(frame)
+    """
+    def __init__(self, dest, framerate=10, codec='mpeg4'):
+        if not command_exists('ffmpeg'):
+            raise RuntimeError("Need ffmpeg for saving movies. Download from "
+                               "http://ffmpeg.org/download.html")
+        self.dest = dest
+        self.framerate = framerate
+        self.codec = codec
+        self.shape = None
+        self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _start(self, shape):
+        height, width = shape[:2]
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               # input: raw frames from stdin
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', '%ix%i' % (width, height), '-r', str(self.framerate),
+               '-i', '-',
+               # output (yuv420p requires even dimensions)
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+               '-c:v', self.codec, '-q:v', '2', '-pix_fmt', 'yuv420p',
+               self.dest]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.PIPE)
+        self.shape = shape
+
+    def write(self, frame):
+        """Add a frame to the movie
+
+        Parameters
+        ----------
+        frame : array | PIL.Image
+            Frame (see :func:`rgb_array`); all frames need to have the same
+            size.
+        """
+        frame = rgb_array(frame)
+        if self._process is None:
+            self._start(frame.shape)
+        elif frame.shape != self.shape:
+            raise ValueError("frame with shape %s; movie has %s" %
+                             (frame.shape, self.shape))
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except IOError:
+            self.close()
+            raise
+
+    def close(self):
+        "Finish encoding the movie"
+        if self._process is None:
+            return
+        process = self._process
+        self._process = None
+        process.stdin.close()
+        stderr = process.stderr.read()
+        process.wait()
+        if process.returncode:
+            raise RuntimeError("ffmpeg failed:\n" + stderr.decode(errors='replace'))
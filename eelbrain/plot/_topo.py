@@ -3,15 +3,16 @@
 """Plot topographic maps of sensor space data."""
 
 
-from collections import Sequence
+from collections import OrderedDict, Sequence
 from itertools import repeat
 from math import floor, sqrt
+import time
 from warnings import warn
 
 import matplotlib as mpl
 import numpy as np
-from scipy import interpolate, linalg
-from scipy.spatial import ConvexHull
+from scipy import interpolate, linalg, sparse
+from scipy.spatial import ConvexHull, Delaunay, cKDTree
 
 from .._utils import deprecated
 from .._utils.numpy_utils import digitize
@@ -156,11 +157,16 @@ class TopomapBins(EelFigure):
         cmaps = _base.find_fig_cmaps(epochs)
         vlims = _base.find_fig_vlims(epochs, vmax, vmin, cmaps)
 
+        # interpolate all bins of a layer at once
+        proj, method, res = 'default', 'linear', 100
         for row, layers in enumerate(epochs):
+            maps = [topomap_data(l, proj, method, res) for l in layers]
             for column, t in enumerate(time.x):
                 ax = self._axes[row * n_bins + column]
                 topo_layers = [l.sub(time=t) for l in layers]
-                _ax_topomap(ax, topo_layers, cmaps=cmaps, vlims=vlims)
+                _ax_topomap(ax, topo_layers, cmaps=cmaps, vlims=vlims,
+                            proj=proj, res=res, method=method,
+                            data=[m[column] for m in maps])
 
         self._set_axtitle((str(t) for t in time.x), axes=self._axes[:len(time)])
         self._show()
@@ -306,11 +312,17 @@ class TopoButterfly(TopoMapKey, YLimMixin, XAxisMixin, EelFigure):
         XAxisMixin.__init__(self, epochs, xdim, xlim, self.bfly_axes)
         YLimMixin.__init__(self, self.bfly_plots + self.topo_plots)
         self.canvas.mpl_connect('button_press_event', self._on_click)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self._register_key('.', self._on_nudge_topo_t)
         self._register_key(',', self._on_nudge_topo_t)
         TopoMapKey.__init__(self, self._topo_data)
         self._realtime_topo = True
         self._t_label = None  # time label under lowest topo-map
+        # throttle topomap updates from mouse motion
+        self._topo_timer = None
+        self._topo_pending_t = None
+        self._topo_draw_end = 0.
+        self._topo_draw_time = 0.
         self._frame.store_canvas()
         self._draw_topo(e0.time[0], draw=False)
 
@@ -333,16 +345,24 @@ class TopoButterfly(TopoMapKey, YLimMixin, XAxisMixin, EelFigure):
         if draw:
             self._frame.redraw(axes=self.topo_axes)
 
-    def _rm_t_markers(self):
-        "Remove markers of a specific time point (vlines and t-label)"
-        if self._t_label:
-            self._t_label.remove()
-            self._t_label = None
+    def _animated_artists(self):
+        "Artists that are drawn on top of the stored background"
+        if self._t_label is None:
+            return self.t_markers
+        return self.t_markers + [self._t_label]
 
-        if self.t_markers:
-            for m in self.t_markers:
-                m.remove()
-            del self.t_markers[:]
+    def _on_draw(self, event):
+        "Store the background after a full draw and add the animated artists"
+        self._frame.store_canvas()
+        for artist in self._animated_artists():
+            artist.axes.draw_artist(artist)
+
+    def _rm_t_markers(self):
+        "Hide markers of a specific time point (vlines and t-label)"
+        artists = self._animated_artists()
+        for artist in artists:
+            artist.set_visible(False)
+        self._frame.redraw(artists=artists)
 
     def set_topo_t(self, t):
         "Set the time point of the topo-maps"
@@ -350,17 +370,22 @@ class TopoButterfly(TopoMapKey, YLimMixin, XAxisMixin, EelFigure):
         self._draw_topo(t, draw=False)
 
         # update t-markers
-        self._rm_t_markers()
-        for ax in self.bfly_axes:
-            t_marker = ax.axvline(t, color='k')
-            self.t_markers.append(t_marker)
-
-        # add time label
-        ax = self.topo_axes[-1]
-        self._t_label = ax.text(.5, -0.1, "t = %i ms" % round(t * 1e3),
-                                ha='center', va='top')
-
-        self.canvas.draw()  # otherwise time label does not get redrawn
+        if self.t_markers:
+            for t_marker in self.t_markers:
+                t_marker.set_xdata([t, t])
+        else:
+            for ax in self.bfly_axes:
+                t_marker = ax.axvline(t, color='k', animated=True)
+                self.t_markers.append(t_marker)
+            ax = self.topo_axes[-1]
+            self._t_label = ax.text(.5, -0.1, '', ha='center', va='top',
+                                    animated=True)
+        self._t_label.set_text("t = %i ms" % round(t * 1e3))
+        artists = self._animated_artists()
+        for artist in artists:
+            artist.set_visible(True)
+
+        self._frame.redraw(axes=self.topo_axes, artists=artists)
 
     def _on_click(self, event):
         ax = event.inaxes
@@ -372,7 +397,6 @@ class TopoButterfly(TopoMapKey, YLimMixin, XAxisMixin, EelFigure):
             elif (button == 'r') and (self._realtime_topo == False):
                 self._rm_t_markers()
                 self._realtime_topo = True
-                self.canvas.draw()
 
     def _topo_data(self, event):
         ax = event.inaxes
@@ -406,7 +430,27 @@ class TopoButterfly(TopoMapKey, YLimMixin, XAxisMixin, EelFigure):
         super(self.__class__, self)._on_motion(event)
         ax = event.inaxes
         if ax in self.bfly_axes and self._realtime_topo:
-            self._draw_topo(event.xdata)
+            # draw at most one topomap per topomap draw duration; motion
+            # events in between only update the time point that is drawn next
+            self._topo_pending_t = event.xdata
+            if self._topo_timer is not None:
+                return
+            delay = self._topo_draw_end + self._topo_draw_time - time.time()
+            if delay <= 0:
+                self._draw_pending_topo()
+            else:
+                self._topo_timer = self.canvas.new_timer(int(delay * 1000) + 1)
+                self._topo_timer.single_shot = True
+                self._topo_timer.add_callback(self._draw_pending_topo)
+                self._topo_timer.start()
+
+    def _draw_pending_topo(self):
+        self._topo_timer = None
+        if self._realtime_topo and self._topo_pending_t is not None:
+            t0 = time.time()
+            self._draw_topo(self._topo_pending_t)
+            self._topo_draw_end = time.time()
+            self._topo_draw_time = self._topo_draw_end - t0
 
     def add_contour(self, meas, level, color='k'):
         """Add a contour line
@@ -448,17 +492,19 @@ class _plt_topomap(_plt_im):
         Override the colorspace vmax.
     method : 'nearest' | 'linear' | 'cubic' | 'spline'
         Method for interpolating topo-map between sensors.
+    data : None | array (res, res)
+        Topomap for ``ndvar`` if it has already been interpolated (e.g., as
+        part of a batch from :func:`topomap_data`).
     """
     _aspect = 'equal'
 
     def __init__(self, ax, ndvar, overlay, proj, res, interpolation, vlims,
-                 cmaps, contours, method, clip, clip_distance):
+                 cmaps, contours, method, clip, clip_distance, data=None):
         # store attributes
         self._proj = proj
-        self._visible_data = ndvar.sensor._visible_sensors(proj)
-        self._grid = np.linspace(0, 1, res)
-        self._mgrid = tuple(np.meshgrid(self._grid, self._grid))
+        self._res = res
         self._method = method
+        self._precomputed_data = data
 
         # clip mask
         if method is None and clip:
@@ -489,57 +535,194 @@ class _plt_topomap(_plt_im):
                          (0, 1, 0, 1), interpolation, mask)
 
     def _data_from_ndvar(self, ndvar):
+        if self._precomputed_data is not None:
+            data = self._precomputed_data
+            self._precomputed_data = None
+            return data
+        return topomap_data(ndvar, self._proj, self._method, self._res)
+
+
+def topomap_data(ndvar, proj, method, res):
+    """Interpolate topomaps from sensor data
+
+    Parameters
+    ----------
+    ndvar : NDVar  (sensor,) | (sensor, time)
+        Sensor data.
+    proj : str
+        Sensor projection.
+    method : 'nearest' | 'linear' | 'cubic' | 'spline'
+        Interpolation method.
+    res : int
+        Topomap resolution.
+
+    Returns
+    -------
+    data : array  (res, res) | (n_times, res, res)
+        Topomap, or topomap for each time point (all time points are
+        interpolated with a single matrix product).
+    """
+    if ndvar.ndim == 1:
         v = ndvar.get_data(('sensor',))
-        locs = ndvar.sensor.get_locs_2d(self._proj, frame=SENSORMAP_FRAME)
-        if self._visible_data is not None:
-            v = v[self._visible_data]
-            locs = locs[self._visible_data]
+    else:
+        v = ndvar.get_data(('sensor', 'time'))
+    locs = ndvar.sensor.get_locs_2d(proj, frame=SENSORMAP_FRAME)
+    visible = ndvar.sensor._visible_sensors(proj)
+    if visible is not None:
+        v = v[visible]
+        locs = locs[visible]
+
+    if method == 'spline':
+        if v.ndim == 2:
+            return np.array([topomap_data(ndvar.sub(time=t), proj, method, res)
+                             for t in ndvar.time])
+        grid = np.linspace(0, 1, res)
+        k = int(floor(sqrt(len(locs)))) - 1
+        tck = interpolate.bisplrep(locs[:, 1], locs[:, 0], v, kx=k, ky=k)
+        return interpolate.bisplev(grid, grid, tck)
+    else:
+        return get_topomap_interpolator(locs, method, res)(v)
+
+
+# cache for topomap interpolators
+_INTERPOLATORS = OrderedDict()
+_INTERPOLATORS_CACHE_SIZE = 16
+
+
+def get_topomap_interpolator(locs, method, res):
+    """Interpolator from sensor data to a topomap grid (cached)
 
-        if self._method is None:
-            # interpolate data
-            xi, yi = self._mgrid
+    Parameters
+    ----------
+    locs : array (n_sensors, 2)
+        Sensor locations (projected to 2d).
+    method : None | 'nearest' | 'linear' | 'cubic'
+        Interpolation method (``None`` for spline interpolation with Green's
+        functions).
+    res : int
+        Topomap resolution.
+    """
+    locs = np.ascontiguousarray(locs, np.float64)
+    key = (locs.shape, locs.tobytes(), method, res)
+    if key in _INTERPOLATORS:
+        interpolator = _INTERPOLATORS.pop(key)
+    else:
+        interpolator = TopomapInterpolator(locs, method, res)
+        if len(_INTERPOLATORS) >= _INTERPOLATORS_CACHE_SIZE:
+            _INTERPOLATORS.popitem(False)
+    _INTERPOLATORS[key] = interpolator
+    return interpolator
+
+
+def _green(d):
+    "Green's function for spline interpolation (for distances ``d``)"
+    zero = d == 0
+    d = np.where(zero, 1., d)
+    g = (d * d) * (np.log(d) - 1.)
+    g[zero] = 0.
+    return g
+
+
+class TopomapInterpolator(object):
+    """Interpolate sensor data to a topomap grid
+
+    Except for ``method='cubic'``, interpolation is a linear operation that
+    only depends on the sensor locations, so it is precomputed as a
+    ``(res * res, n_sensors)`` matrix and each map is a single matrix product.
 
+    Parameters
+    ----------
+    locs : array (n_sensors, 2)
+        Sensor locations (projected to 2d).
+    method : None | 'nearest' | 'linear' | 'cubic'
+        Interpolation method (``None`` for spline interpolation with Green's
+        functions).
+    res : int
+        Topomap resolution.
+    """
+    def __init__(self, locs, method, res):
+        self.method = method
+        self.res = res
+        self.n_sensors = len(locs)
+        grid = np.linspace(0, 1, res)
+        xi, yi = np.meshgrid(grid, grid)
+        points = np.column_stack((xi.ravel(), yi.ravel()))
+        self._mgrid = (xi, yi)
+        self._tri = None
+        self._operator = None
+        self._outside = None
+
+        if method is None:
             # code adapted from mne-python topmap _griddata()
             xy = locs[:, 0] + locs[:, 1] * -1j
-            d = np.abs(xy - xy[:, None])
-            diagonal_step = len(locs) + 1
-            d.flat[::diagonal_step] = 1.
-
-            g = (d * d) * (np.log(d) - 1.)
-            g.flat[::diagonal_step] = 0.
-            weights = linalg.solve(g, v.ravel())
-
-            m, n = xi.shape
-            out = np.empty_like(xi)
-
-            g = np.empty(xy.shape)
-            for i in range(m):
-                for j in range(n):
-                    d = np.abs(xi[i, j] + -1j * yi[i, j] - xy)
-                    mask = np.where(d == 0)[0]
-                    if len(mask):
-                        d[mask] = 1.
-                    np.log(d, out=g)
-                    g -= 1.
-                    g *= d * d
-                    if len(mask):
-                        g[mask] = 0.
-                    out[i, j] = g.dot(weights)
-            return out
-        elif self._method == 'spline':
-            k = int(floor(sqrt(len(locs)))) - 1
-            tck = interpolate.bisplrep(locs[:, 1], locs[:, 0], v, kx=k, ky=k)
-            return interpolate.bisplev(self._grid, self._grid, tck)
+            g = _green(np.abs(xy - xy[:, None]))
+            g_grid = _green(np.abs(points[:, 0] + -1j * points[:, 1] -
+                                   xy[:, None]))
+            self._operator = linalg.solve(g, g_grid).T
+        elif method == 'nearest':
+            self._operator = cKDTree(locs).query(points)[1]
+        elif method in ('linear', 'cubic'):
+            self._tri = tri = Delaunay(locs)
+            if method == 'linear':
+                # barycentric coordinates of grid points in the triangulation
+                simplex = tri.find_simplex(points)
+                inside = simplex >= 0
+                simplex = simplex[inside]
+                transform = tri.transform[simplex]
+                b = np.einsum('ijk,ik->ij', transform[:, :2],
+                              points[inside] - transform[:, 2])
+                weights = np.column_stack((b, 1 - b.sum(1)))
+                rows = np.repeat(np.flatnonzero(inside), 3)
+                self._operator = sparse.csr_matrix(
+                    (weights.ravel(), (rows, tri.simplices[simplex].ravel())),
+                    (len(points), self.n_sensors))
+                self._outside = ~inside
         else:
+            raise ValueError("method=%r" % (method,))
+
+    def __call__(self, v):
+        """Interpolate data
+
+        Parameters
+        ----------
+        v : array (n_sensors,) | (n_sensors, n_maps)
+            Sensor data.
+
+        Returns
+        -------
+        maps : array (res, res) | (n_maps, res, res)
+            Interpolated topomap(s).
+        """
+        if self.method == 'cubic':
+            if v.ndim == 2:
+                return np.array([self(v_i) for v_i in v.T])
             isnan = np.isnan(v)
             if np.any(isnan):
-                nanmap = interpolate.griddata(locs, isnan, self._mgrid, self._method)
-                mask = nanmap > 0.5
-                v = np.where(isnan, 0, v)
-                vmap = interpolate.griddata(locs, v, self._mgrid, self._method)
-                np.place(vmap, mask, np.NaN)
+                nanmap = interpolate.CloughTocher2DInterpolator(
+                    self._tri, isnan)(*self._mgrid)
+                vmap = interpolate.CloughTocher2DInterpolator(
+                    self._tri, np.where(isnan, 0, v))(*self._mgrid)
+                np.place(vmap, nanmap > 0.5, np.nan)
                 return vmap
-            return interpolate.griddata(locs, v, self._mgrid, self._method)
+            return interpolate.CloughTocher2DInterpolator(
+                self._tri, v)(*self._mgrid)
+        elif self.method == 'nearest':
+            out = v[self._operator]
+        elif self.method == 'linear':
+            isnan = np.isnan(v)
+            if np.any(isnan):
+                nanmap = self._operator.dot(isnan.astype(np.float64))
+                out = self._operator.dot(np.where(isnan, 0, v))
+                out[nanmap > 0.5] = np.nan
+            else:
+                out = self._operator.dot(v)
+            out[self._outside] = np.nan
+        else:
+            out = self._operator.dot(v)
+
+        if out.ndim == 2:
+            return out.T.reshape((-1, self.res, self.res))
+        return out.reshape((self.res, self.res))
 
 
 class _ax_topomap(_ax_im_array):
@@ -558,7 +741,7 @@ class _ax_topomap(_ax_im_array):
                  proj='default',
                  res=100, interpolation=None, xlabel=None, vlims={}, cmaps={},
                  contours={}, method='linear', head_radius=None, head_pos=0.,
-                 head_linewidth=None):
+                 head_linewidth=None, data=None):
         self.ax = ax
         self.data = layers
         self.proj = proj
@@ -569,9 +752,12 @@ class _ax_topomap(_ax_im_array):
 
         ax.set_axis_off()
         overlay = False
-        for layer in layers:
+        if data is None:
+            data = (None,) * len(layers)
+        for layer, layer_data in zip(layers, data):
             h = _plt_topomap(ax, layer, overlay, proj, res, interpolation,
-                             vlims, cmaps, contours, method, clip, clip_distance)
+                             vlims, cmaps, contours, method, clip,
+                             clip_distance, layer_data)
             self.layers.append(h)
             overlay = True
 
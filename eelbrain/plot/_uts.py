@@ -10,10 +10,12 @@ import matplotlib as mpl
 import numpy as np
 
 from .._data_obj import (
-    ascategorial, asndvar, assub, cellname, Celltable, longname)
+    UTS, ascategorial, asndvar, assub, cellname, Celltable, longname)
 from .._stats import stats
 from . import _base
-from ._base import EelFigure, Layout, LegendMixin, YLimMixin, XAxisMixin
+from ._base import (
+    EelFigure, Layout, LegendMixin, YLimMixin, XAxisMixin, LODLines,
+    LOD_MIN_SAMPLES)
 from ._colors import colors_for_oneway, find_cell_colors
 from .._colorspaces import oneway_colors
 from functools import reduce
@@ -135,7 +137,14 @@ class UTSStat(LegendMixin, YLimMixin, EelFigure):
             if len(all_x) > 0:
                 full_x = reduce(operator.mod, all_x)
                 ct = Celltable(Y, full_x, match)
-                dev_data = stats.variability(ct.Y.x, ct.X, ct.match, error, True)
+                if ct.match is None or ct.all_within:
+                    data = [ct.data[cell].get_data(('case', xdim)) for cell in
+                            ct.cells]
+                    cell_stats = stats.CellStats(data, ct.all_within)
+                    dev_data = cell_stats.error(error, True)
+                else:
+                    dev_data = stats.variability(ct.Y.x, ct.X, ct.match,
+                                                 error, True)
                 error = 'data'
             else:
                 dev_data = None
@@ -442,10 +451,21 @@ class _ax_uts_stat(object):
         self.legend_handles = {}
 
         x = ct.Y.get_dim(xdim)
-        for cell in ct.cells:
-            ndvar = ct.data[cell]
-            y = ndvar.get_data(('case', xdim))
-            plt = _plt_uts_stat(ax, x, y, main, error, dev_data, colors[cell],
+        data = [ct.data[cell].get_data(('case', xdim)) for cell in ct.cells]
+        # statistics for all cells at once
+        cell_stats = stats.CellStats(data)
+        if main is np.mean:
+            mains = cell_stats.mean
+        else:
+            mains = [main] * len(data)
+        if isinstance(error, str) and error not in ('all', 'data'):
+            dev_datas = cell_stats.error(error)
+            error = 'data'
+        else:
+            dev_datas = [dev_data] * len(data)
+
+        for cell, y, y_main, y_dev in zip(ct.cells, data, mains, dev_datas):
+            plt = _plt_uts_stat(ax, x, y, y_main, error, y_dev, colors[cell],
                                 cellname(cell), clip)
             self.stat_plots.append(plt)
             if plt.main is not None:
@@ -614,10 +634,19 @@ class _plt_uts(object):
 
     def __init__(self, ax, ndvar, xdim, color=None, kwargs={}):
         y = ndvar.get_data((xdim,))
-        x = ndvar.get_dim(xdim).x
+        dim = ndvar.get_dim(xdim)
+        x = dim.x
         if color is not None:
             kwargs['color'] = color
-        self.plot_handle = ax.plot(x, y, label=longname(ndvar), **kwargs)[0]
+        if isinstance(dim, UTS) and len(y) >= LOD_MIN_SAMPLES:
+            # long time series: draw min/max envelope at screen resolution
+            pyramid, (x, y) = LODLines.initial_data(ax, x, y[:, None])
+            self.plot_handle = ax.plot(x, y[:, 0], label=longname(ndvar),
+                                       **kwargs)[0]
+            self._lod = LODLines(ax, [self.plot_handle], pyramid)
+        else:
+            self.plot_handle = ax.plot(x, y, label=longname(ndvar), **kwargs)[0]
+            self._lod = None
 
         for y, kwa in _base.find_uts_hlines(ndvar):
             if color is not None:
@@ -719,9 +748,11 @@ class _plt_uts_clusters:
 class _plt_uts_stat(object):
 
     def __init__(self, ax, x, y, main, error, dev_data, color, label, clip):
-        # plot main
+        # plot main (main can be a function or the precomputed statistic)
         if hasattr(main, '__call__'):
-            y_main = main(y, axis=0)
+            main = main(y, axis=0)
+        if isinstance(main, np.ndarray):
+            y_main = main
             lw = mpl.rcParams['lines.linewidth']
             if error == 'all':
                 lw *= 2
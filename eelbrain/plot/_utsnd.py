@@ -8,10 +8,11 @@
 
 import numpy as np
 
+from .._data_obj import UTS
 from .._names import INTERPOLATE_CHANNELS
 from . import _base
 from ._base import EelFigure, Layout, ColorMapMixin, LegendMixin, YLimMixin, \
-    XAxisMixin, TopoMapKey
+    XAxisMixin, TopoMapKey, LODLines, LOD_MIN_SAMPLES
 
 
 class _plt_im(object):
@@ -282,8 +283,16 @@ class _plt_utsnd(object):
 
         self._dims = (linedim, xdim)
         kwargs['label'] = epoch.name
-        self.lines = ax.plot(epoch.get_dim(xdim),
-                             epoch.get_data((xdim, linedim)), *args, **kwargs)
+        dim = epoch.get_dim(xdim)
+        y = epoch.get_data((xdim, linedim))
+        if isinstance(dim, UTS) and len(y) >= LOD_MIN_SAMPLES:
+            # long time series: draw min/max envelope at screen resolution
+            pyramid, (x, y) = LODLines.initial_data(ax, dim.times, y)
+            self.lines = ax.plot(x, y, *args, **kwargs)
+            self._lod = LODLines(ax, self.lines, pyramid)
+        else:
+            self.lines = ax.plot(dim, y, *args, **kwargs)
+            self._lod = None
 
         for y, kwa in _base.find_uts_hlines(epoch):
             ax.axhline(y, **kwa)
@@ -295,6 +304,9 @@ class _plt_utsnd(object):
         self.legend_handles = {name: line for name, line in zip(labels, self.lines)}
 
     def remove(self):
+        if self._lod is not None:
+            self._lod.remove()
+            self._lod = None
         while self.lines:
             self.lines.pop().remove()
 
@@ -305,6 +317,9 @@ class _plt_utsnd(object):
     def set_ydata(self, epoch):
         if self._sensors:
             epoch = epoch.sub(sensor=self._sensors)
+        if self._lod is not None:
+            self._lod.set_ydata(epoch.get_data(self._dims[::-1]))
+            return
         for line, y in zip(self.lines, epoch.get_data(self._dims)):
             line.set_ydata(y)
 
@@ -151,11 +151,10 @@ def _mark_plot_1sample(ax, ct, par, y_min, y_unit, popmean=0, corr='Hochberg',
         else:
             pwcolors = defaults['c']['pw'][1 - bool(trend):]
     # mod
-    ps = []
     if par:
-        for d in ct.get_data():
-            t, p = scipy.stats.ttest_1samp(d, popmean)
-            ps.append(p)
+        cell_stats = stats.CellStats(ct.get_data())
+        t = (cell_stats.mean - popmean) / np.sqrt(cell_stats.var / cell_stats.n)
+        ps = (2 * scipy.stats.t.sf(np.abs(t), cell_stats.n - 1)).tolist()
     else:
         raise NotImplementedError("nonparametric 1-sample test")
     ps_adjusted = test.mcp_adjust(ps, corr)
@@ -583,18 +582,20 @@ def _plt_barplot(ax, ct, error, pool_error, hatch, colors, bottom, top=None,
     k = len(ct.cells)
     if left is None:
         left = np.arange(k) - width / 2
-    height = np.array(ct.get_statistic(np.mean))
+    cell_stats = stats.CellStats(ct.get_data(), ct.all_within)
+    height = cell_stats.mean
 
     # origin
     if origin is None:
         origin = max(0, bottom)
 
     # error bars
-    if ct.X is None:
-        error_match = None
+    if ct.X is None or not pool_error:
+        y_error = cell_stats.error(error)
+    elif ct.match is None or ct.all_within:
+        y_error = cell_stats.error(error, True)
     else:
-        error_match = ct.match
-    y_error = stats.variability(ct.Y.x, ct.X, error_match, error, pool_error, ct.cells)
+        y_error = stats.variability(ct.Y.x, ct.X, ct.match, error, True)
 
     # fig spacing
     plot_max = np.max(height + y_error)
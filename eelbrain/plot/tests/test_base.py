@@ -1,5 +1,9 @@
 from itertools import chain
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from nose.tools import assert_raises, eq_, assert_greater
+import numpy as np
+from numpy.testing import assert_array_equal
 
 from eelbrain import datasets, plot
 from eelbrain.plot import _base
@@ -83,3 +87,72 @@ def test_eelfigure():
 
     p = plot.UTSStat('uts', 'A', ds=ds, h=2, w=50, show=False)
     eq_(tuple(p.figure.get_size_inches()), (50, 2))
+
+
+@skip_on_windows
+def test_render_jobs():
+    "Test rendering figures in worker processes"
+    ds = datasets.get_uts()
+    jobs = [_base.RenderJob('UTSStat', ('uts', 'A'), {'ds': ds}, format='png'),
+            _base.RenderJob('Barplot', ('Y', 'A'), {'ds': ds}, format='png',
+                            calls=[('set_ylabel', ('value',), {})])]
+    images = _base.render_jobs(jobs, 2)
+    eq_(len(images), 2)
+    for image in images:
+        eq_(image[:4], b'\x89PNG')
+    # in-process
+    images = _base.render_jobs(jobs[:1], 0)
+    eq_(images[0][:4], b'\x89PNG')
+
+
+def test_image_tiler():
+    "Test composing ImageTiler frames in memory"
+    tiler = _base.ImageTiler(nrow=2, ncol=2)
+    tiles = [[np.ones((2, 3, 3), np.uint8), None],
+             [np.ones((4, 1, 4)), np.full((1, 2, 3), 7, np.uint8)]]
+    frame = tiler.compose_frame(tiles)
+    eq_(frame.shape, (6, 5, 3))
+    eq_(frame.dtype, np.uint8)
+    assert_array_equal(frame[:2, :3], 1)
+    assert_array_equal(frame[:2, 3:], 0)
+    assert_array_equal(frame[2:, 0], 255)
+    assert_array_equal(frame[2, 3:], 7)
+    assert_array_equal(frame[3:, 1:], 0)
+    assert_raises(ValueError, tiler.compose_frame, tiles[:1])
+
+
+def test_envelope_pyramid():
+    "Test min/max envelope decimation"
+    x = np.arange(100000) / 1000.
+    y = np.random.normal(0, 1, (100000, 3))
+    pyramid = _base.EnvelopePyramid(x, y)
+    # few samples: raw data
+    xv, yv = pyramid.get(10, 10.5, 1000)
+    assert_array_equal(xv, x[10000:10501])
+    assert_array_equal(yv, y[10000:10501])
+    # decimated
+    xv, yv = pyramid.get(10, 20, 500)
+    assert_greater(len(xv), 1000)
+    assert_greater(4000, len(xv))
+    eq_(yv.shape, (len(xv), 3))
+    assert_array_equal(yv.max(0), y[10000:20001].max(0))
+    assert_array_equal(yv.min(0), y[10000:20001].min(0))
+    xv, yv = pyramid.get(-10, 200, 1000)
+    assert_array_equal(yv.max(0), y.max(0))
+
+
+def test_lod_lines():
+    "Test that decimated lines follow the width of the axes"
+    x = np.arange(100000) / 1000.
+    y = np.random.normal(0, 1, (100000, 1))
+    figure = Figure((2, 2), 100)
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes((0, 0, 1, 1))
+    pyramid, (xv, yv) = _base.LODLines.initial_data(ax, x, y)
+    lines = ax.plot(xv, yv)
+    lod = _base.LODLines(ax, lines, pyramid)
+    n = len(lines[0].get_xdata())
+    figure.set_size_inches(8, 2)
+    lod._on_resize(None)
+    assert_greater(len(lines[0].get_xdata()), n)
+    lod.remove()
@@ -1,5 +1,8 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
-from nose.tools import eq_
+from nose.tools import eq_, ok_
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy import interpolate
 
 from eelbrain import datasets, plot, testnd
 from eelbrain._utils.testing import requires_mne_sample_data
@@ -29,11 +32,66 @@ def test_plot_topomap_mne():
     p.close()
 
 
+def test_topomap_interpolator():
+    "Test precomputed topomap interpolation"
+    from eelbrain.plot._topo import get_topomap_interpolator, topomap_data
+
+    ds = datasets.get_uts(utsnd=True)
+    y = ds['utsnd']
+    locs = y.sensor.get_locs_2d('z root', frame=.05)
+    data = y.sub(case=0, time=(0.1, 0.2)).get_data(('sensor', 'time'))
+    grid = np.linspace(0, 1, 20)
+    mgrid = tuple(np.meshgrid(grid, grid))
+    for method in ('linear', 'nearest', 'cubic'):
+        interpolator = get_topomap_interpolator(locs, method, 20)
+        ok_(get_topomap_interpolator(locs, method, 20) is interpolator)
+        v = data[:, 0]
+        target = interpolate.griddata(locs, v, mgrid, method)
+        assert_allclose(interpolator(v), target, 1e-10)
+        # batch
+        maps = interpolator(data)
+        eq_(maps.shape, (data.shape[1], 20, 20))
+        assert_allclose(maps[0], target, 1e-10)
+        # NaN
+        v = v.copy()
+        v[2] = np.nan
+        ok_(np.isnan(interpolator(v)).any())
+
+    # spline interpolation
+    interpolator = get_topomap_interpolator(locs, None, 20)
+    maps = interpolator(data)
+    assert_allclose(maps[1], interpolator(data[:, 1]))
+
+    # maps for several time points at once
+    y = y.sub(case=0, time=(0.1, 0.2))
+    maps = topomap_data(y, 'default', 'linear', 20)
+    eq_(maps.shape, (len(y.time), 20, 20))
+    t = y.time.times[1]
+    assert_allclose(maps[1], topomap_data(y.sub(time=t), 'default', 'linear',
+                                          20))
+
+
+def test_plot_topomap_bins():
+    "Test plot.TopomapBins"
+    ds = datasets.get_uts(utsnd=True)
+    p = plot.TopomapBins('utsnd', ds=ds, bin_length=0.1, tstart=0.1,
+                         tstop=0.4, show=False)
+    p.close()
+
+
 def test_plot_topo_butterfly():
     "Test plot.TopoButterfly"
     ds = datasets.get_uts(utsnd=True)
     p = plot.TopoButterfly('utsnd', ds=ds, show=False)
     p.set_topo_t(0.2)
+    p.draw()
+    # time markers are reused
+    p.set_topo_t(0.3)
+    eq_(len(p.t_markers), 1)
+    eq_(tuple(p.t_markers[0].get_xdata()), (0.3, 0.3))
+    eq_(p._t_label.get_text(), "t = 300 ms")
+    p._rm_t_markers()
+    ok_(not p.t_markers[0].get_visible())
     p.close()
     p = plot.TopoButterfly('utsnd', ds=ds, vmax=0.2, w=2, show=False)
     p.close()
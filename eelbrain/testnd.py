@@ -2,4 +2,5 @@
 __test__ = False
 
 from ._stats.testnd import (configure, t_contrast_rel, corr, ttest_1samp,
-    ttest_ind, ttest_rel, anova)
+    ttest_ind, ttest_rel, anova, permutation_shard, merge_permutation_shards,
+    shared_permutation, early_stopping)
@@ -911,6 +911,22 @@ def test_ndvar_binning():
     assert_array_equal(binned_ndvar.x, 1.)
     eq_(binned_ndvar.shape, (5, 7))
 
+    # summary functions (vectorized vs. generic callable)
+    ds = datasets.get_uts(utsnd=True)
+    x = ds['utsnd']
+    for func, np_func in (('sum', np.sum), ('max', np.max), ('min', np.min),
+                          ('mean', np.mean)):
+        b = x.bin(0.1, func=func)
+        b_ref = x.bin(0.1, func=lambda x, axis: np_func(x, axis=axis))
+        assert_array_almost_equal(b.x, b_ref.x, 10)
+        eq_(b.info['bins'], b_ref.info['bins'])
+    b = x.bin(0.1, func='extrema')
+    x_bin = x.sub(time=(0.1, 0.2)).x
+    x_max = x_bin.max(2)
+    x_min = x_bin.min(2)
+    assert_array_equal(b.sub(time=0.15).x, np.where(
+        np.abs(x_max) >= np.abs(x_min), x_max, x_min))
+
 
 def test_ndvar_graph_dim():
     "Test NDVar dimensions with conectvity graph"
@@ -933,6 +949,40 @@ def test_ndvar_graph_dim():
     eq_(len(np.unique(l.x)), 6)
 
 
+def test_ndvar_align():
+    "Test alignment of NDVars in binary operations"
+    ds = datasets.get_uts(utsnd=True)
+    x = ds['utsnd']
+
+    # identical dimensions
+    y = x + x
+    ok_(all(d1 is d2 for d1, d2 in zip(y.dims, x.dims)))
+    assert_array_equal(y.x, x.x * 2)
+
+    # equal but not identical dimensions
+    x_copy = NDVar(x.x.copy(), ('case', deepcopy(x.sensor), UTS(-0.2, 0.01, 100)))
+    assert_array_equal((x - x_copy).x, 0)
+    assert_array_equal((x - x_copy).x, 0)  # cached
+
+    # intersection
+    x_sub = x.sub(time=(0, 0.5))
+    y = x - x_sub
+    eq_(y.time, x_sub.time)
+    assert_array_equal(y.x, 0)
+    y = x_sub + x.sub(time=(0.1, None))
+    eq_(y.time, UTS(0.1, 0.01, 40))
+    assert_array_equal(y.x, x.sub(time=(0.1, 0.5)).x * 2)
+
+    # transposed dimensions
+    xt = NDVar(x.x.swapaxes(1, 2), ('case', x.time, x.sensor))
+    assert_array_equal((x - xt).x, 0)
+    eq_((x - xt).dimnames, x.dimnames)
+
+    # get_data
+    ok_(x.get_data(('case', 'sensor', 'time')) is x.x)
+    eq_(x.get_data(('case', 'time', 'sensor')).shape, (60, 100, 5))
+
+
 @nottest
 def test_ndvar_index(x, dimname, index, a_index, index_repr=True):
     "Helper function for test_ndvar_indexing"
@@ -1305,6 +1355,21 @@ def test_sensor():
     eq_(s1.intersect(s2), sensor[[1]])
     eq_(sensor._index_repr(np.array([0, 1, 1], bool)), ['2', '3'])
 
+    # connectivity
+    locs = np.array([[0., 0., 0.],
+                     [1., 0., 0.],
+                     [2.5, 0., 0.],
+                     [2.5, 1.2, 0.]])
+    sensor = Sensor(locs, ['a', 'b', 'c', 'd'])
+    sensor.set_connectivity(connect_dist=1.2)
+    assert_array_equal(sensor.connectivity(), [[0, 1], [2, 3]])
+    sensor.set_connectivity(connect_dist=1.6)
+    assert_array_equal(sensor.connectivity(), [[0, 1], [1, 2], [2, 3]])
+    sensor.set_connectivity([('b', 'a'), ('c', 'b'), ('a', 'b')])
+    assert_array_equal(sensor.connectivity(), [[0, 1], [1, 2]])
+    assert_array_equal(sensor[[1, 2, 3]].connectivity(), [[0, 1]])
+    assert_array_equal(sensor[[2, 1]].connectivity(), [[1, 0]])
+
 
 def test_shuffle():
     x = Factor('aabbaa')
@@ -1374,6 +1439,21 @@ def test_source_space():
     eq_(source_lh.dimindex('rh'), slice(0, 0))
     eq_(source_lh.dimindex('lh'), slice(len(source_lh)))
 
+    # connectivity
+    source = SourceSpace.from_mne_source_spaces(src, 'ico-5', mri_sdir)
+    conn = source.connectivity()
+    eq_(conn.dtype, np.uint32)
+    ok_(np.all(conn[:, 0] < conn[:, 1]))
+    sub_source = source[source.dimindex(('cuneus-lh', 'lingual-lh'))]
+    sub_source_new = SourceSpace(sub_source.vertno, subject, 'ico-5', mri_sdir)
+    assert_array_equal(sub_source.connectivity(),
+                       sub_source_new.connectivity())
+    conn_parc = source.connectivity(True)
+    parc = source.parc.x
+    assert_array_equal(parc[conn_parc[:, 0]], parc[conn_parc[:, 1]])
+    eq_(np.sum(parc[conn[:, 0]] == parc[conn[:, 1]]), len(conn_parc))
+    ok_(source.connectivity(True) is conn_parc)
+
 
 def test_var():
     "Test Var objects"
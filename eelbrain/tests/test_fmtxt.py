@@ -60,6 +60,38 @@ def test_report():
     shutil.rmtree(tempdir)
 
 
+def test_report_stream():
+    "Test streaming fmtxt.Report to HTML"
+    tempdir = TempDir()
+    report = fmtxt.Report("Test Report", date='today')
+    section = report.add_section("Section")
+    section.add_paragraph("Text")
+    subsection = section.add_section("Subsection")
+    ds = datasets.get_uv()
+    p = plot.Barplot('fltvar', 'A', ds=ds, show=False)
+    image = p.image()
+    subsection.add_figure("image", image)
+    subsection.add_figure("same image", image)
+    p.close()
+
+    # embedded images
+    dst = os.path.join(tempdir, 'report.html')
+    report.save_html(dst)
+    with open(dst) as fid:
+        html_ref = fid.read()
+    dst = os.path.join(tempdir, 'report-stream.html')
+    report.save_html(dst, stream=True)
+    with open(dst) as fid:
+        eq_(fid.read(), html_ref)
+
+    # external images are deduplicated
+    report.save_html(dst, False, {'samples': 10}, True)
+    eq_(len(os.listdir(os.path.join(tempdir, 'report-stream'))), 1)
+    with open(dst) as fid:
+        eq_(fid.read().count('loading="lazy"'), 2)
+    eq_(read_meta(dst), {'samples': '10'})
+
+
 def test_eq():
     "Test equation factory"
     s = fmtxt.eq('t', 0.1234)
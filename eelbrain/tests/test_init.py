@@ -0,0 +1,52 @@
+"""Test the top-level namespace"""
+import subprocess
+import sys
+
+from nose.tools import eq_, ok_, assert_raises
+
+import eelbrain
+
+
+# generous bound for the time it takes to import eelbrain, relative to
+# importing its unavoidable dependencies in the same way
+IMPORT_TIME_FACTOR = 3.
+IMPORT_BASELINE = 'numpy, scipy.stats, mne'
+
+
+def import_time(modules):
+    "Shortest time for importing ``modules`` in a new process (in seconds)"
+    code = ("import time\n"
+            "t0 = time.time()\n"
+            "import %s\n"
+            "print(time.time() - t0)\n" % modules)
+    return min(float(subprocess.check_output([sys.executable, '-c', code]))
+               for _ in range(3))
+
+
+def test_import_time():
+    "Test that importing eelbrain stays within its time budget"
+    baseline = import_time(IMPORT_BASELINE)
+    eelbrain_time = import_time('eelbrain')
+    ok_(eelbrain_time < IMPORT_TIME_FACTOR * baseline,
+        "Importing eelbrain took %.2f s (importing %s took %.2f s)" %
+        (eelbrain_time, IMPORT_BASELINE, baseline))
+
+
+def test_lazy_import():
+    "Test that heavy submodules are only imported on first access"
+    code = "import sys, eelbrain; print(' '.join(sorted(sys.modules)))"
+    modules = subprocess.check_output([sys.executable, '-c', code]).split()
+    modules = [module.decode() for module in modules]
+    if sys.version_info >= (3, 7):
+        for module in ('eelbrain.plot', 'eelbrain.gui', 'eelbrain.testnd',
+                       'eelbrain._experiment', 'matplotlib.pyplot', 'wx'):
+            ok_(module not in modules, "%s imported with eelbrain" % module)
+    else:
+        ok_('eelbrain.testnd' in modules)
+
+    # lazy attributes
+    eq_(eelbrain.testnd.__name__, 'eelbrain.testnd')
+    eq_(eelbrain.Report.__name__, 'Report')
+    ok_('plot' in dir(eelbrain))
+    ok_('MneExperiment' in eelbrain.__all__)
+    assert_raises(AttributeError, getattr, eelbrain, 'not_an_attribute')
@@ -1,8 +1,10 @@
 # Author: Christian Brodbeck <christianbrodbeck@nyu.edu>
-from nose.tools import eq_
+from nose.tools import eq_, ok_, assert_raises
+import numpy as np
 from numpy.testing import assert_array_equal
 
-from eelbrain import NDVar, UTS, datasets, concatenate, find_intervals
+from eelbrain import (
+    NDVar, UTS, datasets, concatenate, find_intervals, segment)
 
 
 def test_concatenate():
@@ -24,3 +26,33 @@ def test_find_intervals():
     eq_(find_intervals(x), ((-4, -3), (-2, 0), (1, 5)))
     x = NDVar([1, 1, 0, 1, 1, 0, 1, 1, 1, 1], (time,))
     eq_(find_intervals(x), ((-5, -3), (-2, 0), (1, 5)))
+
+
+def test_segment():
+    "Test segment()"
+    ds = datasets.get_uts(True)
+    x = concatenate(ds[:10, 'utsnd'])  # sensor x time, 10 s
+
+    times = [0.5, 1.23, 4., 8.8]
+    seg = segment(x, times, -0.1, 0.2)
+    eq_(seg.dimnames, ('case', 'sensor', 'time'))
+    eq_(seg.time, UTS(-0.1, 0.01, 30))
+    for t, s in zip(times, seg):
+        assert_array_equal(s.x, x.sub(time=(t - 0.1, t + 0.2)).x)
+    # decim
+    seg = segment(x, times, -0.1, 0.2, 2)
+    eq_(seg.time, UTS(-0.1, 0.02, 15))
+    for t, s in zip(times, seg):
+        assert_array_equal(s.x, x.sub(time=(t - 0.1, t + 0.2, 0.02)).x)
+    # out of range
+    assert_raises(IndexError, segment, x, [0.05], -0.1, 0.2)
+    assert_raises(ValueError, segment, x, [9.9], -0.1, 0.2)
+
+    # view
+    times = np.arange(1, 9, 0.5)
+    seg = segment(x, times, -0.1, 0.2)
+    seg_view = segment(x, times, -0.1, 0.2, view=True)
+    assert_array_equal(seg_view.x, seg.x)
+    ok_(not seg_view.x.flags.writeable)
+    assert_raises(ValueError, segment, x, [0.5, 1.23, 4.], -0.1, 0.2,
+                  view=True)
@@ -2,6 +2,7 @@
 
 from nose.tools import eq_, ok_, assert_is_instance, assert_raises
 from eelbrain._utils.testing import assert_dataobj_equal
+import numpy as np
 from numpy.testing import assert_array_equal
 
 from eelbrain import Factor, NDVar, Var, datasets, table, combine
@@ -40,6 +41,18 @@ def test_frequencies():
     print(freq)
 
 
+def test_stats():
+    "Test table.stats"
+    ds = datasets.get_uv()
+    print(table.stats('fltvar', 'A', 'B', ds=ds))
+    # missing cell in unbalanced design
+    ds = ds.sub("(A != 'a1') | (B != 'b1')")
+    tab = table.stats('fltvar', 'A', 'B', ds=ds, funcs=[np.mean, np.std])
+    ok_('nan' in str(tab))
+    a2b1 = ds[ds.eval("(A == 'a2') & (B == 'b1')"), 'fltvar'].x
+    ok_('%.4g' % a2b1.mean() in str(tab))
+
+
 def test_melt_ndvar():
     "Test table.melt_ndvar()"
     ds = datasets.get_uts(True)